@@ -0,0 +1,139 @@
+import unicodedata
+from collections import deque
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+
+def fold_text(text: str) -> str:
+	"""Minúsculas y sin tildes ("Bogotá" -> "bogota").
+
+	Es la normalización común para comparar texto libre contra los
+	catálogos (skills, roles, ciudades, idiomas).
+	"""
+
+	if not text:
+		return ""
+	decomposed = unicodedata.normalize("NFD", text.lower())
+	return "".join(c for c in decomposed if unicodedata.category(c) != "Mn").strip()
+
+
+_VOWEL_ACCENTS = str.maketrans("áéíóúÁÉÍÓÚ", "aeiouAEIOU")
+
+
+def fold_vowel_accents(text: str) -> str:
+	"""Minúsculas y sin tildes sólo en las vocales ("Bogotá" -> "bogota").
+
+	A diferencia de ``fold_text`` conserva "ñ" y "ü" ("año" != "ano") y
+	no recorta espacios: es la normalización que usaban ``parse_query`` y
+	``extract_rules`` antes del matcher, y la que siguen usando.
+	"""
+
+	return (text or "").lower().translate(_VOWEL_ACCENTS)
+
+
+class CatalogMatcher:
+	"""Matcher Aho-Corasick sobre los términos de un catálogo.
+
+	El autómata se construye una vez con los términos ya normalizados
+	(``fold``) y cada búsqueda es una sola pasada lineal sobre el texto,
+	sin importar el tamaño del catálogo. La semántica es la de
+	``término in texto`` (subcadena) sobre las versiones normalizadas.
+
+	Los resultados se devuelven en el orden del catálogo.
+	"""
+
+	def __init__(
+		self,
+		terms: Iterable[str],
+		fold: Callable[[str], str] = fold_text,
+	) -> None:
+		self.terms: List[str] = list(terms)
+		self._fold = fold
+		self._goto: List[Dict[str, int]] = [{}]
+		self._fail: List[int] = [0]
+		self._out: List[Tuple[int, ...]] = [()]
+
+		for idx, term in enumerate(self.terms):
+			pattern = fold(term)
+			if pattern:
+				self._insert(pattern, idx)
+		self._link()
+
+	def __len__(self) -> int:
+		return len(self.terms)
+
+	def _insert(self, pattern: str, idx: int) -> None:
+		state = 0
+		for ch in pattern:
+			nxt = self._goto[state].get(ch)
+			if nxt is None:
+				nxt = len(self._goto)
+				self._goto[state][ch] = nxt
+				self._goto.append({})
+				self._fail.append(0)
+				self._out.append(())
+			state = nxt
+		self._out[state] += (idx,)
+
+	def _link(self) -> None:
+		# Enlaces de fallo por BFS; cada estado hereda las salidas de su
+		# enlace de fallo para no recorrer la cadena al buscar.
+		queue = deque(self._goto[0].values())
+		while queue:
+			state = queue.popleft()
+			for ch, nxt in self._goto[state].items():
+				queue.append(nxt)
+				fail = self._fail[state]
+				while fail and ch not in self._goto[fail]:
+					fail = self._fail[fail]
+				target = self._goto[fail].get(ch, 0)
+				self._fail[nxt] = target if target != nxt else 0
+				self._out[nxt] += self._out[self._fail[nxt]]
+
+	def find_indices(self, text: str) -> List[int]:
+		"""Índices (en orden del catálogo) de los términos presentes en ``text``."""
+
+		goto, fail, out = self._goto, self._fail, self._out
+		found = set()
+		state = 0
+		for ch in self._fold(text):
+			while state and ch not in goto[state]:
+				state = fail[state]
+			state = goto[state].get(ch, 0)
+			if out[state]:
+				found.update(out[state])
+		return sorted(found)
+
+	def find_all(self, text: str) -> List[str]:
+		"""Términos del catálogo presentes en ``text``, en orden del catálogo."""
+
+		return [self.terms[i] for i in self.find_indices(text)]
+
+	def first(self, text: str) -> Optional[str]:
+		"""Primer término del catálogo (en su orden) presente en ``text``."""
+
+		indices = self.find_indices(text)
+		return self.terms[indices[0]] if indices else None
+
+
+@lru_cache(maxsize=32)
+def _compile(terms: Tuple[str, ...], fold: Callable[[str], str]) -> CatalogMatcher:
+	return CatalogMatcher(terms, fold=fold)
+
+
+def as_matcher(
+	catalog: Union[CatalogMatcher, Iterable[str]],
+	fold: Callable[[str], str] = fold_text,
+) -> CatalogMatcher:
+	"""Devuelve ``catalog`` compilado (cacheado por contenido si es una lista).
+
+	``fold`` sólo se usa al compilar una lista; un matcher ya compilado
+	conserva la suya.
+	"""
+
+	if isinstance(catalog, CatalogMatcher):
+		return catalog
+	return _compile(tuple(catalog), fold)
+
+
+__all__ = ["CatalogMatcher", "as_matcher", "fold_text", "fold_vowel_accents"]
@@ -1,8 +1,10 @@
 import re
-from typing import Iterable, List, Optional
+from typing import Iterable, List, Optional, Union
 
 from spacy.tokens import Doc
 
+from .catalog_matcher import CatalogMatcher, as_matcher, fold_vowel_accents
+
 
 NUM_CANDIDATES_PATTERN = re.compile(
 	r"(?P<num>\d+)\s+(candidatos?|perfiles?|personas?|ingenieros?|t[eé]cnicos?)",
@@ -63,41 +65,28 @@ def extract_experience(text: str) -> Optional[int]:
 		return None
 
 
-def _strip_accents(text: str) -> str:
-	"""Devuelve ``text`` sin tildes para comparaciones robustas."""
-
-	replacements = str.maketrans("áéíóúÁÉÍÓÚ", "aeiouAEIOU")
-	return text.translate(replacements)
-
-
-def extract_location(doc: Doc, cities: Iterable[str]) -> Optional[str]:
+def extract_location(
+	doc: Doc, cities: Union[CatalogMatcher, Iterable[str]]
+) -> Optional[str]:
 	"""Devuelve la primera ciudad colombiana mencionada en el texto.
 
 	Se compara contra un pequeño catálogo de ciudades, ignorando tildes.
+	``cities`` puede ser un ``CatalogMatcher`` ya compilado.
 	"""
 
-	text_norm = _strip_accents(doc.text.lower())
-	for city in cities:
-		city_norm = _strip_accents(city.lower())
-		if city_norm in text_norm:
-			return city
-	return None
+	return as_matcher(cities, fold_vowel_accents).first(doc.text)
 
 
-def extract_languages(text: str, languages: Iterable[str]) -> List[str]:
+def extract_languages(
+	text: str, languages: Union[CatalogMatcher, Iterable[str]]
+) -> List[str]:
 	"""Devuelve los idiomas mencionados explícitamente en el texto.
 
 	La comparación es insensible a mayúsculas y tildes ("ingles" vs
-	"inglés").
+	"inglés"). ``languages`` puede ser un ``CatalogMatcher`` ya compilado.
 	"""
 
-	found: List[str] = []
-	text_norm = _strip_accents(text.lower())
-	for lang in languages:
-		lang_norm = _strip_accents(lang.lower())
-		if lang_norm in text_norm:
-			found.append(lang)
-	return found
+	return as_matcher(languages, fold_vowel_accents).find_all(text)
 
 
 __all__ = [
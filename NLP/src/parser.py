@@ -5,6 +5,7 @@ from typing import Dict, List, Optional
 from .schema import QueryRequirements
 from .spacy_utils import get_doc, iter_noun_chunks
 from .beto_utils import precompute_catalog_embeddings, most_similar
+from .catalog_matcher import CatalogMatcher, fold_vowel_accents
 from .extract_rules import (
 	extract_experience,
 	extract_languages,
@@ -28,6 +29,11 @@ _LANGUAGES = _load_json_list(CONFIG_DIR / "languages.json")
 _ROLE_EMBEDS: Dict[str, object] = precompute_catalog_embeddings(_ROLES)
 _SKILL_EMBEDS: Dict[str, object] = precompute_catalog_embeddings(_SKILLS)
 
+# Catálogos compilados una sola vez (búsqueda lineal en el texto)
+_SKILL_MATCHER = CatalogMatcher(_SKILLS, fold=fold_vowel_accents)
+_CITY_MATCHER = CatalogMatcher(_CITIES, fold=fold_vowel_accents)
+_LANGUAGE_MATCHER = CatalogMatcher(_LANGUAGES, fold=fold_vowel_accents)
+
 
 def _detect_role(doc_text: str, noun_chunks: List[str]) -> Optional[str]:
 	"""Detecta el rol principal usando spans nominales + BETO.
@@ -62,13 +68,6 @@ def _detect_role(doc_text: str, noun_chunks: List[str]) -> Optional[str]:
 	return best_role
 
 
-def _strip_accents(text: str) -> str:
-	"""Devuelve ``text`` sin tildes para comparaciones de skills."""
-
-	replacements = str.maketrans("áéíóúÁÉÍÓÚ", "aeiouAEIOU")
-	return text.translate(replacements)
-
-
 def _detect_skills(text: str, noun_chunks: List[str]) -> List[str]:
 	"""Detecta skills mencionadas en el texto.
 
@@ -82,7 +81,7 @@ def _detect_skills(text: str, noun_chunks: List[str]) -> List[str]:
 	found: List[str] = []
 	# Normalizamos a minúsculas y sin tildes para ser más robustos a
 	# variaciones de escritura ("mecánica" vs "mecanica").
-	lowered = _strip_accents(text.lower())
+	lowered = fold_vowel_accents(text)
 
 	# Regla especial: "mantenimiento preventivo y correctivo"
 	if "mantenimiento preventivo" in lowered and "correctivo" in lowered:
@@ -90,10 +89,9 @@ def _detect_skills(text: str, noun_chunks: List[str]) -> List[str]:
 			if target in _SKILLS and target not in found:
 				found.append(target)
 
-	# Coincidencias literales generales
-	for skill in _SKILLS:
-		skill_lower = _strip_accents(skill.lower())
-		if skill_lower in lowered and skill not in found:
+	# Coincidencias literales generales (una pasada con el matcher)
+	for skill in _SKILL_MATCHER.find_all(lowered):
+		if skill not in found:
 			found.append(skill)
 
 	return found
@@ -117,8 +115,8 @@ def parse_query(text: str) -> QueryRequirements:
 	skills = _detect_skills(doc.text, noun_chunks)
 	years_experience = extract_experience(doc.text)
 	num_candidates = extract_num_candidates(doc.text)
-	location = extract_location(doc, _CITIES)
-	languages = extract_languages(doc.text, _LANGUAGES)
+	location = extract_location(doc, _CITY_MATCHER)
+	languages = extract_languages(doc.text, _LANGUAGE_MATCHER)
 
 	return QueryRequirements(
 		role=role,
@@ -0,0 +1,59 @@
+import random
+
+from NLP.src.catalog_matcher import CatalogMatcher, as_matcher, fold_text, fold_vowel_accents
+
+
+SKILLS = [
+	"SQL", "Power BI", "Python", "Excel", "Excel avanzado", "SAP", "SAP PM",
+	"mantenimiento preventivo", "mantenimiento correctivo", "mantenimiento",
+	"Soldadura", "soldadura TIG", "Inglés", "AutoCAD", "C", "C++", "Java", "JavaScript",
+]
+
+
+def _substring_scan(catalog, text):
+	"""Comparación original: cada término del catálogo contra el texto."""
+	text_norm = fold_text(text)
+	return [term for term in catalog if fold_text(term) and fold_text(term) in text_norm]
+
+
+def test_matcher_coincide_con_busqueda_por_subcadena():
+	rng = random.Random(0)
+	words = [w for term in SKILLS for w in term.split()] + ["con", "y", "de", "experiencia", "bogotá"]
+	matcher = CatalogMatcher(SKILLS)
+
+	for _ in range(300):
+		text = " ".join(rng.choice(words) for _ in range(rng.randint(0, 12)))
+		expected = _substring_scan(SKILLS, text)
+		assert matcher.find_all(text) == expected, text
+		assert matcher.first(text) == (expected[0] if expected else None), text
+
+
+def test_matcher_catalogos_aleatorios_con_prefijos_y_solapes():
+	rng = random.Random(1)
+	for _ in range(50):
+		catalog = [
+			"".join(rng.choice("abcá") for _ in range(rng.randint(1, 4)))
+			for _ in range(rng.randint(1, 15))
+		]
+		matcher = CatalogMatcher(catalog)
+		for _ in range(20):
+			text = "".join(rng.choice("abcaÁ ") for _ in range(rng.randint(0, 20)))
+			assert matcher.find_all(text) == _substring_scan(catalog, text), (catalog, text)
+
+
+def test_matcher_ignora_mayusculas_y_tildes():
+	matcher = CatalogMatcher(["Inglés", "Power BI", ""])
+
+	assert matcher.find_all("Que hable INGLES y sepa power bi") == ["Inglés", "Power BI"]
+	assert matcher.first("sin coincidencias") is None
+
+
+def test_matcher_con_la_normalizacion_original_del_parser():
+	"""parse_query sólo quita tildes de vocales: "ñ" y "ü" no se pliegan."""
+
+	matcher = CatalogMatcher(["Diseño", "Bogotá", "Lingüística"], fold=fold_vowel_accents)
+
+	assert matcher.find_all("DISEÑO web en bogota, lingüistica") == ["Diseño", "Bogotá", "Lingüística"]
+	assert matcher.find_all("diseno web, linguistica") == []
+	assert as_matcher(["Diseño"], fold_vowel_accents).find_all("diseno") == []
+	assert as_matcher(["Diseño"]).find_all("diseno") == ["Diseño"]
@@ -1,19 +1,73 @@
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import List
+import asyncio
+import time
 import uvicorn
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse
 from pydantic import BaseModel
-from query_pipeline import run_query_pipeline, NotAJobQuery, NoCandidatesFound
+from query_pipeline import run_query_pipeline, warmup, NotAJobQuery, NoCandidatesFound
+from query_executor import (
+    BoundedExecutor,
+    ExecutorBusy,
+    QUERY_EXECUTOR,
+    QUERY_QUEUE_MAX,
+    QUERY_WORKERS,
+)
+from ranking_model.src.ranking_features import reload_corpus
+from ranking_model.src.instrumentation import (
+    reset_timing_stats,
+    span,
+    timing_stats,
+    trace_request,
+)
 
 
 BASE_DIR = Path(__file__).resolve().parent
 FRONTEND_DIR = BASE_DIR / "frontend"
 
-app = FastAPI(title="Talento Humano - PoC", version="0.1.0")
+# Ejecutor dedicado para la inferencia de /query (tamaño y cola acotados).
+# ``warmup`` carga y calienta los modelos (una vez por proceso en modo procesos).
+query_executor = BoundedExecutor(
+    QUERY_EXECUTOR, QUERY_WORKERS, QUERY_QUEUE_MAX, initializer=warmup
+)
+
+
+async def _warm_up(app: FastAPI) -> None:
+    """
+    Carga spaCy, BETO, el motor de ranking y el encoder con una consulta
+    ficticia antes de declarar la app lista (/health/ready).
+    """
+    start = time.perf_counter()
+    try:
+        await query_executor.warm_up()
+    except Exception as e:
+        app.state.warmup_error = str(e)
+        print(f"[ERROR] Falló el calentamiento de modelos: {e}")
+        return
+    # Los tiempos del calentamiento no deben contar en /admin/timings
+    reset_timing_stats()
+    app.state.ready = True
+    print(f"[INFO] Modelos cargados y calentados en {time.perf_counter() - start:.1f}s.")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # El calentamiento corre en segundo plano: /health responde desde el
+    # arranque y /health/ready sólo cuando los modelos están listos
+    app.state.ready = False
+    app.state.warmup_error = None
+    warmup_task = asyncio.create_task(_warm_up(app))
+    yield
+    warmup_task.cancel()
+    query_executor.shutdown(wait=False)
+
+
+app = FastAPI(title="Talento Humano - PoC", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -64,18 +118,28 @@ class FullResponse(BaseModel):
 # ---------- Endpoint principal ----------
 
 @app.post("/query", response_model=FullResponse)
-def handle_query(payload: QueryRequest):
+async def handle_query(payload: QueryRequest):
     text = (payload.text or "").strip()
     if not text:
         raise HTTPException(status_code=400, detail="El texto de la consulta no puede estar vacío.")
 
-    try:
-        ranked_candidates, used_query = run_query_pipeline(text)
-    except NotAJobQuery as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except NoCandidatesFound as e:
-        raise HTTPException(status_code=404, detail=str(e))
+    with trace_request("/query"):
+        # El pipeline (spaCy, BETO, ranking) corre en el ejecutor dedicado;
+        # el event loop sigue libre para otras peticiones
+        try:
+            ranked_candidates, used_query = await query_executor.run(run_query_pipeline, text)
+        except ExecutorBusy as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+        except NotAJobQuery as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except NoCandidatesFound as e:
+            raise HTTPException(status_code=404, detail=str(e))
+
+        with span("serialize"):
+            return _build_response(ranked_candidates, used_query)
 
+
+def _build_response(ranked_candidates, used_query) -> FullResponse:
     # used_query es RankingQuery (el de ranking_model/src/ranking_features.py)
     parsed_resp = ParsedQueryResponse(
         role=used_query.role,
@@ -105,6 +169,57 @@ def handle_query(payload: QueryRequest):
     return FullResponse(parsed_query=parsed_resp, candidates=candidate_items)
 
 
+# ---------- Salud ----------
+
+@app.get("/health")
+async def handle_health():
+    """Liveness: el proceso responde (los modelos pueden estar cargando)."""
+    return {"status": "ok"}
+
+
+@app.get("/health/ready")
+async def handle_ready():
+    """Readiness: 200 sólo cuando los modelos ya están cargados y calentados."""
+    if not app.state.ready:
+        return JSONResponse(
+            status_code=503,
+            content={"ready": False, "error": app.state.warmup_error},
+        )
+    return {"ready": True}
+
+
+# ---------- Administración ----------
+
+def _require_thread_executor(endpoint: str) -> None:
+    """
+    Con QUERY_EXECUTOR=process cada worker tiene su propio motor de ranking y
+    sus propios tiempos: este proceso no puede recargarlos ni leerlos.
+    """
+    if query_executor.kind == "process":
+        raise HTTPException(
+            status_code=409,
+            detail=(
+                f"{endpoint} no está disponible con QUERY_EXECUTOR=process: cada worker "
+                "tiene su propio corpus y sus propios tiempos (y recarga el corpus solo "
+                "cada RANKING_CORPUS_RELOAD_INTERVAL segundos). Usa QUERY_EXECUTOR=thread."
+            ),
+        )
+
+
+@app.post("/admin/reload")
+def handle_reload():
+    """Recarga el corpus de candidatos en segundo plano (sin reiniciar la app)."""
+    _require_thread_executor("/admin/reload")
+    return reload_corpus(force=True)
+
+
+@app.get("/admin/timings")
+def handle_timings():
+    """Tiempos agregados por etapa (count, mean/p50/p95/max en ms) desde el arranque."""
+    _require_thread_executor("/admin/timings")
+    return {"stages": timing_stats(), "executor": query_executor.stats()}
+
+
 @app.get("/", response_class=HTMLResponse)
 def serve_index():
     """Devuelve el index.html del frontend."""
@@ -1,5 +1,7 @@
 """Main FastAPI application factory."""
 
+import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Dict
 
@@ -13,10 +15,33 @@ from app.config import settings
 from app.core.exceptions import ApplicationException
 from app.core.logger import get_logger
 from app.models.schemas import ErrorDetail, ErrorResponse
+from app.services.cv_extractor import CVExtractor
 
 logger = get_logger(__name__)
 
 
+async def _warm_up(app: FastAPI) -> None:
+    """Load and warm up the NLP models, then mark the app as ready."""
+    try:
+        await asyncio.to_thread(CVExtractor.warmup)
+    except Exception as e:
+        app.state.warmup_error = str(e)
+        logger.error(f"Model warmup failed: {e}")
+        return
+    app.state.ready = True
+    logger.info("Models loaded and warmed up")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up models in the background; /health/ready reports when done."""
+    app.state.ready = False
+    app.state.warmup_error = None
+    warmup_task = asyncio.create_task(_warm_up(app))
+    yield
+    warmup_task.cancel()
+
+
 def create_app() -> FastAPI:
     """Create and configure FastAPI application."""
 
@@ -27,6 +52,7 @@ def create_app() -> FastAPI:
         docs_url="/docs",
         redoc_url="/redoc",
         openapi_url="/openapi.json",
+        lifespan=lifespan,
     )
 
     # Configure CORS
@@ -88,8 +114,17 @@ def create_app() -> FastAPI:
         return {"status": "ok", "service": "reclutador_ia_backend"}
 
     @app.get("/health/ready", tags=["health"])
-    async def readiness_check() -> Dict[str, str]:
-        """Readiness check endpoint."""
+    async def readiness_check():
+        """Readiness check endpoint (503 until the models are warmed up)."""
+        if not app.state.ready:
+            return JSONResponse(
+                status_code=503,
+                content={
+                    "ready": False,
+                    "error": app.state.warmup_error,
+                    "timestamp": datetime.utcnow().isoformat(),
+                },
+            )
         return {"ready": True, "timestamp": datetime.utcnow().isoformat()}
 
     # Include API routers
@@ -25,6 +25,21 @@ except ImportError as e:
 class CVExtractor:
     """Robustly extracts attributes from CVs using NLP."""
 
+    @staticmethod
+    def warmup() -> None:
+        """
+        Load and warm up the NLP models (spaCy, BETO catalog embeddings)
+        with a dummy CV so the first real extraction does not pay for it.
+        """
+        if not NLP_AVAILABLE:
+            return
+
+        cv_text = "Ingeniero de mantenimiento con 3 años de experiencia en Cartagena. Inglés B2."
+        doc = get_doc(cv_text)
+        noun_chunks = [chunk.text for chunk in doc.noun_chunks] if hasattr(doc, 'noun_chunks') else []
+        _detect_role(cv_text, noun_chunks)
+        _detect_skills(cv_text, noun_chunks)
+
     @staticmethod
     def extract_attributes(cv_text: str, document_id: str) -> List[Dict]:
         """
@@ -0,0 +1,144 @@
+# query_executor.py
+from __future__ import annotations
+
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import contextvars
+import multiprocessing
+import os
+import threading
+import time
+
+from ranking_model.src.instrumentation import annotate
+
+
+# ----------------- Configuración -----------------
+
+# "thread" (por defecto) o "process". Con procesos cada worker carga sus
+# propios modelos y su propio motor de ranking (más memoria, sin GIL).
+QUERY_EXECUTOR = os.getenv("QUERY_EXECUTOR", "thread").lower()
+# Peticiones ejecutándose a la vez (inferencia spaCy/BETO/transformer)
+QUERY_WORKERS = int(os.getenv("QUERY_WORKERS", "2"))
+# Peticiones que pueden esperar turno; por encima se responde 503
+QUERY_QUEUE_MAX = int(os.getenv("QUERY_QUEUE_MAX", "32"))
+
+
+class ExecutorBusy(Exception):
+    """No hay hueco en el ejecutor ni en su cola (back-pressure)."""
+
+
+def _run_timed(submitted_at: float, fn: Callable[..., Any], *args: Any) -> Any:
+    # Tiempo en cola: sólo llega a la traza de la petición en modo hilos
+    annotate(queue_ms=round((time.monotonic() - submitted_at) * 1000.0, 3))
+    return fn(*args)
+
+
+def _worker_pid() -> int:
+    # Tarea mínima para comprobar qué procesos del pool ya arrancaron
+    time.sleep(0.05)
+    return os.getpid()
+
+
+class BoundedExecutor:
+    """
+    Ejecutor dedicado para el trabajo pesado de las peticiones, con
+    ``workers`` ejecutándose y como mucho ``queue_max`` esperando.
+
+    - ``submit`` no bloquea nunca: si no hay hueco lanza ``ExecutorBusy``
+      y la API responde 503 en lugar de acumular latencia.
+    - ``run`` es la versión ``await``-able para endpoints async: el event
+      loop queda libre (health checks, readiness) mientras se infiere.
+    - En modo hilos la tarea se ejecuta con el contexto de la petición, así
+      sus tiempos por etapa acaban en la misma traza (instrumentation.py).
+    - ``initializer`` carga/calienta los modelos: en modo procesos lo ejecuta
+      cada worker al arrancar; ``warm_up`` espera a que estén todos listos.
+    """
+
+    def __init__(
+        self,
+        kind: str = "thread",
+        workers: int = 2,
+        queue_max: int = 32,
+        initializer: Optional[Callable[[], None]] = None,
+    ) -> None:
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Tipo de ejecutor desconocido: {kind!r}. Opciones: thread, process")
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.queue_max = max(0, queue_max)
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_max)
+        self._initializer = initializer
+        self._executor: Executor
+        if kind == "process":
+            # spawn: el proceso principal ya tiene hilos (watcher del corpus, batcher)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=initializer,
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="query-worker"
+            )
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    def _release(self, _: Future) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise ExecutorBusy("Servidor ocupado: demasiadas consultas en curso.")
+        with self._lock:
+            self.in_flight += 1
+        try:
+            if self.kind == "process":
+                future = self._executor.submit(_run_timed, time.monotonic(), fn, *args)
+            else:
+                ctx = contextvars.copy_context()
+                future = self._executor.submit(ctx.run, _run_timed, time.monotonic(), fn, *args)
+        except BaseException:
+            self._release(Future())
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    async def warm_up(self) -> None:
+        """
+        Calienta los workers antes de recibir tráfico (no ocupa la cola).
+        Con hilos los modelos se comparten y basta con una ejecución del
+        initializer; con procesos se espera a ver responder a cada worker
+        (que ejecuta el initializer antes de su primera tarea).
+        """
+        if self._initializer is None:
+            return
+        if self.kind == "thread":
+            await asyncio.wrap_future(self._executor.submit(self._initializer))
+            return
+        seen = set()
+        while len(seen) < self.workers:
+            futures = [self._executor.submit(_worker_pid) for _ in range(self.workers)]
+            seen.update(await asyncio.gather(*(asyncio.wrap_future(f) for f in futures)))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "workers": self.workers,
+                "queue_max": self.queue_max,
+                "in_flight": self.in_flight,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
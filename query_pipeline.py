@@ -1,17 +1,34 @@
 # query_pipeline.py
 from __future__ import annotations
 
+from bisect import bisect_right
+from collections import OrderedDict
+from copy import deepcopy
 from dataclasses import asdict
-from typing import List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
+import logging
 import re
+import threading
+import time
 
 from NLP.src.parser import parse_query
-from ranking_model.src.ranking_features import QueryRequirements as RankingQuery, run_ranking
+from NLP.src.catalog_matcher import CatalogMatcher
+from ranking_model.src.ranking_features import (
+    QueryRequirements as RankingQuery,
+    corpus_catalogs,
+    corpus_version,
+    run_ranking,
+)
+from ranking_model.src.config import RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_TTL_S
+from ranking_model.src.instrumentation import annotate, get_logger, span, trace_request
 from ranking_model.src.ranking_orchestrator import _normalize_text
-from ranking_model.src.ranking_engine import get_all_roles, get_all_skills
+from ranking_model.src.ranking_engine import register_catalog_compiler
 from job_query_filter import analyze_job_query
 
 
+logger = get_logger(__name__)
+
+
 # ----------------- Excepciones específicas -----------------
 
 
@@ -53,6 +70,82 @@ def _infer_num_candidates(raw_text: str, nlp_num: Optional[int]) -> Optional[int
     return None
 
 
+# ----------------- Catálogos compilados -----------------
+
+
+class RoleCatalogIndex:
+    """
+    Catálogo de roles precompilado para ``_infer_role_from_catalog``:
+      - roles normalizados (una sola vez)
+      - postings token -> roles que lo contienen
+      - matcher Aho-Corasick de los roles completos (rol dentro del texto)
+
+    Puntuar una consulta sólo recorre las postings de sus tokens, en lugar de
+    re-normalizar y comparar cada rol del catálogo.
+    """
+
+    # Separador de los roles en ``_joined`` (no aparece en texto normalizado)
+    _SEP = "\x00"
+
+    def __init__(self, roles: List[str]) -> None:
+        self.roles = list(roles)
+        self._norms = [_normalize_text(r) for r in self.roles]
+        self._postings: Dict[str, List[int]] = {}
+        for idx, r_norm in enumerate(self._norms):
+            for tok in set(r_norm.split()):
+                self._postings.setdefault(tok, []).append(idx)
+        # Los roles ya están normalizados: el matcher no vuelve a normalizar
+        self._contained = CatalogMatcher(self._norms, fold=str)
+        self._joined = self._SEP.join(self._norms)
+        self._starts: List[int] = []
+        pos = 0
+        for r_norm in self._norms:
+            self._starts.append(pos)
+            pos += len(r_norm) + 1
+
+    def _roles_containing(self, text_norm: str) -> List[int]:
+        # Roles que contienen todo el texto (consultas muy cortas).
+        # Es un str.find sobre los roles concatenados: una pasada en C.
+        found: List[int] = []
+        if not text_norm or self._SEP in text_norm:
+            return found
+        pos = self._joined.find(text_norm)
+        while pos >= 0:
+            idx = bisect_right(self._starts, pos) - 1
+            found.append(idx)
+            if idx + 1 >= len(self._starts):
+                break
+            pos = self._joined.find(text_norm, self._starts[idx + 1])
+        return found
+
+    def best_match(self, text_norm: str) -> Tuple[Optional[str], float]:
+        """
+        (rol, score) con el mismo criterio que la comparación rol a rol:
+        nº de tokens en común + 0.5 si uno de los textos contiene al otro.
+        En empate gana el primero del catálogo.
+        """
+        scores: Dict[int, float] = {}
+        for tok in set(text_norm.split()):
+            for idx in self._postings.get(tok, ()):
+                scores[idx] = scores.get(idx, 0.0) + 1.0
+
+        # Bonus si el rol completo aparece dentro del texto (o al revés)
+        bonus = set(self._contained.find_indices(text_norm))
+        bonus.update(self._roles_containing(text_norm))
+        for idx in bonus:
+            scores[idx] = scores.get(idx, 0.0) + 0.5
+
+        if not scores:
+            return None, 0.0
+        best_idx = min(scores, key=lambda i: (-scores[i], i))
+        return self.roles[best_idx], scores[best_idx]
+
+
+# Se compilan junto con cada versión del corpus (arranque o recarga)
+register_catalog_compiler("roles", "roles", RoleCatalogIndex)
+register_catalog_compiler("skills", "skills", CatalogMatcher)
+
+
 # ----------------- Inferir rol desde el catálogo -----------------
 
 
@@ -66,28 +159,8 @@ def _infer_role_from_catalog(raw_text: str, nlp_role: Optional[str]) -> Optional
     - Si no, se hace fallback al rol que venga de NLP.
     """
     text_norm = _normalize_text(raw_text)
-    q_tokens = set(text_norm.split())
-
-    best_role: Optional[str] = None
-    best_score: float = 0.0
-
-    for role in get_all_roles():
-        r_norm = _normalize_text(role)
-        if not r_norm:
-            continue
-        r_tokens = set(r_norm.split())
-
-        # intersección de tokens: 'analista de datos' vs 'una analista de datos'
-        inter = q_tokens & r_tokens
-        score = float(len(inter))
-
-        # Bonus si el rol completo aparece dentro del texto
-        if r_norm in text_norm or text_norm in r_norm:
-            score += 0.5
-
-        if score > best_score:
-            best_score = score
-            best_role = role
+    index = corpus_catalogs().compiled("roles")
+    best_role, best_score = index.best_match(text_norm)
 
     # Si no encontramos nada razonable, usar lo que diga NLP (puede ser algo general)
     if best_role is None or best_score == 0.0:
@@ -124,23 +197,156 @@ def _infer_skills_from_catalog(
                 result.append(s_clean)
                 seen.add(s_clean)
 
-    # 2) Skills del catálogo que aparezcan en el texto
-    text_norm = _normalize_text(raw_text)
-    for skill in get_all_skills():
-        sk_norm = _normalize_text(skill)
-        if not sk_norm:
-            continue
-        if sk_norm in text_norm and skill not in seen:
+    # 2) Skills del catálogo que aparezcan en el texto (una sola pasada)
+    matcher = corpus_catalogs().compiled("skills")
+    for skill in matcher.find_all(raw_text):
+        if skill not in seen:
             result.append(skill)
             seen.add(skill)
 
     return result
 
 
-# ----------------- Pipeline principal -----------------
+# ----------------- Cache de resultados -----------------
+
+
+def canonical_query(text: str) -> str:
+    """
+    Forma canónica de una consulta para el cache: minúsculas, sin tildes
+    y con los espacios colapsados ("Ingeniero  en Bogotá" == "ingeniero en bogota").
+    """
+    return " ".join(_normalize_text(text).split())
+
+
+class QueryResultCache:
+    """
+    Cache LRU con TTL de resultados completos de ``run_query_pipeline``,
+    por texto canónico. Las entradas pertenecen a una versión del corpus:
+    al cambiar la versión (recarga, altas/bajas) el cache se vacía entero.
+    Se guardan también los rechazos (NotAJobQuery / NoCandidatesFound).
+    Se guarda y se devuelve siempre una copia: ningún llamador comparte
+    (ni puede modificar) los objetos de otro. Seguro entre hilos.
+    """
+
+    def __init__(self, max_entries: int, ttl_s: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._items: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self, version: int) -> None:
+        if version != self._version:
+            self._items.clear()
+            self._version = version
+
+    def get(self, key: str, version: int) -> Optional[Any]:
+        with self._lock:
+            self._check_version(version)
+            item = self._items.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._items[key]
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            value = item[1]
+        return deepcopy(value)
+
+    def put(self, key: str, version: int, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        value = deepcopy(value)
+        with self._lock:
+            # Resultado calculado con un corpus que ya cambió: no se guarda
+            if version != self._version:
+                return
+            self._items[key] = (time.monotonic() + self.ttl_s, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._items),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+
+# Rechazos que dependen sólo del texto y del corpus: se pueden cachear
+_CACHEABLE_ERRORS = (NotAJobQuery, NoCandidatesFound)
+
+_result_cache = QueryResultCache(
+    max_entries=RESULT_CACHE_MAX_ENTRIES,
+    ttl_s=RESULT_CACHE_TTL_S,
+)
 
 
 def run_query_pipeline(raw_text: str):
+    """
+    Igual que ``_run_query_pipeline`` pero pasando por el cache de resultados:
+    una consulta repetida (misma forma canónica, mismo corpus) no vuelve a
+    pasar por el filtro, spaCy, BETO ni el ranking.
+    """
+    text = (raw_text or "").strip()
+    if not text:
+        raise ValueError("La consulta no puede estar vacía.")
+
+    with trace_request("query"):
+        key = canonical_query(text)
+        version = corpus_version()
+        with span("result_cache"):
+            cached = _result_cache.get(key, version)
+        annotate(cached=cached is not None)
+        if cached is not None:
+            if isinstance(cached, _CACHEABLE_ERRORS):
+                raise cached
+            return cached
+
+        try:
+            ranked_candidates, used_query = _run_query_pipeline(text)
+        except _CACHEABLE_ERRORS as e:
+            _result_cache.put(key, version, e)
+            raise
+        _result_cache.put(key, version, (ranked_candidates, used_query))
+        return ranked_candidates, used_query
+
+
+# ----------------- Calentamiento -----------------
+
+
+_WARMUP_QUERY = "Busco un ingeniero de mantenimiento con 3 años de experiencia en Cartagena"
+
+
+def warmup() -> None:
+    """
+    Carga y calienta todo lo que usa una consulta con una consulta ficticia:
+    filtro, spaCy, BETO, catálogos compilados, motor de ranking (embeddings
+    del corpus) y encoder de consultas. No pasa por el cache de resultados.
+    """
+    try:
+        _run_query_pipeline(_WARMUP_QUERY)
+    except (NotAJobQuery, NoCandidatesFound):
+        pass
+
+
+# ----------------- Pipeline principal -----------------
+
+
+def _run_query_pipeline(raw_text: str):
     """
     Orquesta todo:
       1) Filtro 'esto es una búsqueda de trabajo'
@@ -155,31 +361,37 @@ def run_query_pipeline(raw_text: str):
         raise ValueError("La consulta no puede estar vacía.")
 
     # 1) Filtro ligero de 'texto de trabajo'
-    is_job, score = analyze_job_query(text)
-    print(f"=== JOB_FILTER score={score:.3f} is_job={is_job} ===")
+    with span("job_filter"):
+        is_job, score = analyze_job_query(text)
+    annotate(job_score=round(float(score), 3), is_job=is_job)
     if not is_job:
         raise NotAJobQuery("Tu solicitud no corresponde al objetivo de esta app (búsqueda de candidatos).")
 
     # 2) NLP: parseo estructurado
-    print("\n=== NLP INPUT ===")
-    print("raw_text:", repr(text))
-    nlp_q = parse_query(text)
+    with span("nlp_parse"):
+        nlp_q = parse_query(text)
 
-    print("=== NLP OUTPUT (NLP.QueryRequirements) ===")
     role_text = getattr(nlp_q, "role_text", None)
-    print("role_text:", role_text)
-    print("skills:", getattr(nlp_q, "skills", None))
-    print("location:", getattr(nlp_q, "location", None))
-    print("years_experience:", getattr(nlp_q, "years_experience", None))
-    print("num_candidates:", getattr(nlp_q, "num_candidates", None))
-    print("languages:", getattr(nlp_q, "languages", None))
-
-    # 3) Rol: usar catálogo + NLP
-    nlp_role = role_text or getattr(nlp_q, "role", None)
-    ranking_role = _infer_role_from_catalog(text, nlp_role)
-
-    # 4) Skills: catálogo + NLP + texto completo como contexto
-    inferred_skills = _infer_skills_from_catalog(text, getattr(nlp_q, "skills", None))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "NLP raw_text=%r role_text=%r skills=%r location=%r years_experience=%r "
+            "num_candidates=%r languages=%r",
+            text,
+            role_text,
+            getattr(nlp_q, "skills", None),
+            getattr(nlp_q, "location", None),
+            getattr(nlp_q, "years_experience", None),
+            getattr(nlp_q, "num_candidates", None),
+            getattr(nlp_q, "languages", None),
+        )
+
+    with span("catalog_inference"):
+        # 3) Rol: usar catálogo + NLP
+        nlp_role = role_text or getattr(nlp_q, "role", None)
+        ranking_role = _infer_role_from_catalog(text, nlp_role)
+
+        # 4) Skills: catálogo + NLP + texto completo como contexto
+        inferred_skills = _infer_skills_from_catalog(text, getattr(nlp_q, "skills", None))
     skills_for_ranking: List[str] = list(inferred_skills)
     # Añadimos el texto completo como 'contexto' adicional para el embedding
     skills_for_ranking.append(text)
@@ -205,10 +417,12 @@ def run_query_pipeline(raw_text: str):
 
     ranked_candidates, used_query = run_ranking(ranking_q)
 
-    print("=== RANKING OUTPUT (top candidates) ===")
-    print(f"count: {len(ranked_candidates)}")
-    for c in ranked_candidates:
-        print(c.id, c.role, "score:", c.score)
+    annotate(candidates=len(ranked_candidates))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Ranking: %s",
+            ", ".join(f"{c.id} ({c.role}) {c.score:.3f}" for c in ranked_candidates),
+        )
 
     if not ranked_candidates:
         raise NoCandidatesFound("No hay candidatos que cumplan con lo solicitado en este momento.")
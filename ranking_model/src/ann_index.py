@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Type, Union
+
+import numpy as np
+
+
+# --------- Interfaz común ---------
+
+
+class VectorIndex:
+    """
+    Índice de vecinos aproximados sobre la matriz de embeddings (normalizada)
+    del motor. Los "ids" son los índices de fila del corpus.
+
+    El índice NO guarda una copia de los vectores: en cada búsqueda recibe
+    una función que puntúa un subconjunto de filas con la matriz del motor
+    (float32 o cuantizada), así no se duplica memoria.
+    """
+
+    name = "base"
+    # Parámetros de consulta (recall/latencia) que se pueden cambiar sin reconstruir
+    search_params: Tuple[str, ...] = ()
+
+    def build(self, vectors: np.ndarray) -> None:
+        raise NotImplementedError
+
+    def search(
+        self,
+        query_unit: np.ndarray,
+        k: int,
+        score_ids: Callable[[np.ndarray], np.ndarray],
+        subset: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Devuelve (ids, scores) de hasta ``k`` candidatos, ordenados de mayor a menor.
+        ``score_ids(ids)`` devuelve la similitud de esas filas con la consulta.
+        ``subset`` (máscara booleana por fila) restringe la búsqueda a las filas
+        que cumplen los filtros: se buscan los k mejores DENTRO del subconjunto,
+        no los k mejores globales filtrados después.
+        """
+        raise NotImplementedError
+
+    def probe_fraction(self) -> float:
+        """
+        Fracción aproximada del corpus que recorre una búsqueda.
+        """
+        return 1.0
+
+    def add(self, idx: int, vector: np.ndarray) -> None:
+        raise NotImplementedError
+
+    def remove(self, idx: int) -> None:
+        raise NotImplementedError
+
+    def move(self, src: int, dst: int) -> None:
+        """
+        La fila ``src`` pasa a ocupar la posición ``dst`` (swap-remove del motor).
+        """
+        raise NotImplementedError
+
+    def save(self, path: Path) -> None:
+        raise NotImplementedError
+
+    @classmethod
+    def load(cls, path: Path) -> "VectorIndex":
+        raise NotImplementedError
+
+
+# --------- IVF (k-means + listas invertidas) ---------
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    if k >= scores.size:
+        return np.argsort(-scores)
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part])]
+
+
+class IVFIndex(VectorIndex):
+    """
+    Índice IVF en NumPy puro (sólo CPU, sin dependencias extra):
+      - k-means esférico sobre una muestra para obtener ``nlist`` centroides
+      - cada candidato se asigna a su centroide más cercano (lista invertida)
+      - en la consulta se recorren sólo las ``nprobe`` listas más cercanas
+
+    ``nprobe`` es la perilla de recall: más listas = más recall y más latencia.
+    """
+
+    name = "ivf"
+    search_params = ("nprobe",)
+
+    def __init__(
+        self,
+        nlist: Optional[int] = None,
+        nprobe: int = 16,
+        n_iter: int = 10,
+        seed: int = 0,
+    ) -> None:
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.n_iter = n_iter
+        self.seed = seed
+        self.centroids: np.ndarray = np.zeros((0, 0), dtype="float32")
+        self.assign: np.ndarray = np.zeros(0, dtype=np.int32)
+        self._lists: List[np.ndarray] = []
+
+    # --- construcción ---
+
+    def _assign_rows(self, vectors: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+        out = np.empty(vectors.shape[0], dtype=np.int32)
+        for start in range(0, vectors.shape[0], chunk_size):
+            chunk = vectors[start:start + chunk_size]
+            out[start:start + chunk.shape[0]] = np.argmax(chunk @ self.centroids.T, axis=1)
+        return out
+
+    def _rebuild_lists(self) -> None:
+        order = np.argsort(self.assign, kind="stable").astype(np.int64)
+        bounds = np.searchsorted(self.assign[order], np.arange(len(self.centroids) + 1))
+        self._lists = [order[bounds[c]:bounds[c + 1]] for c in range(len(self.centroids))]
+
+    def build(self, vectors: np.ndarray) -> None:
+        n = vectors.shape[0]
+        if n == 0:
+            raise ValueError("No se puede construir un índice IVF sobre un corpus vacío.")
+        nlist = self.nlist or max(1, int(4 * np.sqrt(n)))
+        nlist = min(nlist, n)
+        self.nlist = nlist
+
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(n, 64 * nlist)
+        sample = vectors[rng.choice(n, size=sample_size, replace=False)]
+
+        centroids = sample[rng.choice(sample_size, size=nlist, replace=False)].copy()
+        for _ in range(self.n_iter):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            order = np.argsort(labels, kind="stable")
+            counts = np.bincount(labels, minlength=nlist)
+            sums = np.zeros_like(centroids)
+            present = counts > 0
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[present]
+            sums[present] = np.add.reduceat(sample[order], starts, axis=0)
+            empty = counts == 0
+            if empty.any():
+                # Reinicia centroides vacíos con puntos aleatorios de la muestra
+                sums[empty] = sample[rng.choice(sample_size, size=int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = (sums / (norms + 1e-12)).astype("float32")
+
+        self.centroids = centroids
+        self.assign = self._assign_rows(vectors)
+        self._rebuild_lists()
+
+    # --- consulta ---
+
+    def search(
+        self,
+        query_unit: np.ndarray,
+        k: int,
+        score_ids: Callable[[np.ndarray], np.ndarray],
+        subset: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        nprobe = max(1, min(self.nprobe, len(self.centroids)))
+        centroid_sims = self.centroids @ query_unit
+        if subset is None:
+            probe = _top_k(centroid_sims, nprobe)
+            ids = np.concatenate([self._lists[c] for c in probe])
+        else:
+            ids = self._probe_subset(centroid_sims, nprobe, k, subset)
+        if ids.size == 0:
+            return ids, np.zeros(0, dtype="float32")
+        sims = score_ids(ids)
+        best = _top_k(sims, k)
+        return ids[best], sims[best]
+
+    def probe_fraction(self) -> float:
+        n_lists = max(1, len(self.centroids))
+        return min(1.0, max(1, self.nprobe) / n_lists)
+
+    def _probe_subset(
+        self, centroid_sims: np.ndarray, nprobe: int, k: int, subset: np.ndarray
+    ) -> np.ndarray:
+        """
+        Filas del subconjunto en las listas más cercanas: al menos ``nprobe``
+        listas y, si con ellas no se reúnen ``k`` filas del subconjunto, se
+        siguen recorriendo listas por cercanía (en el peor caso, todas:
+        barrido exacto del subconjunto).
+        """
+        parts: List[np.ndarray] = []
+        found = 0
+        for rank, c in enumerate(np.argsort(-centroid_sims)):
+            lst = self._lists[c]
+            hits = lst[subset[lst]]
+            if hits.size:
+                parts.append(hits)
+                found += hits.size
+            if rank + 1 >= nprobe and found >= k:
+                break
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+    # --- mutaciones (coste O(tamaño de la lista afectada)) ---
+
+    def add(self, idx: int, vector: np.ndarray) -> None:
+        c = int(np.argmax(self.centroids @ vector))
+        if idx >= self.assign.size:
+            grown = np.full(max(idx + 1, 2 * self.assign.size), -1, dtype=np.int32)
+            grown[: self.assign.size] = self.assign
+            self.assign = grown
+        self.assign[idx] = c
+        self._lists[c] = np.append(self._lists[c], np.int64(idx))
+
+    def remove(self, idx: int) -> None:
+        if idx >= self.assign.size or self.assign[idx] < 0:
+            return
+        c = int(self.assign[idx])
+        self._lists[c] = self._lists[c][self._lists[c] != idx]
+        self.assign[idx] = -1
+
+    def move(self, src: int, dst: int) -> None:
+        c = int(self.assign[src])
+        if c < 0:
+            return
+        lst = self._lists[c]
+        lst[lst == src] = dst
+        self.assign[dst] = c
+        self.assign[src] = -1
+
+    # --- persistencia ---
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+        np.savez(
+            tmp,
+            centroids=self.centroids,
+            assign=self.assign,
+            params=np.array([self.nlist or 0, self.nprobe, self.n_iter, self.seed]),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "IVFIndex":
+        with np.load(path, allow_pickle=False) as data:
+            nlist, nprobe, n_iter, seed = (int(x) for x in data["params"])
+            index = cls(nlist=nlist or None, nprobe=nprobe, n_iter=n_iter, seed=seed)
+            index.centroids = data["centroids"].astype("float32")
+            index.assign = data["assign"].astype(np.int32)
+        index._rebuild_lists()
+        return index
+
+
+# --------- Registro de implementaciones ---------
+
+
+INDEX_TYPES: Dict[str, Type[VectorIndex]] = {
+    IVFIndex.name: IVFIndex,
+}
+
+
+def load_or_build_index(
+    kind: str,
+    vectors: Union[np.ndarray, Callable[[], np.ndarray]],
+    path: Optional[Path] = None,
+    n_rows: Optional[int] = None,
+    **params,
+) -> VectorIndex:
+    """
+    Carga el índice desde ``path`` si existe (y coincide en tamaño con el corpus);
+    si no, lo construye y lo guarda ahí.
+    ``vectors`` puede ser una función: sólo se llama si hay que construir
+    (así no se materializa la matriz float32 cuando el índice ya está en disco).
+    """
+    if n_rows is None:
+        n_rows = vectors.shape[0]
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Tipo de índice ANN desconocido: {kind!r}. Opciones: {sorted(INDEX_TYPES)}")
+    index_cls = INDEX_TYPES[kind]
+
+    if path is not None and Path(path).exists():
+        try:
+            index = index_cls.load(path)
+            if getattr(index, "assign", np.zeros(0)).size == n_rows:
+                for key in index_cls.search_params:
+                    if key in params:
+                        setattr(index, key, params[key])
+                return index
+        except (OSError, KeyError, ValueError) as e:
+            print(f"[WARN] No se pudo cargar el índice ANN {path}: {e}")
+
+    index = index_cls(**params)
+    index.build(vectors() if callable(vectors) else vectors)
+    if path is not None:
+        index.save(path)
+    return index
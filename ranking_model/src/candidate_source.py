@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import csv
+import os
+import re
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .config import (
+    CANDIDATE_SOURCE,
+    CANDIDATES_CSV_PATH,
+    CANDIDATES_DB_PATH,
+    CANDIDATES_DB_TABLE,
+    CORPUS_CHUNK_SIZE,
+)
+
+
+CANDIDATE_COLUMNS = [
+    "id",
+    "role",
+    "skills",
+    "location",
+    "years_experience",
+    "languages",
+]
+
+
+class CandidateSource:
+    """
+    Origen del corpus de candidatos para el motor de ranking.
+
+    Toda implementación entrega filas con la forma de candidates.csv
+    (``CANDIDATE_COLUMNS``, valores str, listas separadas por ';'),
+    en bloques de tamaño acotado.
+    """
+
+    name = "base"
+
+    def iter_chunks(self, chunk_size: int = CORPUS_CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        raise NotImplementedError
+
+    def version(self) -> Tuple[Any, ...]:
+        """
+        Huella barata del contenido (p.ej. mtime/tamaño): cambia cuando el
+        corpus cambia. Permite detectar si hay que recargar.
+        """
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        return self.name
+
+
+class CsvCandidateSource(CandidateSource):
+    """
+    candidates.csv leído en streaming (sin pandas). Valida la cabecera
+    y descarta las filas sin 'id'.
+    """
+
+    name = "csv"
+
+    def __init__(self, path: Path = CANDIDATES_CSV_PATH) -> None:
+        self.path = Path(path)
+
+    def iter_chunks(self, chunk_size: int = CORPUS_CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        path = str(self.path)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No se encontró el archivo de candidatos: {path}")
+
+        skipped = 0
+        with open(path, "r", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for col in CANDIDATE_COLUMNS:
+                if col not in (reader.fieldnames or []):
+                    raise ValueError(f"Falta la columna '{col}' en {path}")
+
+            chunk: List[Dict[str, Any]] = []
+            for row in reader:
+                if not (row.get("id") or "").strip():
+                    skipped += 1
+                    continue
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+        if skipped:
+            print(f"[WARN] {skipped} filas sin 'id' descartadas en {path}")
+
+    def version(self) -> Tuple[Any, ...]:
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def describe(self) -> str:
+        return f"csv:{self.path}"
+
+
+def _to_list_field(value: Any) -> str:
+    # El scraper guarda listas separadas por comas ("SAP PM, Excel");
+    # el motor espera ';' como en el CSV
+    if value is None:
+        return ""
+    parts = re.split(r"[;,]", str(value))
+    return ";".join(p.strip() for p in parts if p.strip())
+
+
+class SQLiteCandidateSource(CandidateSource):
+    """
+    Tabla ``candidatos`` de SQLite (la que llena ``scraper.main.guardar_en_db``):
+
+        nombre, cargo, habilidades, experiencia_anios, idiomas,
+        ubicacion, modalidad, disponibilidad
+
+    - El 'id' del candidato es el rowid de la tabla.
+    - Las lecturas son paginadas por rowid (keyset: ``rowid > ? LIMIT ?``),
+      sin OFFSET, y de sólo lectura.
+    - Se crean (si no existen) índices sobre cargo, ubicacion y
+      experiencia_anios para las lecturas filtradas.
+    """
+
+    name = "sqlite"
+
+    # columna del motor -> columna de la tabla del scraper
+    COLUMN_MAP = {
+        "role": "cargo",
+        "skills": "habilidades",
+        "location": "ubicacion",
+        "years_experience": "experiencia_anios",
+        "languages": "idiomas",
+    }
+    INDEXED_COLUMNS = ("cargo", "ubicacion", "experiencia_anios")
+
+    def __init__(
+        self,
+        db_path: Path = CANDIDATES_DB_PATH,
+        table: str = CANDIDATES_DB_TABLE,
+        create_indexes: bool = True,
+    ) -> None:
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", table):
+            raise ValueError(f"Nombre de tabla no válido: {table!r}")
+        self.db_path = Path(db_path)
+        self.table = table
+        if not self.db_path.exists():
+            raise FileNotFoundError(f"No se encontró la base de datos de candidatos: {self.db_path}")
+        if create_indexes:
+            self.ensure_indexes()
+
+    def _connect(self, read_only: bool = True) -> sqlite3.Connection:
+        if read_only:
+            return sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        return sqlite3.connect(str(self.db_path))
+
+    def ensure_indexes(self) -> None:
+        try:
+            with closing(self._connect(read_only=False)) as conn:
+                for col in self.INDEXED_COLUMNS:
+                    conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS idx_{self.table}_{col} "
+                        f"ON {self.table}({col})"
+                    )
+                conn.commit()
+        except sqlite3.Error as e:
+            # p.ej. base de datos en un volumen de sólo lectura
+            print(f"[WARN] No se pudieron crear los índices de {self.table}: {e}")
+
+    def iter_chunks(
+        self,
+        chunk_size: int = CORPUS_CHUNK_SIZE,
+        location: Optional[str] = None,
+        min_years: Optional[int] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Filas en bloques de ``chunk_size``. ``location``/``min_years``
+        filtran en la base de datos (usan los índices).
+        """
+        select = ", ".join(f"{src} AS {dst}" for dst, src in self.COLUMN_MAP.items())
+        where = ["rowid > ?"]
+        params: List[Any] = []
+        if location:
+            where.append("ubicacion = ? COLLATE NOCASE")
+            params.append(location)
+        if min_years is not None:
+            where.append("experiencia_anios >= ?")
+            params.append(int(min_years))
+        sql = (
+            f"SELECT rowid AS id, {select} FROM {self.table} "
+            f"WHERE {' AND '.join(where)} ORDER BY rowid LIMIT ?"
+        )
+
+        last_rowid = 0
+        with closing(self._connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            while True:
+                page = conn.execute(sql, (last_rowid, *params, chunk_size)).fetchall()
+                if not page:
+                    return
+                last_rowid = page[-1]["id"]
+                yield [self._to_row(r) for r in page]
+                if len(page) < chunk_size:
+                    return
+
+    @staticmethod
+    def _to_row(r: sqlite3.Row) -> Dict[str, Any]:
+        try:
+            years = str(int(r["years_experience"] or 0))
+        except (TypeError, ValueError):
+            years = "0"
+        return {
+            "id": str(r["id"]),
+            "role": (r["role"] or "").strip(),
+            "skills": _to_list_field(r["skills"]),
+            "location": (r["location"] or "").strip(),
+            "years_experience": years,
+            "languages": _to_list_field(r["languages"]),
+        }
+
+    def version(self) -> Tuple[Any, ...]:
+        with closing(self._connect()) as conn:
+            count, max_rowid = conn.execute(
+                f"SELECT COUNT(*), COALESCE(MAX(rowid), 0) FROM {self.table}"
+            ).fetchone()
+        # mtime también del WAL: con journal_mode=WAL el .db no cambia al escribir
+        mtimes = tuple(
+            os.stat(p).st_mtime_ns
+            for p in (self.db_path, Path(f"{self.db_path}-wal"))
+            if p.exists()
+        )
+        return (count, max_rowid, *mtimes)
+
+    def describe(self) -> str:
+        return f"sqlite:{self.db_path}#{self.table}"
+
+
+def get_candidate_source(kind: str = CANDIDATE_SOURCE) -> CandidateSource:
+    """
+    Origen configurado con RANKING_CANDIDATE_SOURCE ("csv" o "sqlite").
+    """
+    kind = (kind or "csv").lower()
+    if kind == "csv":
+        return CsvCandidateSource()
+    if kind == "sqlite":
+        return SQLiteCandidateSource()
+    raise ValueError(f"Origen de candidatos desconocido: {kind!r}. Opciones: csv, sqlite")
@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import sys
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+# --------- Utilidades de normalización ---------
+
+
+def normalize_text(text: str) -> str:
+    """
+    Minúsculas y sin tildes para comparaciones robustas.
+    """
+    if not text:
+        return ""
+    text = text.lower()
+    text = "".join(
+        c
+        for c in unicodedata.normalize("NFD", text)
+        if unicodedata.category(c) != "Mn"
+    )
+    return text.strip()
+
+
+def _as_str(x: Any) -> str:
+    if x is None:
+        return ""
+    if isinstance(x, float) and np.isnan(x):
+        return ""
+    return str(x)
+
+
+def _as_years(x: Any) -> int:
+    try:
+        return int(x)
+    except Exception:
+        return 0
+
+
+def _split_field(x: Any) -> Tuple[str, ...]:
+    # sys.intern: la misma skill/idioma se guarda una sola vez para todo el corpus
+    return tuple(sys.intern(s.strip()) for s in _as_str(x).split(";") if s.strip())
+
+
+# --------- Columnas categóricas ---------
+
+
+class Categories:
+    """
+    Diccionario de valores únicos (rol, ubicación) -> código entero.
+    Sólo crece: los códigos ya asignados no cambian, así que varias
+    versiones de la tabla pueden compartir el mismo objeto.
+
+    Con ``index_tokens`` se mantiene además un índice invertido
+    token normalizado -> códigos que lo contienen (postings), de modo que
+    buscar "ingeniero" es un lookup y no una normalización por fila.
+    """
+
+    def __init__(self, index_tokens: bool = False) -> None:
+        self.values: List[str] = []
+        self.normalized: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self._index_tokens = index_tokens
+        self._postings: Dict[str, List[int]] = {}
+        self._by_normalized: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            value_norm = normalize_text(value)
+            self.values.append(sys.intern(value))
+            self.normalized.append(value_norm)
+            self._by_normalized.setdefault(value_norm, []).append(code)
+            if self._index_tokens:
+                for tok in set(value_norm.split()):
+                    self._postings.setdefault(tok, []).append(code)
+        return code
+
+    def codes_with_tokens(self, tokens: Iterable[str]) -> np.ndarray:
+        """
+        Códigos cuyo valor normalizado contiene TODOS los ``tokens``
+        (intersección de postings, empezando por la más corta).
+        """
+        postings = [self._postings.get(tok, []) for tok in set(tokens)]
+        if not postings:
+            return np.zeros(0, dtype=np.int32)
+        postings.sort(key=len)
+        codes = set(postings[0])
+        for other in postings[1:]:
+            codes.intersection_update(other)
+            if not codes:
+                break
+        return np.array(sorted(codes), dtype=np.int32)
+
+    def codes_containing(self, text_norm: str) -> np.ndarray:
+        """
+        Códigos cuyo valor normalizado contiene ``text_norm`` como subcadena
+        (p.ej. "analista de dat" -> "analista de datos").
+
+        Los tokens interiores del texto son tokens completos del valor y se
+        resuelven con las postings; el primero puede ser el final de un token
+        y el último el principio de otro, así que sólo si no hay interiores se
+        buscan en el vocabulario. La comparación de subcadena se hace después
+        sobre los códigos que quedan.
+        """
+        tokens = text_norm.split()
+        if len(tokens) > 2:
+            codes = self.codes_with_tokens(tokens[1:-1]).tolist()
+        elif len(tokens) == 2:
+            first, last = tokens
+            starts: set = set()
+            ends: set = set()
+            for tok, postings in self._postings.items():
+                if tok.endswith(first):
+                    ends.update(postings)
+                if tok.startswith(last):
+                    starts.update(postings)
+            codes = sorted(ends & starts)
+        else:
+            codes = sorted(
+                {c for tok, postings in self._postings.items() if text_norm in tok for c in postings}
+            )
+        return np.array([c for c in codes if text_norm in self.normalized[c]], dtype=np.int32)
+
+    def codes_for_normalized(self, value_norm: str) -> np.ndarray:
+        """
+        Códigos cuyos valores normalizados coinciden con ``value_norm``
+        ("Bogotá" y "bogota" son categorías distintas pero equivalentes).
+        """
+        return np.array(self._by_normalized.get(value_norm, []), dtype=np.int32)
+
+
+# --------- Tabla columnar de candidatos ---------
+
+
+class CandidateTable:
+    """
+    Representación columnar del corpus, construida una sola vez al cargar:
+
+      - ids:             List[str]
+      - years:           np.ndarray int32 (años de experiencia ya parseados)
+      - role_codes:      np.ndarray int32 -> ``roles`` (categorías)
+      - location_codes:  np.ndarray int32 -> ``locations`` (categorías)
+      - skills/languages: listas de tuplas ya separadas (strings internados)
+
+    Los filtros trabajan sobre estos arrays y el resultado final se construye
+    a partir de las columnas, sin volver a parsear strings en cada consulta.
+    Las mutaciones se hacen sobre una copia (``copy``) que luego sustituye a
+    la tabla vigente, para que las consultas en curso vean un snapshot estable.
+    """
+
+    def __init__(
+        self,
+        roles: Optional[Categories] = None,
+        locations: Optional[Categories] = None,
+    ) -> None:
+        self.roles = roles if roles is not None else Categories(index_tokens=True)
+        self.locations = locations if locations is not None else Categories()
+        self.ids: List[str] = []
+        self.years = np.zeros(0, dtype=np.int32)
+        self.role_codes = np.zeros(0, dtype=np.int32)
+        self.location_codes = np.zeros(0, dtype=np.int32)
+        self.skills: List[Tuple[str, ...]] = []
+        self.languages: List[Tuple[str, ...]] = []
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Iterable[Dict[str, Any]],
+        roles: Optional[Categories] = None,
+        locations: Optional[Categories] = None,
+    ) -> "CandidateTable":
+        table = cls(roles, locations)
+        table.extend(rows)
+        return table
+
+    @classmethod
+    def concat(cls, parts: List["CandidateTable"]) -> "CandidateTable":
+        """
+        Une bloques que comparten categorías (carga por bloques) con una
+        sola copia de cada columna.
+        """
+        if not parts:
+            return cls()
+        table = cls(parts[0].roles, parts[0].locations)
+        table.years = np.concatenate([p.years for p in parts])
+        table.role_codes = np.concatenate([p.role_codes for p in parts])
+        table.location_codes = np.concatenate([p.location_codes for p in parts])
+        for p in parts:
+            table.ids.extend(p.ids)
+            table.skills.extend(p.skills)
+            table.languages.extend(p.languages)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def copy(self) -> "CandidateTable":
+        other = CandidateTable(self.roles, self.locations)
+        other.ids = list(self.ids)
+        other.years = self.years.copy()
+        other.role_codes = self.role_codes.copy()
+        other.location_codes = self.location_codes.copy()
+        other.skills = list(self.skills)
+        other.languages = list(self.languages)
+        return other
+
+    # --------- Mutaciones (sobre una copia) ---------
+
+    def _encode_row(self, row: Dict[str, Any]) -> Tuple[str, int, int, int, Tuple[str, ...], Tuple[str, ...]]:
+        return (
+            _as_str(row.get("id", "")).strip(),
+            _as_years(row.get("years_experience", "0")),
+            self.roles.code(_as_str(row.get("role", ""))),
+            self.locations.code(_as_str(row.get("location", ""))),
+            _split_field(row.get("skills", "")),
+            _split_field(row.get("languages", "")),
+        )
+
+    def extend(self, rows: Iterable[Dict[str, Any]]) -> None:
+        encoded = [self._encode_row(r) for r in rows]
+        if not encoded:
+            return
+        ids, years, roles, locs, skills, langs = zip(*encoded)
+        self.ids.extend(ids)
+        self.years = np.concatenate([self.years, np.array(years, dtype=np.int32)])
+        self.role_codes = np.concatenate([self.role_codes, np.array(roles, dtype=np.int32)])
+        self.location_codes = np.concatenate([self.location_codes, np.array(locs, dtype=np.int32)])
+        self.skills.extend(skills)
+        self.languages.extend(langs)
+
+    def set_row(self, idx: int, row: Dict[str, Any]) -> None:
+        (
+            self.ids[idx],
+            self.years[idx],
+            self.role_codes[idx],
+            self.location_codes[idx],
+            self.skills[idx],
+            self.languages[idx],
+        ) = self._encode_row(row)
+
+    def move_row(self, src: int, dst: int) -> None:
+        self.ids[dst] = self.ids[src]
+        self.years[dst] = self.years[src]
+        self.role_codes[dst] = self.role_codes[src]
+        self.location_codes[dst] = self.location_codes[src]
+        self.skills[dst] = self.skills[src]
+        self.languages[dst] = self.languages[src]
+
+    def truncate(self, n: int) -> None:
+        del self.ids[n:]
+        del self.skills[n:]
+        del self.languages[n:]
+        self.years = self.years[:n]
+        self.role_codes = self.role_codes[:n]
+        self.location_codes = self.location_codes[:n]
+
+    # --------- Lectura ---------
+
+    def select_by_codes(
+        self, codes: np.ndarray, column: np.ndarray, n_categories: int, indices: np.ndarray
+    ) -> np.ndarray:
+        """
+        Filtra ``indices`` a las filas cuyo código en ``column`` está en ``codes``
+        (tabla de consulta booleana por categoría, sin recorrer strings).
+        """
+        if not codes.size or not indices.size:
+            return indices[:0]
+        matching = np.zeros(n_categories, dtype=bool)
+        matching[codes] = True
+        return indices[matching[column[indices]]]
+
+    def rows_with_roles(self, codes: np.ndarray, indices: np.ndarray) -> np.ndarray:
+        return self.select_by_codes(codes, self.role_codes, len(self.roles), indices)
+
+    def rows_with_locations(self, codes: np.ndarray, indices: np.ndarray) -> np.ndarray:
+        return self.select_by_codes(codes, self.location_codes, len(self.locations), indices)
+
+    def role(self, idx: int) -> str:
+        return self.roles.values[self.role_codes[idx]]
+
+    def location(self, idx: int) -> str:
+        return self.locations.values[self.location_codes[idx]]
+
+    def row_dict(self, idx: int) -> Dict[str, Any]:
+        """
+        Fila con la misma forma que una línea de candidates.csv.
+        """
+        return {
+            "id": self.ids[idx],
+            "role": self.role(idx),
+            "skills": ";".join(self.skills[idx]),
+            "location": self.location(idx),
+            "years_experience": str(int(self.years[idx])),
+            "languages": ";".join(self.languages[idx]),
+        }
@@ -1,6 +1,96 @@
+import logging
 import os
 from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 CANDIDATES_CSV_PATH = BASE_DIR / "data" / "candidates.csv"
+
+# Origen del corpus: "csv" (CANDIDATES_CSV_PATH) o "sqlite" (tabla del scraper)
+CANDIDATE_SOURCE = os.getenv("RANKING_CANDIDATE_SOURCE", "csv").lower()
+CANDIDATES_DB_PATH = Path(
+    os.getenv("RANKING_CANDIDATES_DB_PATH", str(BASE_DIR / "data" / "candidatos.db"))
+)
+CANDIDATES_DB_TABLE = os.getenv("RANKING_CANDIDATES_DB_TABLE", "candidatos")
+# Cada cuántos segundos se comprueba si el corpus cambió (0 = sólo recarga manual)
+CORPUS_RELOAD_INTERVAL_S = float(os.getenv("RANKING_CORPUS_RELOAD_INTERVAL", "30"))
 DEFAULT_TOP_N = 50
-SENTENCE_TRANSFORMER_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-mpnet-base-v2"
\ No newline at end of file
+SENTENCE_TRANSFORMER_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-mpnet-base-v2"
+
+# Cache persistente de embeddings de candidatos (se reutiliza entre reinicios/workers)
+EMBEDDINGS_CACHE_DIR = Path(
+    os.getenv("RANKING_EMBEDDINGS_CACHE_DIR", str(BASE_DIR / "data" / "embeddings_cache"))
+)
+
+# Carga del corpus por bloques (memoria acotada): filas leídas/codificadas por bloque
+# y cada cuántos vectores nuevos se guarda el cache (punto de reanudación).
+CORPUS_CHUNK_SIZE = int(os.getenv("RANKING_CORPUS_CHUNK_SIZE", "10000"))
+EMBED_CHECKPOINT_ROWS = int(os.getenv("RANKING_EMBED_CHECKPOINT_ROWS", "100000"))
+
+# Índice de vecinos aproximados (ANN) para corpus grandes.
+# RANKING_ANN_INDEX="none" desactiva el índice y fuerza búsqueda exacta.
+ANN_INDEX_TYPE = os.getenv("RANKING_ANN_INDEX", "ivf")
+ANN_MIN_CORPUS_SIZE = int(os.getenv("RANKING_ANN_MIN_CORPUS_SIZE", "50000"))
+ANN_NPROBE = int(os.getenv("RANKING_ANN_NPROBE", "16"))
+# Nº de candidatos que devuelve el índice antes de aplicar los filtros deterministas
+ANN_CANDIDATES = int(os.getenv("RANKING_ANN_CANDIDATES", "2000"))
+
+# Compresión de la matriz en memoria: "none" (float32), "float16" o "int8".
+# El top RESCORE_CANDIDATES del barrido comprimido se re-puntúa en float32.
+EMBEDDING_QUANTIZATION = os.getenv("RANKING_EMBEDDING_QUANTIZATION", "none")
+RESCORE_CANDIDATES = int(os.getenv("RANKING_RESCORE_CANDIDATES", "1000"))
+
+# Matriz de embeddings en un fichero mapeado en memoria (compartido entre workers).
+EMBEDDINGS_MMAP = os.getenv("RANKING_EMBEDDINGS_MMAP", "false").lower() == "true"
+# Filas libres al final del fichero para altas incrementales sin copiar la matriz
+MMAP_HEADROOM_ROWS = int(os.getenv("RANKING_MMAP_HEADROOM_ROWS", "1024"))
+
+# LRU de embeddings de consultas (evita recodificar búsquedas repetidas)
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("RANKING_QUERY_CACHE_MAX_ENTRIES", "2048"))
+QUERY_CACHE_MAX_MB = float(os.getenv("RANKING_QUERY_CACHE_MAX_MB", "16"))
+
+# Micro-batching de consultas concurrentes (un solo encode por ventana)
+QUERY_BATCHING_ENABLED = os.getenv("RANKING_QUERY_BATCHING", "true").lower() == "true"
+QUERY_BATCH_MAX_SIZE = int(os.getenv("RANKING_QUERY_BATCH_MAX_SIZE", "32"))
+QUERY_BATCH_MAX_WAIT_MS = float(os.getenv("RANKING_QUERY_BATCH_MAX_WAIT_MS", "5"))
+
+# Fusión de embeddings por campo: "full=0.6,role=0.25,skills=0.15".
+# Vacío = sólo el embedding del texto completo (comportamiento original).
+FIELD_WEIGHTS = os.getenv("RANKING_FIELD_WEIGHTS", "")
+
+# Recuperación híbrida: BM25 sobre rol/skills fusionado con el score semántico
+# mediante Reciprocal Rank Fusion (RRF). Desactivada por defecto.
+HYBRID_RETRIEVAL = os.getenv("RANKING_HYBRID", "false").lower() == "true"
+LEXICAL_CANDIDATES = int(os.getenv("RANKING_LEXICAL_CANDIDATES", "1000"))
+RRF_K = float(os.getenv("RANKING_RRF_K", "60"))
+# Profundidad de cada lista (semántica y léxica) que entra en la fusión
+RRF_DEPTH = int(os.getenv("RANKING_RRF_DEPTH", "1000"))
+
+# Cache de resultados completos de run_query_pipeline (query_pipeline.py),
+# por texto canónico + versión del corpus. 0 entradas = desactivado.
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RANKING_RESULT_CACHE_MAX_ENTRIES", "512"))
+RESULT_CACHE_TTL_S = float(os.getenv("RANKING_RESULT_CACHE_TTL", "300"))
+
+# Instrumentación por etapas (instrumentation.py): nivel de la línea de log
+# con los tiempos de cada petición y nº de medidas recientes por etapa (p50/p95)
+TIMING_LOG_LEVEL = int(
+    getattr(logging, os.getenv("RANKING_TIMING_LOG_LEVEL", "INFO").upper(), logging.INFO)
+)
+TIMING_WINDOW = int(os.getenv("RANKING_TIMING_WINDOW", "1024"))
+
+# Ranking por lotes (run_ranking_batch): memoria máxima de la matriz de scores
+# (consultas x candidatos) por cada producto matriz-matriz
+BATCH_SCORE_MAX_MB = float(os.getenv("RANKING_BATCH_SCORE_MAX_MB", "256"))
+
+# Backend de inferencia del sentence-transformer: "torch" (por defecto) u "onnx".
+# El backend ONNX se exporta con: python -m ranking_model.src.onnx_backend --export --check
+EMBEDDING_BACKEND = os.getenv("RANKING_EMBEDDING_BACKEND", "torch").lower()
+ONNX_MODEL_DIR = Path(os.getenv("RANKING_ONNX_MODEL_DIR", str(BASE_DIR / "models" / "onnx")))
+ONNX_QUANTIZE = os.getenv("RANKING_ONNX_QUANTIZE", "true").lower() == "true"
+ONNX_NUM_THREADS = int(os.getenv("RANKING_ONNX_NUM_THREADS", "0"))
+
+# Identificador de los vectores (modelo + backend): el cache de embeddings no
+# mezcla vectores de backends distintos.
+EMBEDDING_MODEL_ID = (
+    SENTENCE_TRANSFORMER_MODEL_NAME
+    if EMBEDDING_BACKEND == "torch"
+    else f"{SENTENCE_TRANSFORMER_MODEL_NAME}@onnx{'-int8' if ONNX_QUANTIZE else ''}"
+)
@@ -0,0 +1,364 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock entre procesos
+    fcntl = None
+
+from .config import EMBEDDINGS_CACHE_DIR, EMBEDDING_MODEL_ID
+from .embeddings import get_embeddings, normalize_rows
+
+
+def text_hash(text: str) -> str:
+    """
+    Hash estable del texto de un candidato (clave del cache).
+    """
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _model_slug(model_name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name)
+
+
+class EmbeddingStore:
+    """
+    Cache persistente en disco de embeddings, indexado por
+    (nombre del modelo, hash del texto).
+
+    Cada modelo tiene su propio directorio con:
+      - keys.<id>.npy      -> hashes de texto (n,)
+      - vectors.<id>.npy   -> embeddings float32 de norma 1 (n, dim)
+      - CURRENT            -> ficheros vigentes: la generación base y, tras
+                              ella, los segmentos añadidos por ``checkpoint``
+                              (se reemplaza de forma atómica)
+      - LOCK               -> lock de fichero entre los procesos que comparten el cache
+
+    Los vectores se abren con memoria mapeada (sólo lectura): leer el cache no
+    copia la matriz a RAM y varios workers comparten las mismas páginas.
+    Así, un reinicio o un worker nuevo sólo tiene que embeber los
+    textos que no estén ya en disco (candidatos nuevos o modificados).
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = EMBEDDINGS_CACHE_DIR,
+        model_name: str = EMBEDDING_MODEL_ID,
+    ) -> None:
+        self.model_name = model_name
+        self.directory = Path(cache_dir) / _model_slug(model_name)
+        self._rows: Dict[str, int] = {}
+        # Ficheros abiertos (base + segmentos) y fila global en la que empieza cada uno
+        self._files: List[int] = []
+        self._parts: List[np.ndarray] = []
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._pending: Dict[str, np.ndarray] = {}
+        self._dirty = False
+        self._load()
+
+    # --------- Lectura ---------
+
+    def _paths(self, file_id: int):
+        return (
+            self.directory / f"keys.{file_id}.npy",
+            self.directory / f"vectors.{file_id}.npy",
+        )
+
+    @contextmanager
+    def _locked(self, exclusive: bool) -> Iterator[None]:
+        """
+        Lock de fichero (flock) sobre el directorio del modelo. Los lectores
+        (leer CURRENT y abrir sus ficheros) lo toman compartido; publicar una
+        generación y borrar las antiguas, exclusivo. Así nunca se borra una
+        generación entre que otro proceso lee CURRENT y la abre.
+        """
+        if fcntl is None:
+            yield
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / "LOCK", "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_current(self) -> Optional[List[int]]:
+        try:
+            file_ids = [int(x) for x in (self.directory / "CURRENT").read_text().split()]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"[WARN] CURRENT ilegible en {self.directory}: {e}")
+            return None
+        return file_ids or None
+
+    def _load(self) -> bool:
+        if not (self.directory / "CURRENT").exists():
+            return False
+        with self._locked(exclusive=False):
+            file_ids = self._read_current()
+            return file_ids is not None and self._open(file_ids)
+
+    def _open(self, file_ids: List[int]) -> bool:
+        """
+        Abre la generación base y los segmentos de ``file_ids`` y los deja
+        como vigentes. Devuelve False (sin tocar el estado actual) si no se
+        pueden leer.
+        """
+        parts: List[np.ndarray] = []
+        all_keys: List[str] = []
+        try:
+            for file_id in file_ids:
+                keys_path, vectors_path = self._paths(file_id)
+                keys = np.load(keys_path, allow_pickle=False)
+                vectors = np.load(vectors_path, mmap_mode="r", allow_pickle=False)
+                if len(keys) != len(vectors) or (parts and vectors.shape[1:] != parts[0].shape[1:]):
+                    print(f"[WARN] Cache de embeddings inconsistente en {self.directory}; se ignora.")
+                    return False
+                parts.append(vectors)
+                all_keys.extend(keys.tolist())
+        except (OSError, ValueError) as e:
+            # Cache corrupto o a medio reemplazar: se ignora y se reconstruye
+            print(f"[WARN] Cache de embeddings ilegible en {self.directory}: {e}")
+            return False
+        self._files = list(file_ids)
+        self._parts = parts
+        self._offsets = np.concatenate([[0], np.cumsum([len(p) for p in parts])]).astype(np.int64)
+        self._rows = {str(k): i for i, k in enumerate(all_keys)}
+        return True
+
+    @property
+    def generation(self) -> int:
+        return self._files[0] if self._files else 0
+
+    @property
+    def segments(self) -> List[int]:
+        """
+        Segmentos escritos por ``checkpoint`` aún sin compactar.
+        """
+        return self._files[1:]
+
+    def keys(self) -> List[str]:
+        """
+        Claves en el orden en que están guardadas en disco (base y segmentos,
+        seguidas de las pendientes de guardar).
+        """
+        ordered = sorted(self._rows, key=self._rows.__getitem__)
+        return ordered + [k for k in self._pending if k not in self._rows]
+
+    def __len__(self) -> int:
+        return len(self._rows) + sum(1 for k in self._pending if k not in self._rows)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._pending or key in self._rows
+
+    def _read_rows(self, rows: np.ndarray) -> np.ndarray:
+        if len(self._parts) == 1:
+            return self._parts[0][rows]
+        out = np.empty((rows.size, self.dim), dtype="float32")
+        part_of = np.searchsorted(self._offsets, rows, side="right") - 1
+        for part in np.unique(part_of):
+            sel = part_of == part
+            out[sel] = self._parts[part][rows[sel] - self._offsets[part]]
+        return out
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        if key in self._pending:
+            return self._pending[key]
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        return np.asarray(self._read_rows(np.array([row]))[0], dtype="float32")
+
+    def get_many(self, keys: List[str]) -> np.ndarray:
+        """
+        Devuelve (len(keys), dim) en float32. Sólo toca las páginas de los
+        ficheros mapeados que corresponden a esas filas.
+        """
+        if not keys:
+            return np.zeros((0, self.dim), dtype="float32")
+        out = np.empty((len(keys), self.dim), dtype="float32")
+        base_pos: List[int] = []
+        base_rows: List[int] = []
+        for pos, key in enumerate(keys):
+            vec = self._pending.get(key)
+            if vec is not None:
+                out[pos] = vec
+            else:
+                base_pos.append(pos)
+                base_rows.append(self._rows[key])
+        if base_rows:
+            out[base_pos] = self._read_rows(np.asarray(base_rows, dtype=np.int64))
+        return out
+
+    @property
+    def dim(self) -> int:
+        for part in self._parts:
+            if part.ndim == 2 and part.shape[0]:
+                return int(part.shape[1])
+        for vec in self._pending.values():
+            return int(vec.shape[0])
+        return 0
+
+    # --------- Escritura ---------
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        self._pending[key] = np.asarray(vector, dtype="float32")
+        self._dirty = True
+
+    def retain(self, keys: Iterable[str]) -> None:
+        """
+        Elimina del cache todo lo que no esté en ``keys``
+        (p.ej. versiones antiguas de candidatos ya modificados).
+        Se hace efectivo en disco en el próximo ``save()``.
+        """
+        keep = set(keys)
+        stale_rows = [k for k in self._rows if k not in keep]
+        for k in stale_rows:
+            del self._rows[k]
+        stale_pending = [k for k in self._pending if k not in keep]
+        for k in stale_pending:
+            del self._pending[k]
+        if stale_rows or stale_pending:
+            self._dirty = True
+
+    def _write_file(self, keys: List[str], tmp_tag: str, chunk_size: int = 65536):
+        """
+        Escribe ``keys`` y sus vectores a ficheros temporales (por bloques,
+        sin duplicar la matriz en memoria); se renombran al publicar.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_keys = self.directory / f"keys.{tmp_tag}.npy"
+        tmp_vectors = self.directory / f"vectors.{tmp_tag}.npy"
+        vectors = np.lib.format.open_memmap(
+            tmp_vectors, mode="w+", dtype="float32", shape=(len(keys), self.dim)
+        )
+        for start in range(0, len(keys), chunk_size):
+            block = keys[start:start + chunk_size]
+            vectors[start:start + len(block)] = self.get_many(block)
+        vectors.flush()
+        del vectors
+        np.save(tmp_keys, np.array(keys, dtype="U40"), allow_pickle=False)
+        return tmp_keys, tmp_vectors
+
+    def _publish(self, tmp_files, tmp_tag: str, base: Optional[List[int]]) -> bool:
+        """
+        Bajo el lock exclusivo: asigna un id al fichero nuevo, lo publica en
+        CURRENT detrás de ``base`` (None = como generación nueva) y lo abre.
+        Sólo se borran ficheros anteriores a los que se reemplazan: los
+        reemplazados (y cualquiera posterior publicado por otro worker)
+        pueden estar abiertos en otro proceso.
+        """
+        with self._locked(exclusive=True):
+            replaced = self._read_current() or []
+            file_id = max([time.time_ns()] + [i + 1 for i in replaced + self._files])
+            tmp_keys, tmp_vectors = tmp_files
+            keys_path, vectors_path = self._paths(file_id)
+            os.replace(tmp_vectors, vectors_path)
+            os.replace(tmp_keys, keys_path)
+
+            file_ids = (base or []) + [file_id]
+            tmp = self.directory / f"CURRENT.{tmp_tag}"
+            tmp.write_text(" ".join(str(i) for i in file_ids))
+            os.replace(tmp, self.directory / "CURRENT")
+
+            loaded = self._open(file_ids)
+
+            if replaced:
+                oldest = min(replaced)
+                for path in self.directory.glob("*.npy"):
+                    parts = path.name.split(".")
+                    if len(parts) == 3 and parts[1].isdigit():
+                        other = int(parts[1])
+                        if other < oldest and other not in file_ids:
+                            path.unlink(missing_ok=True)
+        return loaded
+
+    def checkpoint(self) -> None:
+        """
+        Punto de reanudación barato: escribe SÓLO los vectores pendientes como
+        un segmento nuevo, a continuación de los ficheros vigentes (coste
+        proporcional a lo pendiente, no al cache entero). ``save`` compacta
+        después base y segmentos en una sola generación.
+        """
+        new_keys = [k for k in self._pending if k not in self._rows]
+        if not new_keys:
+            return
+        tmp_tag = f"{os.getpid()}-{threading.get_ident()}.tmp"
+        tmp_files = self._write_file(new_keys, tmp_tag)
+        # Los pendientes sólo se descartan si ya se leen desde disco
+        if self._publish(tmp_files, tmp_tag, base=self._files):
+            self._pending = {k: v for k, v in self._pending.items() if k not in self._rows}
+
+    def save(self, order: Optional[List[str]] = None, chunk_size: int = 65536) -> None:
+        """
+        Escribe una nueva generación del cache (base y segmentos compactados)
+        y la publica cambiando CURRENT de forma atómica (tmp + rename): otro
+        worker nunca lee ficheros a medio escribir. ``order`` permite guardar
+        las filas en el orden del corpus, para que el motor pueda mapear la
+        matriz directamente.
+        """
+        current = self.keys()
+        # dict.fromkeys: sin duplicados y conservando el orden pedido
+        target = list(dict.fromkeys(list(order or []) + current))
+        target = [k for k in target if k in self]
+
+        if not self._dirty and not self.segments and target == current:
+            return
+
+        # El id de la generación se asigna al publicar, bajo el lock
+        tmp_tag = f"{os.getpid()}-{threading.get_ident()}.tmp"
+        tmp_files = self._write_file(target, tmp_tag, chunk_size)
+        # Los pendientes sólo se descartan si ya se leen desde disco
+        if self._publish(tmp_files, tmp_tag, base=None):
+            self._pending = {}
+            self._dirty = False
+
+    @property
+    def pending_count(self) -> int:
+        """
+        Vectores en memoria todavía no escritos a disco.
+        """
+        return len(self._pending)
+
+    def ensure(self, texts: List[str], verbose: bool = True) -> List[str]:
+        """
+        Garantiza que ``texts`` estén en el cache: sólo se pasan por el modelo
+        los que no estén ya guardados. Devuelve sus claves (sin copiar vectores).
+        """
+        keys = [text_hash(t) for t in texts]
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in self and key not in missing:
+                missing[key] = text
+
+        if missing:
+            if verbose:
+                print(
+                    f"[INFO] Embeddings en cache: {len(texts) - len(missing)}/{len(texts)}; "
+                    f"codificando {len(missing)} textos nuevos o modificados."
+                )
+            new_vectors = normalize_rows(get_embeddings(list(missing.values())))
+            for key, vec in zip(missing.keys(), new_vectors):
+                self.put(key, vec)
+
+        return keys
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Devuelve los embeddings normalizados (n, dim) de ``texts`` usando el
+        cache: sólo se pasan por el modelo los textos que no estén ya guardados.
+        """
+        return self.get_many(self.ensure(texts))
@@ -1,27 +1,58 @@
 from __future__ import annotations
 
+import threading
+from collections import OrderedDict
 from functools import lru_cache
-from typing import Iterable, List
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
 
-from .config import SENTENCE_TRANSFORMER_MODEL_NAME
+from .config import (
+    SENTENCE_TRANSFORMER_MODEL_NAME,
+    EMBEDDING_BACKEND,
+    QUERY_CACHE_MAX_ENTRIES,
+    QUERY_CACHE_MAX_MB,
+    QUERY_BATCHING_ENABLED,
+    QUERY_BATCH_MAX_SIZE,
+    QUERY_BATCH_MAX_WAIT_MS,
+)
+from .query_batcher import QueryBatcher
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+    from .onnx_backend import OnnxSentenceEncoder
 
 
 @lru_cache(maxsize=1)
-def _get_model() -> SentenceTransformer:
+def _get_model() -> "SentenceTransformer":
     """
     Carga el modelo de sentence-transformers una sola vez (singleton con cache).
+    El import es perezoso: con el backend ONNX no se carga PyTorch.
     """
+    from sentence_transformers import SentenceTransformer
+
     return SentenceTransformer(SENTENCE_TRANSFORMER_MODEL_NAME)
 
 
+@lru_cache(maxsize=1)
+def _get_onnx_encoder() -> "OnnxSentenceEncoder":
+    """
+    Carga el encoder ONNX Runtime (ver onnx_backend.py) una sola vez.
+    """
+    from .onnx_backend import OnnxSentenceEncoder
+
+    return OnnxSentenceEncoder()
+
+
 def get_embeddings(texts: Iterable[str]) -> np.ndarray:
     """
     Devuelve un array numpy (n_samples, dim) con los embeddings de cada texto.
-    No normaliza por defecto; la normalización se hace en la similitud de coseno.
+    No normaliza por defecto; el cache (EmbeddingStore) normaliza el corpus una vez.
+    El backend (PyTorch u ONNX Runtime) se elige con RANKING_EMBEDDING_BACKEND.
     """
+    if EMBEDDING_BACKEND == "onnx":
+        return _get_onnx_encoder().encode(list(texts)).astype("float32")
+
     model = _get_model()
     # SentenceTransformers ya maneja batching internamente
     embeddings = model.encode(
@@ -33,6 +64,140 @@ def get_embeddings(texts: Iterable[str]) -> np.ndarray:
     return embeddings.astype("float32")
 
 
+class QueryEmbeddingCache:
+    """
+    LRU acotado (nº de entradas y memoria) para embeddings de consultas.
+    Los reclutadores repiten mucho las mismas búsquedas: un acierto evita
+    la pasada por el transformer. Seguro entre hilos.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vec = self._items.get(text)
+            if vec is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(text)
+            self.hits += 1
+            return vec
+
+    def put(self, text: str, vec: np.ndarray) -> np.ndarray:
+        """
+        Guarda una copia de sólo lectura de ``vec`` y la devuelve (también
+        cuando no cabe en el cache), para que nadie pueda modificar lo cacheado.
+        """
+        vec = np.array(vec, dtype="float32")
+        vec.setflags(write=False)
+        if self.max_entries <= 0 or vec.nbytes > self.max_bytes:
+            return vec
+        with self._lock:
+            old = self._items.pop(text, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._items[text] = vec
+            self._bytes += vec.nbytes
+            while self._items and (
+                len(self._items) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= evicted.nbytes
+        return vec
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._items),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+
+_query_cache = QueryEmbeddingCache(
+    max_entries=QUERY_CACHE_MAX_ENTRIES,
+    max_bytes=int(QUERY_CACHE_MAX_MB * 1024 * 1024),
+)
+
+
+_batcher: Optional[QueryBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def _get_batcher() -> QueryBatcher:
+    """
+    Crea (una sola vez) el agrupador de consultas; su hilo arranca al primer uso.
+    """
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = QueryBatcher(
+                    get_embeddings,
+                    max_batch=QUERY_BATCH_MAX_SIZE,
+                    max_wait_ms=QUERY_BATCH_MAX_WAIT_MS,
+                )
+    return _batcher
+
+
+def get_query_embedding(text: str) -> np.ndarray:
+    """
+    Embedding (dim,) de un texto de consulta, pasando por el LRU de consultas.
+    En un fallo, la codificación se agrupa con otras consultas concurrentes
+    (micro-batching) si QUERY_BATCHING_ENABLED.
+    El array devuelto es de sólo lectura (se comparte entre llamadas).
+    """
+    vec = _query_cache.get(text)
+    if vec is not None:
+        return vec
+    if QUERY_BATCHING_ENABLED:
+        vec = _get_batcher().encode(text)
+    else:
+        vec = get_embeddings([text])[0]
+    return _query_cache.put(text, vec)
+
+
+def get_query_embeddings(texts: List[str]) -> np.ndarray:
+    """
+    Embeddings (m, dim) de varias consultas (trabajos batch): los aciertos salen
+    del LRU y el resto se codifica en una sola llamada al modelo.
+    """
+    vecs: List[Optional[np.ndarray]] = [_query_cache.get(t) for t in texts]
+    missing = list(dict.fromkeys(t for t, v in zip(texts, vecs) if v is None))
+    if missing:
+        encoded = dict(zip(missing, get_embeddings(missing)))
+        for text, vec in encoded.items():
+            _query_cache.put(text, vec)
+        vecs = [v if v is not None else encoded[t] for t, v in zip(texts, vecs)]
+    if not vecs:
+        return np.zeros((0, 0), dtype="float32")
+    return np.stack(vecs).astype("float32", copy=False)
+
+
+def query_cache_stats() -> Dict[str, float]:
+    """
+    Contadores del cache de consultas (entradas, bytes, hits, misses, hit_rate).
+    """
+    return _query_cache.stats()
+
+
 def cosine_sim(query_vec: np.ndarray, cand_matrix: np.ndarray) -> np.ndarray:
     """
     Calcula similitud de coseno entre un vector de consulta (dim,)
@@ -48,4 +213,35 @@ def cosine_sim(query_vec: np.ndarray, cand_matrix: np.ndarray) -> np.ndarray:
 
     # Producto punto (1, dim) x (dim, n) -> (1, n)
     sims = np.dot(q_norm, c_norm.T)[0]
-    return sims
\ No newline at end of file
+    return sims
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    Devuelve una copia float32 de ``matrix`` (n, dim) con cada fila de norma 1.
+    Pensado para normalizar el corpus UNA vez al cargarlo.
+    """
+    matrix = np.asarray(matrix, dtype="float32")
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return (matrix / (norms + 1e-12)).astype("float32", copy=False)
+
+
+def dot_sim(query_vec: np.ndarray, unit_matrix: np.ndarray) -> np.ndarray:
+    """
+    Similitud de coseno contra una matriz de candidatos YA normalizada
+    (ver ``normalize_rows``): sólo se normaliza el vector de consulta y se hace
+    un único producto matriz-vector (n, dim) x (dim,) -> (n,).
+    """
+    q = np.asarray(query_vec, dtype="float32").reshape(-1)
+    q = q / (np.linalg.norm(q) + 1e-12)
+    return unit_matrix @ q
+
+
+def dot_sim_batch(query_matrix: np.ndarray, unit_matrix: np.ndarray) -> np.ndarray:
+    """
+    Similitud de coseno de m consultas contra la matriz normalizada del corpus
+    con un único producto matriz-matriz (m, dim) x (dim, n) -> (m, n).
+    """
+    return normalize_rows(query_matrix) @ unit_matrix.T
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional
+
+import numpy as np
+
+from .config import TIMING_LOG_LEVEL, TIMING_WINDOW
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Logger con el mismo formato que el backend (stdout, una línea por evento).
+    """
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(
+            logging.Formatter(
+                fmt="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+                datefmt="%Y-%m-%d %H:%M:%S",
+            )
+        )
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+    return logger
+
+
+logger = get_logger("ranking.timing")
+
+
+class StageStats:
+    """
+    Agregado en proceso de la duración de una etapa: contador, total, máximo
+    y una ventana con las últimas ``window`` medidas para p50/p95.
+    """
+
+    def __init__(self, window: int) -> None:
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._recent: Deque[float] = deque(maxlen=window)
+
+    def add(self, ms: float) -> None:
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self._recent.append(ms)
+
+    def summary(self) -> Dict[str, float]:
+        recent = np.fromiter(self._recent, dtype=np.float64) if self._recent else None
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": float(np.percentile(recent, 50)) if recent is not None else 0.0,
+            "p95_ms": float(np.percentile(recent, 95)) if recent is not None else 0.0,
+            "max_ms": self.max_ms,
+        }
+
+
+_stats: Dict[str, StageStats] = {}
+_stats_lock = threading.Lock()
+
+
+def _record(stage: str, ms: float) -> None:
+    with _stats_lock:
+        stats = _stats.get(stage)
+        if stats is None:
+            stats = _stats[stage] = StageStats(TIMING_WINDOW)
+        stats.add(ms)
+
+
+class RequestTrace:
+    """
+    Tiempos de las etapas de una petición (ms por etapa; una etapa que se
+    repite, p.ej. 'filter', acumula) y campos adicionales para el log.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.stages: Dict[str, float] = {}
+        self.fields: Dict[str, Any] = {}
+        self._start = time.perf_counter()
+
+    def add(self, stage: str, ms: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + ms
+
+    def annotate(self, **fields: Any) -> None:
+        self.fields.update(fields)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "request": self.name,
+            "total_ms": round(self.elapsed_ms(), 3),
+            "stages": {k: round(v, 3) for k, v in self.stages.items()},
+            **self.fields,
+        }
+
+
+_current: contextvars.ContextVar[Optional[RequestTrace]] = contextvars.ContextVar(
+    "ranking_request_trace", default=None
+)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current.get()
+
+
+def annotate(**fields: Any) -> None:
+    """
+    Añade campos (p.ej. ``cached=True``) a la línea de log de la petición en curso.
+    """
+    trace = _current.get()
+    if trace is not None:
+        trace.annotate(**fields)
+
+
+@contextmanager
+def trace_request(name: str) -> Iterator[RequestTrace]:
+    """
+    Abre la traza de una petición. Al cerrarse se agrega el total y se emite
+    UNA línea de log estructurada con los tiempos de todas las etapas.
+    Si ya hay una traza abierta (p.ej. app.py -> run_query_pipeline) se
+    reutiliza y sólo la más externa emite el log.
+    """
+    trace = _current.get()
+    if trace is not None:
+        yield trace
+        return
+
+    trace = RequestTrace(name)
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+        _record("total", trace.elapsed_ms())
+        if logger.isEnabledFor(TIMING_LOG_LEVEL):
+            payload = trace.as_dict()
+            logger.log(
+                TIMING_LOG_LEVEL,
+                "request_timing %s",
+                json.dumps(payload, ensure_ascii=False, default=str),
+                extra={"timing": payload},
+            )
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """
+    Mide una etapa ("job_filter", "nlp_parse", "encode", "score", ...):
+    se suma a la traza en curso (si la hay) y al agregado del proceso.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = (time.perf_counter() - start) * 1000.0
+        trace = _current.get()
+        if trace is not None:
+            trace.add(stage, ms)
+        _record(stage, ms)
+
+
+def timing_stats() -> Dict[str, Dict[str, float]]:
+    """
+    Resumen por etapa (count, mean/p50/p95/max en ms) desde el arranque.
+    """
+    with _stats_lock:
+        return {stage: stats.summary() for stage, stats in _stats.items()}
+
+
+def reset_timing_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+__all__ = [
+    "get_logger",
+    "RequestTrace",
+    "current_trace",
+    "annotate",
+    "trace_request",
+    "span",
+    "timing_stats",
+    "reset_timing_stats",
+]
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .candidate_table import CandidateTable, normalize_text
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+_STOPWORDS = frozenset(
+    {"de", "del", "la", "el", "los", "las", "y", "e", "en", "con", "para", "por", "a", "o", "u"}
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokens léxicos normalizados (minúsculas, sin tildes, sin stopwords).
+    Ej: "SAP PM" -> ["sap", "pm"], "C++" -> ["c++"], "Power BI" -> ["power", "bi"].
+    """
+    tokens = (tok.rstrip(".") for tok in _TOKEN_RE.findall(normalize_text(text)))
+    return [tok for tok in tokens if tok and tok not in _STOPWORDS]
+
+
+def candidate_tokens(role: str, skills: Sequence[str]) -> List[str]:
+    """
+    Tokens del documento léxico de un candidato (o de una consulta): rol + skills.
+    """
+    tokens = tokenize(role)
+    for skill in skills:
+        tokens.extend(tokenize(skill))
+    return tokens
+
+
+def _grow(arr: np.ndarray, size: int, fill: float = 0) -> np.ndarray:
+    if arr.shape[0] >= size:
+        return arr
+    grown = np.full(max(size, 2 * arr.shape[0], 16), fill, dtype=arr.dtype)
+    grown[: arr.shape[0]] = arr
+    return grown
+
+
+class BM25Index:
+    """
+    Índice invertido BM25 sobre rol + skills de los candidatos.
+
+    - Postings base en formato CSR (término -> docs, tf), construidos una vez.
+    - Las altas incrementales van a postings "delta" por término; las bajas
+      marcan el documento como muerto y descuentan sus términos de ``df`` y
+      su longitud de las estadísticas, así que el IDF y la longitud media son
+      siempre los del corpus vivo. Los documentos internos se mapean a
+      filas del corpus (``doc_to_row``), de modo que el swap-remove del motor
+      es sólo un ``move``. El índice se reconstruye en la siguiente recarga.
+    - Una búsqueda sólo toca las postings de los términos de la consulta.
+
+    Igual que los índices ANN, las mutaciones y búsquedas se hacen bajo el
+    lock del motor.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._vocab: Dict[str, int] = {}
+        self._df = np.zeros(0, dtype=np.int64)
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._docs = np.zeros(0, dtype=np.int64)
+        self._tfs = np.zeros(0, dtype=np.float32)
+        self._delta: Dict[int, List[Tuple[int, int]]] = {}
+        # Términos distintos de cada documento (para descontar df en las bajas):
+        # CSR para los documentos base, dict para los añadidos después
+        self._doc_indptr = np.zeros(1, dtype=np.int64)
+        self._doc_terms = np.zeros(0, dtype=np.int64)
+        self._doc_terms_delta: Dict[int, np.ndarray] = {}
+        self._n_docs = 0
+        self._doc_len = np.zeros(0, dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._doc_to_row = np.zeros(0, dtype=np.int64)
+        self._row_to_doc = np.zeros(0, dtype=np.int64)
+        self._n_alive = 0
+        self._total_len = 0.0
+
+    # --------- Construcción ---------
+
+    @classmethod
+    def from_table(cls, table: CandidateTable, **params: float) -> "BM25Index":
+        """
+        Construye el índice con los tokens de rol y skills de cada fila.
+        Los tokens se calculan una vez por rol y por skill distintos.
+        """
+        role_tokens = [tokenize(r) for r in table.roles.values]
+        skill_cache: Dict[str, List[str]] = {}
+
+        def row_tokens(i: int) -> List[str]:
+            toks = list(role_tokens[table.role_codes[i]])
+            for skill in table.skills[i]:
+                cached = skill_cache.get(skill)
+                if cached is None:
+                    cached = skill_cache[skill] = tokenize(skill)
+                toks.extend(cached)
+            return toks
+
+        index = cls(**params)
+        index.build(row_tokens(i) for i in range(len(table)))
+        return index
+
+    def build(self, docs: Iterable[Sequence[str]]) -> None:
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        tfs: List[int] = []
+        lengths: List[int] = []
+        for doc, tokens in enumerate(docs):
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                tid = self._vocab.setdefault(term, len(self._vocab))
+                term_ids.append(tid)
+                doc_ids.append(doc)
+                tfs.append(tf)
+
+        n = len(lengths)
+        terms = np.asarray(term_ids, dtype=np.int64)
+        # term_ids ya va en orden de documento: es el CSR documento -> términos
+        self._doc_terms = terms
+        self._doc_indptr = np.searchsorted(
+            np.asarray(doc_ids, dtype=np.int64), np.arange(n + 1), side="left"
+        ).astype(np.int64)
+        self._doc_terms_delta = {}
+        order = np.argsort(terms, kind="stable")
+        terms_sorted = terms[order]
+        self._docs = np.asarray(doc_ids, dtype=np.int64)[order]
+        self._tfs = np.asarray(tfs, dtype=np.float32)[order]
+        self._df = np.bincount(terms_sorted, minlength=len(self._vocab)).astype(np.int64)
+        self._indptr = np.concatenate([[0], np.cumsum(self._df)]).astype(np.int64)
+        self._delta = {}
+
+        self._n_docs = n
+        self._doc_len = np.asarray(lengths, dtype=np.float32)
+        self._alive = np.ones(n, dtype=bool)
+        self._doc_to_row = np.arange(n, dtype=np.int64)
+        self._row_to_doc = np.arange(n, dtype=np.int64)
+        self._n_alive = n
+        self._total_len = float(self._doc_len.sum())
+
+    # --------- Actualización incremental ---------
+
+    def add(self, row: int, tokens: Sequence[str]) -> None:
+        doc = self._n_docs
+        self._n_docs += 1
+        self._doc_len = _grow(self._doc_len, self._n_docs)
+        self._alive = _grow(self._alive, self._n_docs, False)
+        self._doc_to_row = _grow(self._doc_to_row, self._n_docs, -1)
+        self._row_to_doc = _grow(self._row_to_doc, row + 1, -1)
+
+        self._doc_len[doc] = len(tokens)
+        self._alive[doc] = True
+        self._doc_to_row[doc] = row
+        self._row_to_doc[row] = doc
+        self._n_alive += 1
+        self._total_len += len(tokens)
+
+        tids: List[int] = []
+        for term, tf in Counter(tokens).items():
+            tid = self._vocab.get(term)
+            if tid is None:
+                tid = self._vocab[term] = len(self._vocab)
+                self._df = _grow(self._df, tid + 1)
+                self._indptr = np.append(self._indptr, self._indptr[-1])
+            self._df[tid] += 1
+            self._delta.setdefault(tid, []).append((doc, tf))
+            tids.append(tid)
+        self._doc_terms_delta[doc] = np.asarray(tids, dtype=np.int64)
+
+    def remove(self, row: int) -> None:
+        if row >= self._row_to_doc.shape[0]:
+            return
+        doc = int(self._row_to_doc[row])
+        if doc < 0 or not self._alive[doc]:
+            return
+        self._alive[doc] = False
+        self._row_to_doc[row] = -1
+        self._n_alive -= 1
+        self._total_len -= float(self._doc_len[doc])
+        if doc + 1 < self._doc_indptr.shape[0]:
+            terms = self._doc_terms[self._doc_indptr[doc]:self._doc_indptr[doc + 1]]
+        else:
+            terms = self._doc_terms_delta.pop(doc)
+        # Términos distintos del documento: cada uno resta 1 a su df
+        self._df[terms] -= 1
+
+    def move(self, src: int, dst: int) -> None:
+        doc = int(self._row_to_doc[src])
+        self._row_to_doc = _grow(self._row_to_doc, dst + 1, -1)
+        self._row_to_doc[src] = -1
+        if doc >= 0:
+            self._doc_to_row[doc] = dst
+        self._row_to_doc[dst] = doc
+
+    # --------- Búsqueda ---------
+
+    def _postings(self, tid: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = self._indptr[tid], self._indptr[tid + 1]
+        docs, tfs = self._docs[start:end], self._tfs[start:end]
+        delta = self._delta.get(tid)
+        if delta:
+            extra = np.asarray(delta, dtype=np.int64)
+            docs = np.concatenate([docs, extra[:, 0]])
+            tfs = np.concatenate([tfs, extra[:, 1].astype(np.float32)])
+        return docs, tfs
+
+    def search(
+        self,
+        query_tokens: Sequence[str],
+        k: Optional[int] = None,
+        candidates: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (filas, scores BM25) de los documentos que contienen algún término,
+        ordenados de mayor a menor. ``candidates`` restringe a esas filas.
+        """
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32))
+        tids = {self._vocab[t] for t in query_tokens if t in self._vocab}
+        if not tids or not self._n_alive:
+            return empty
+
+        avgdl = self._total_len / self._n_alive if self._n_alive else 1.0
+        all_docs: List[np.ndarray] = []
+        all_contrib: List[np.ndarray] = []
+        for tid in tids:
+            docs, tfs = self._postings(tid)
+            if not docs.size:
+                continue
+            df = float(self._df[tid])
+            idf = math.log(1.0 + (self._n_alive - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * self._doc_len[docs] / max(avgdl, 1e-9))
+            all_docs.append(docs)
+            all_contrib.append(idf * tfs * (self.k1 + 1.0) / (tfs + norm))
+        if not all_docs:
+            return empty
+
+        docs, inverse = np.unique(np.concatenate(all_docs), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(all_contrib)).astype(np.float32)
+        keep = self._alive[docs]
+        rows, scores = self._doc_to_row[docs[keep]], scores[keep]
+        if candidates is not None:
+            keep = np.isin(rows, candidates)
+            rows, scores = rows[keep], scores[keep]
+
+        if k is not None and k < rows.size:
+            part = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[part], scores[part]
+        order = np.argsort(-scores, kind="stable")
+        return rows[order], scores[order]
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[np.ndarray], k: float = 60.0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reciprocal Rank Fusion: score(d) = sum_r 1 / (k + rank_r(d)), rank desde 1.
+    ``rankings`` son listas de ids ya ordenadas. Devuelve (ids, scores)
+    ordenados de mayor a menor score fusionado.
+    """
+    parts = [np.asarray(r, dtype=np.int64) for r in rankings if len(r)]
+    if not parts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+    ids = np.concatenate(parts)
+    contrib = np.concatenate([1.0 / (k + np.arange(1, len(r) + 1)) for r in parts])
+    uniq, inverse = np.unique(ids, return_inverse=True)
+    fused = np.bincount(inverse, weights=contrib)
+    order = np.argsort(-fused, kind="stable")
+    return uniq[order], fused[order]
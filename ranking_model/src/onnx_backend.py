@@ -0,0 +1,258 @@
+"""
+Backend de inferencia ONNX Runtime (CPU) para el sentence-transformer.
+
+Flujo:
+  1) ``export_onnx_model`` exporta el transformer de PyTorch a ONNX una sola vez
+     (y opcionalmente lo cuantiza a int8 dinámico con onnxruntime).
+  2) ``OnnxSentenceEncoder`` carga el grafo y replica ``SentenceTransformer.encode``:
+     tokenización con el mismo tokenizer y max_seq_length + mean pooling.
+  3) ``check_onnx_parity`` compara los vectores con los de PyTorch.
+
+Se activa con RANKING_EMBEDDING_BACKEND=onnx (ver config.py).
+Requiere ``onnxruntime`` (y ``torch``/``transformers`` sólo para exportar).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from .config import (
+    SENTENCE_TRANSFORMER_MODEL_NAME,
+    ONNX_MODEL_DIR,
+    ONNX_QUANTIZE,
+    ONNX_NUM_THREADS,
+)
+
+
+FP32_FILENAME = "model.onnx"
+INT8_FILENAME = "model.int8.onnx"
+ENCODER_CONFIG_FILENAME = "encoder_config.json"
+
+
+def _require_onnxruntime():
+    try:
+        import onnxruntime
+    except ImportError as e:
+        raise ImportError(
+            "El backend ONNX requiere 'onnxruntime' (pip install onnxruntime)."
+        ) from e
+    return onnxruntime
+
+
+def export_onnx_model(
+    model_name: str = SENTENCE_TRANSFORMER_MODEL_NAME,
+    output_dir: Path = ONNX_MODEL_DIR,
+    quantize: bool = ONNX_QUANTIZE,
+) -> Path:
+    """
+    Exporta el modelo de sentence-transformers a ONNX en ``output_dir``.
+    Devuelve la ruta del grafo que usará el encoder (int8 si ``quantize``).
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+
+    pooling = st_model[1] if len(st_model) > 1 else None
+    if pooling is not None and not getattr(pooling, "pooling_mode_mean_tokens", True):
+        raise ValueError("Sólo se soporta mean pooling en el backend ONNX.")
+    normalize = any(type(m).__name__ == "Normalize" for m in st_model)
+
+    dummy = tokenizer(["texto de ejemplo"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in dummy]
+    fp32_path = output_dir / FP32_FILENAME
+    torch.onnx.export(
+        transformer,
+        tuple(dummy[n] for n in input_names),
+        str(fp32_path),
+        input_names=input_names,
+        output_names=["last_hidden_state"],
+        dynamic_axes={
+            **{n: {0: "batch", 1: "sequence"} for n in input_names},
+            "last_hidden_state": {0: "batch", 1: "sequence"},
+        },
+        opset_version=14,
+    )
+    tokenizer.save_pretrained(str(output_dir))
+
+    # Un int8 de una exportación anterior (quizá de otro modelo) no debe sobrevivir
+    (output_dir / INT8_FILENAME).unlink(missing_ok=True)
+    with open(output_dir / ENCODER_CONFIG_FILENAME, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "model_name": model_name,
+                "max_seq_length": int(st_model.max_seq_length),
+                "input_names": input_names,
+                "normalize": normalize,
+                "quantized": bool(quantize),
+            },
+            f,
+            indent=2,
+        )
+
+    if not quantize:
+        return fp32_path
+
+    _require_onnxruntime()
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    int8_path = output_dir / INT8_FILENAME
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+    return int8_path
+
+
+class OnnxSentenceEncoder:
+    """
+    Equivalente CPU de ``SentenceTransformer.encode`` sobre un grafo ONNX exportado.
+    Comprueba que el grafo se exportó del modelo configurado: si no, los
+    vectores no corresponderían a ``EMBEDDING_MODEL_ID`` (ni al cache).
+    """
+
+    def __init__(
+        self,
+        model_dir: Path = ONNX_MODEL_DIR,
+        quantized: bool = ONNX_QUANTIZE,
+        num_threads: int = ONNX_NUM_THREADS,
+        model_name: str = SENTENCE_TRANSFORMER_MODEL_NAME,
+    ) -> None:
+        model_dir = Path(model_dir)
+        graph = model_dir / (INT8_FILENAME if quantized else FP32_FILENAME)
+        if not graph.exists():
+            raise FileNotFoundError(
+                f"No se encontró el modelo ONNX {graph}. "
+                f"Ejecuta: python -m ranking_model.src.onnx_backend --export"
+                f"{'' if quantized else ' --no-quantize'}"
+            )
+        with open(model_dir / ENCODER_CONFIG_FILENAME, "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+        if self.config.get("model_name") != model_name:
+            raise ValueError(
+                f"El modelo ONNX de {model_dir} se exportó de {self.config.get('model_name')!r}, "
+                f"pero el configurado es {model_name!r}. Vuelve a exportarlo."
+            )
+
+        ort = _require_onnxruntime()
+        from transformers import AutoTokenizer
+
+        options = ort.SessionOptions()
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = ort.InferenceSession(
+            str(graph), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+        self._input_names = self.config["input_names"]
+        self.max_seq_length = int(self.config["max_seq_length"])
+
+    def encode(self, texts: Iterable[str], batch_size: int = 32) -> np.ndarray:
+        texts = list(texts)
+        out: List[np.ndarray] = []
+        # Ordenar por longitud reduce el padding dentro de cada lote
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        for start in range(0, len(texts), batch_size):
+            batch = [texts[i] for i in order[start:start + batch_size]]
+            enc = self._tokenizer(
+                batch,
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            feeds = {n: enc[n].astype(np.int64) for n in self._input_names}
+            hidden = self._session.run(None, feeds)[0]  # (b, seq, dim)
+
+            # Mean pooling con la máscara de atención (igual que sentence-transformers)
+            mask = enc["attention_mask"][..., None].astype("float32")
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            out.append(pooled.astype("float32"))
+
+        if not out:
+            return np.zeros((0, 0), dtype="float32")
+        embeddings = np.empty((len(texts), out[0].shape[1]), dtype="float32")
+        embeddings[order] = np.concatenate(out)
+        if self.config.get("normalize"):
+            embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-12
+        return embeddings
+
+
+def check_onnx_parity(
+    texts: Optional[List[str]] = None,
+    model_dir: Path = ONNX_MODEL_DIR,
+    quantized: bool = ONNX_QUANTIZE,
+    model_name: str = SENTENCE_TRANSFORMER_MODEL_NAME,
+) -> dict:
+    """
+    Compara los embeddings ONNX con los de PyTorch sobre ``texts``
+    (por defecto, una muestra del corpus de candidatos) y devuelve
+    la similitud de coseno mínima/media entre ambos.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if texts is None:
+        from .ranking_engine import _load_candidates_raw, _concat_candidate_text
+
+        texts = [_concat_candidate_text(r) for r in _load_candidates_raw()[:200]]
+
+    reference = SentenceTransformer(model_name, device="cpu").encode(
+        texts, convert_to_numpy=True, show_progress_bar=False
+    )
+    candidate = OnnxSentenceEncoder(model_dir, quantized=quantized, model_name=model_name).encode(texts)
+
+    ref = reference / (np.linalg.norm(reference, axis=1, keepdims=True) + 1e-12)
+    cand = candidate / (np.linalg.norm(candidate, axis=1, keepdims=True) + 1e-12)
+    cos = (ref * cand).sum(axis=1)
+    return {
+        "n_texts": len(texts),
+        "min_cosine": float(cos.min()),
+        "mean_cosine": float(cos.mean()),
+        "quantized": quantized,
+    }
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """
+    CLI de exportación. Los valores por defecto son los que lee el encoder en
+    ejecución (config.py), así lo exportado es lo que se va a cargar.
+    """
+    parser = argparse.ArgumentParser(description="Exporta/verifica el backend ONNX del ranking.")
+    parser.add_argument("--export", action="store_true", help="Exporta el modelo a ONNX.")
+    parser.add_argument("--check", action="store_true", help="Compara ONNX vs PyTorch.")
+    parser.add_argument(
+        "--model", default=SENTENCE_TRANSFORMER_MODEL_NAME,
+        help="Modelo de sentence-transformers (por defecto, el configurado).",
+    )
+    parser.add_argument(
+        "--output-dir", type=Path, default=ONNX_MODEL_DIR,
+        help="Directorio del modelo (por defecto, RANKING_ONNX_MODEL_DIR).",
+    )
+    parser.add_argument(
+        "--quantize", action=argparse.BooleanOptionalAction, default=ONNX_QUANTIZE,
+        help="Cuantizar a int8 (por defecto, RANKING_ONNX_QUANTIZE).",
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_arg_parser().parse_args()
+
+    if args.model != SENTENCE_TRANSFORMER_MODEL_NAME or args.quantize != ONNX_QUANTIZE:
+        print(
+            f"[WARN] Se exporta {args.model!r} (int8={args.quantize}), pero el encoder cargará "
+            f"{SENTENCE_TRANSFORMER_MODEL_NAME!r} (RANKING_ONNX_QUANTIZE={ONNX_QUANTIZE})."
+        )
+    if args.export:
+        path = export_onnx_model(args.model, args.output_dir, quantize=args.quantize)
+        print(f"Modelo ONNX exportado en: {path}")
+    if args.check:
+        print(check_onnx_parity(model_dir=args.output_dir, quantized=args.quantize, model_name=args.model))
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+
+
+class ScalarQuantizer:
+    """
+    Representación comprimida de la matriz de candidatos para el primer barrido:
+
+      - "float16": media precisión (2x menos memoria que float32)
+      - "int8":    cuantización escalar por dimensión (4x menos memoria).
+                   Cada dimensión d usa una escala fija s[d] = max|x[:, d]| / 127
+                   calculada sobre el corpus, de modo que
+                       x · q  ~=  codes · (s * q)
+                   y basta con escalar la consulta: no hay datos extra por fila.
+
+    Los scores del barrido son aproximados; el motor re-puntúa el top con
+    los vectores float32 exactos (ver SemanticRankingEngine).
+    """
+
+    KINDS = ("float16", "int8")
+
+    def __init__(self, kind: str, scales: Optional[np.ndarray] = None) -> None:
+        if kind not in self.KINDS:
+            raise ValueError(f"Tipo de cuantización desconocido: {kind!r}. Opciones: {self.KINDS}")
+        self.kind = kind
+        self.scales = scales
+        self._max_abs: Optional[np.ndarray] = None
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype("float16") if self.kind == "float16" else np.dtype("int8")
+
+    def fit(self, vectors: np.ndarray) -> "ScalarQuantizer":
+        self._max_abs = None
+        return self.partial_fit(vectors)
+
+    def partial_fit(self, vectors: np.ndarray) -> "ScalarQuantizer":
+        """
+        Ajuste incremental (por bloques): las escalas quedan igual que con
+        ``fit`` sobre todas las filas, sin tener la matriz completa en memoria.
+        """
+        if self.kind == "int8" and vectors.shape[0]:
+            max_abs = np.abs(vectors).max(axis=0).astype("float32")
+            if self._max_abs is not None:
+                max_abs = np.maximum(max_abs, self._max_abs)
+            self._max_abs = max_abs
+            self.scales = np.maximum(max_abs, 1e-6) / 127.0
+        return self
+
+    def encode(self, vectors: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+        """
+        Codifica (n, dim) float32 -> (n, dim) float16/int8, por bloques.
+        """
+        vectors = np.asarray(vectors)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        out = np.empty(vectors.shape, dtype=self.dtype)
+        for start in range(0, vectors.shape[0], chunk_size):
+            block = np.asarray(vectors[start:start + chunk_size], dtype="float32")
+            if self.kind == "float16":
+                out[start:start + block.shape[0]] = block.astype("float16")
+            else:
+                if self.scales is None:
+                    self.fit(block)
+                codes = np.rint(block / self.scales)
+                out[start:start + block.shape[0]] = np.clip(codes, -127, 127).astype("int8")
+        return out
+
+    def prepare_query(self, query_unit: np.ndarray) -> np.ndarray:
+        q = np.asarray(query_unit, dtype="float32").reshape(-1)
+        if self.kind == "int8" and self.scales is not None:
+            return q * self.scales
+        return q
+
+    def scores(self, codes: np.ndarray, query_unit: np.ndarray, chunk_size: int = 16384) -> np.ndarray:
+        """
+        Scores aproximados de todas las filas de ``codes``. Se convierte a float32
+        por bloques para que el temporal sea de tamaño acotado (chunk_size x dim).
+        """
+        q = self.prepare_query(query_unit)
+        out = np.empty(codes.shape[0], dtype="float32")
+        for start in range(0, codes.shape[0], chunk_size):
+            block = codes[start:start + chunk_size].astype("float32")
+            out[start:start + block.shape[0]] = block @ q
+        return out
+
+    def scores_rows(self, codes: np.ndarray, ids: np.ndarray, query_unit: np.ndarray) -> np.ndarray:
+        q = self.prepare_query(query_unit)
+        return codes[ids].astype("float32") @ q
+
+
+def recall_at_k(exact_scores: np.ndarray, approx_scores: np.ndarray, k: int) -> float:
+    """
+    Fracción del top-k exacto que aparece en el top-k aproximado.
+    Sirve para medir la pérdida de calidad de la cuantización (o del índice ANN)
+    sobre un conjunto de consultas de referencia.
+    """
+    k = min(k, exact_scores.size)
+    if k <= 0:
+        return 1.0
+    exact_top = np.argpartition(-exact_scores, k - 1)[:k]
+    approx_top = np.argpartition(-approx_scores, k - 1)[:k]
+    return len(np.intersect1d(exact_top, approx_top)) / float(k)
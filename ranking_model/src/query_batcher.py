@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+EncodeFn = Callable[[Sequence[str]], np.ndarray]
+
+
+class QueryBatcher:
+    """
+    Agrupa en un solo ``encode`` los textos de consulta que llegan casi a la vez
+    desde hilos distintos (threadpool de FastAPI).
+
+    - El primer texto que llega abre una ventana de ``max_wait_ms``.
+    - Se cierra antes si se juntan ``max_batch`` textos.
+    - Cada llamador recibe su propio vector (dim,).
+
+    Con un único usuario la latencia extra es como mucho ``max_wait_ms``;
+    con tráfico concurrente el transformer trabaja con lotes en vez de lotes de 1.
+    """
+
+    def __init__(self, encode_fn: EncodeFn, max_batch: int = 32, max_wait_ms: float = 5.0) -> None:
+        self._encode_fn = encode_fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self.batches = 0
+        self.items = 0
+        self._worker = threading.Thread(target=self._run, name="query-batcher", daemon=True)
+        self._worker.start()
+
+    def encode(self, text: str, timeout: Optional[float] = None) -> np.ndarray:
+        """
+        Encola ``text`` y espera su embedding. Bloquea sólo al hilo llamador.
+        """
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future.result(timeout=timeout)
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            # Textos repetidos dentro del mismo lote se codifican una sola vez
+            unique: Dict[str, int] = {}
+            for text, _ in batch:
+                unique.setdefault(text, len(unique))
+            try:
+                vectors = self._encode_fn(list(unique))
+            except BaseException as e:  # el error se propaga a cada llamador
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            for text, future in batch:
+                # Copia: ni los textos repetidos comparten array ni se retiene el lote
+                future.set_result(np.array(vectors[unique[text]]))
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": (self.items / self.batches) if self.batches else 0.0,
+            "queued": self._queue.qsize(),
+        }
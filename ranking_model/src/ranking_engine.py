@@ -1,14 +1,38 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Optional, Dict, Any
-import csv
+from typing import Callable, Iterator, List, Optional, Dict, Any, Iterable, Sequence, Tuple, Union
+from pathlib import Path
+import hashlib
 import os
+import threading
+import time
 from functools import lru_cache
 import numpy as np
 
-from .config import CANDIDATES_CSV_PATH
-from .embeddings import get_embeddings, cosine_sim
+from .config import (
+    ANN_INDEX_TYPE,
+    ANN_MIN_CORPUS_SIZE,
+    ANN_NPROBE,
+    ANN_CANDIDATES,
+    EMBEDDING_QUANTIZATION,
+    RESCORE_CANDIDATES,
+    EMBEDDINGS_MMAP,
+    MMAP_HEADROOM_ROWS,
+    CORPUS_CHUNK_SIZE,
+    EMBED_CHECKPOINT_ROWS,
+    FIELD_WEIGHTS,
+    HYBRID_RETRIEVAL,
+    LEXICAL_CANDIDATES,
+)
+from .embeddings import get_query_embedding, get_query_embeddings, dot_sim, dot_sim_batch
+from .instrumentation import span
+from .embedding_store import EmbeddingStore, text_hash
+from .ann_index import VectorIndex, load_or_build_index
+from .quantization import ScalarQuantizer
+from .candidate_table import CandidateTable
+from .lexical_index import BM25Index, candidate_tokens
+from .candidate_source import CANDIDATE_COLUMNS, CandidateSource, get_candidate_source
 
 
 # --------- Modelos de datos ---------
@@ -46,45 +70,95 @@ def _safe_str(x: Any) -> str:
     return str(x)
 
 
-def _load_candidates_raw() -> List[Dict[str, Any]]:
+def _load_candidates_raw(source: Optional[CandidateSource] = None) -> List[Dict[str, Any]]:
     """
-    Lee candidates.csv a una lista de dicts sin usar pandas.
-    Espera columnas:
-      id, role, skills, location, years_experience, languages
+    Lee el corpus completo a una lista de dicts (forma de candidates.csv).
+    Para corpus grandes usar ``source.iter_chunks``.
     """
-    path = str(CANDIDATES_CSV_PATH)
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"No se encontró el archivo de candidatos: {path}")
-
+    source = source if source is not None else get_candidate_source()
     rows: List[Dict[str, Any]] = []
-    with open(path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        expected_cols = [
-            "id",
-            "role",
-            "skills",
-            "location",
-            "years_experience",
-            "languages",
-        ]
-        for col in expected_cols:
-            if col not in reader.fieldnames:
-                raise ValueError(f"Falta la columna '{col}' en {path}")
-
-        for row in reader:
-            rows.append(row)
+    for chunk in source.iter_chunks():
+        rows.extend(chunk)
     return rows
 
 
+def _normalize_candidate_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Valida y completa un candidato que llega por la API incremental
+    (subida de CVs, scraper), dejándolo con la misma forma que una fila del CSV.
+    """
+    cand_id = _safe_str(row.get("id", "")).strip()
+    if not cand_id:
+        raise ValueError("El candidato debe tener un 'id' no vacío.")
+
+    normalized: Dict[str, Any] = dict(row)
+    for col in CANDIDATE_COLUMNS:
+        value = row.get(col, "")
+        if isinstance(value, (list, tuple)):
+            value = ";".join(_safe_str(v).strip() for v in value if _safe_str(v).strip())
+        normalized[col] = _safe_str(value)
+    normalized["id"] = cand_id
+    return normalized
+
+
+def _parse_years(row: Dict[str, Any]) -> int:
+    years_raw = row.get("years_experience", "0")
+    try:
+        return int(years_raw)
+    except Exception:
+        return 0
+
+
+def _split_list_field(row: Dict[str, Any], field: str) -> List[str]:
+    return [s.strip() for s in _safe_str(row.get(field, "")).split(";") if s.strip()]
+
+
+def _to_ranked_candidate(table: CandidateTable, idx: int, score: float) -> RankedCandidate:
+    """
+    Construye el RankedCandidate de la fila ``idx`` a partir de las columnas
+    ya parseadas. Sólo se llama para los candidatos que realmente se
+    devuelven (materialización perezosa).
+    """
+    return RankedCandidate(
+        id=table.ids[idx],
+        role=table.role(idx),
+        skills=list(table.skills[idx]),
+        location=table.location(idx),
+        years_experience=int(table.years[idx]),
+        languages=list(table.languages[idx]),
+        score=float(score),
+        raw_row=table.row_dict(idx),
+    )
+
+
+def top_k_indices(
+    scores: np.ndarray,
+    k: Optional[int] = None,
+    candidates: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Índices de los ``k`` mejores scores, ordenados de mayor a menor.
+    - ``candidates``: restringe la selección a esos índices (filtros previos).
+    - ``k=None``: orden completo.
+    Usa selección parcial (argpartition, O(n)) y sólo ordena los k elegidos.
+    """
+    idx = np.arange(len(scores)) if candidates is None else np.asarray(candidates, dtype=np.int64)
+    if idx.size == 0:
+        return idx
+    sub = scores[idx]
+    if k is not None and k < idx.size:
+        if k <= 0:
+            return idx[:0]
+        part = np.argpartition(-sub, k - 1)[:k]
+        return idx[part[np.argsort(-sub[part])]]
+    return idx[np.argsort(-sub)]
+
+
 def _concat_candidate_text(row: Dict[str, Any]) -> str:
     role = _safe_str(row.get("role", ""))
     skills = _safe_str(row.get("skills", ""))
     location = _safe_str(row.get("location", ""))
-    years_raw = row.get("years_experience", "0")
-    try:
-        years = int(years_raw)
-    except Exception:
-        years = 0
+    years = _parse_years(row)
     languages = _safe_str(row.get("languages", ""))
 
     parts = [
@@ -97,6 +171,51 @@ def _concat_candidate_text(row: Dict[str, Any]) -> str:
     return " | ".join(parts)
 
 
+FIELD_NAMES = ("full", "role", "skills")
+
+
+def _parse_field_weights(spec: Union[str, Dict[str, float], None]) -> Dict[str, float]:
+    """
+    "full=0.6,role=0.25,skills=0.15" -> pesos normalizados a suma 1.
+    Devuelve {} si sólo se usa el texto completo (sin fusión).
+    """
+    if not spec:
+        return {}
+    if isinstance(spec, str):
+        weights: Dict[str, float] = {}
+        for part in spec.split(","):
+            if not part.strip():
+                continue
+            name, _, value = part.partition("=")
+            weights[name.strip().lower()] = float(value)
+    else:
+        weights = {k.lower(): float(v) for k, v in spec.items()}
+
+    unknown = set(weights) - set(FIELD_NAMES)
+    if unknown:
+        raise ValueError(f"Campos de embedding desconocidos: {sorted(unknown)}. Opciones: {FIELD_NAMES}")
+    weights = {k: v for k, v in weights.items() if v > 0}
+    total = sum(weights.values())
+    if not total or set(weights) == {"full"}:
+        return {}
+    return {k: v / total for k, v in weights.items()}
+
+
+def _role_field_text(role: str) -> str:
+    return f"Rol: {role}"
+
+
+def _skills_field_text(skills: Sequence[str]) -> str:
+    return f"Skills: {'; '.join(skills)}"
+
+
+def _lexical_query_tokens(req: RankingQueryRequirements) -> List[str]:
+    """
+    Tokens léxicos de la consulta (rol + skills) para el índice BM25.
+    """
+    return candidate_tokens(req.role or "", list(req.skills or []))
+
+
 def _build_query_text(req: RankingQueryRequirements) -> str:
     role = req.role or ""
     location = req.location or ""
@@ -129,93 +248,771 @@ class SemanticRankingEngine:
     """
     Motor de ranking basado en embeddings semánticos.
     Carga y embebe a los candidatos al inicializar, para reutilizar en múltiples consultas.
+    El corpus se lee de un CandidateSource (candidates.csv o la tabla
+    ``candidatos`` de SQLite, ver candidate_source.py).
+    Los metadatos se guardan en una tabla columnar (CandidateTable): años,
+    rol y ubicación como arrays, skills/idiomas ya separados.
+    Los embeddings se leen del cache persistente (EmbeddingStore); sólo se
+    codifican los candidatos nuevos o cuyo texto haya cambiado.
+
+    Con corpus grandes (>= ANN_MIN_CORPUS_SIZE) la búsqueda pasa por un índice
+    ANN (ver ann_index.py); con corpus pequeños se usa el producto exacto.
+
+    Con ``quantization`` ("float16"/"int8") la matriz en memoria se guarda
+    comprimida y sólo se usa para el primer barrido; los ``rescore_candidates``
+    mejores se re-puntúan con los vectores float32 del cache en disco.
+
+    Con ``field_weights`` (p.ej. "full=0.6,role=0.25,skills=0.15") se guardan
+    además embeddings del rol y de las skills de cada candidato (cacheados; los
+    roles repetidos se codifican una vez) y la matriz del barrido es su
+    combinación ponderada  sum_f w_f * e_f.  Como  (sum_f w_f e_f) · q =
+    sum_f w_f cos(e_f, q),  la fusión de similitudes sigue siendo un único
+    GEMV por consulta y la consulta se codifica una sola vez.
+
+    Con ``hybrid`` se mantiene además un índice BM25 sobre rol + skills
+    (lexical_index.py). Los ``lexical_candidates`` mejores por BM25 se añaden
+    a los recuperados (puntuados en exacto si el ANN no los trajo) y el
+    orquestador fusiona ambos rankings con RRF.
+
+    Con ``mmap_embeddings`` la matriz del barrido (float32 o cuantizada) se
+    guarda en disco en el orden del corpus y se abre con memoria mapeada
+    copy-on-write: todos los workers comparten las mismas páginas (page cache),
+    el arranque sólo lee el CSV, y una escritura (upsert) sólo privatiza las
+    páginas que toca.
     """
 
-    def __init__(self) -> None:
-        self._candidates_raw: List[Dict[str, Any]] = _load_candidates_raw()
-        self._candidate_texts: List[str] = [
-            _concat_candidate_text(row) for row in self._candidates_raw
-        ]
-        self._candidate_embeddings: np.ndarray = get_embeddings(self._candidate_texts)
+    def __init__(
+        self,
+        store: Optional[EmbeddingStore] = None,
+        source: Optional[CandidateSource] = None,
+        ann_index_type: Optional[str] = ANN_INDEX_TYPE,
+        ann_min_corpus_size: int = ANN_MIN_CORPUS_SIZE,
+        ann_nprobe: int = ANN_NPROBE,
+        ann_candidates: int = ANN_CANDIDATES,
+        quantization: Optional[str] = EMBEDDING_QUANTIZATION,
+        rescore_candidates: int = RESCORE_CANDIDATES,
+        mmap_embeddings: bool = EMBEDDINGS_MMAP,
+        corpus_chunk_size: int = CORPUS_CHUNK_SIZE,
+        field_weights: Union[str, Dict[str, float], None] = FIELD_WEIGHTS,
+        hybrid: bool = HYBRID_RETRIEVAL,
+        lexical_candidates: int = LEXICAL_CANDIDATES,
+    ) -> None:
+        self._field_weights = _parse_field_weights(field_weights)
+        self._store = store if store is not None else EmbeddingStore()
+        self._source = source if source is not None else get_candidate_source()
+        # Versión leída ANTES de cargar: un cambio durante la carga se detecta después
+        self._source_version = self._source.version()
+        self._table = CandidateTable()
+        self._candidate_keys: List[str] = []
+        self._load_corpus(corpus_chunk_size)
+        fingerprint_src = "\n".join(self._candidate_keys)
+        if self._field_weights:
+            # Los ficheros derivados (matriz, índice ANN) dependen de los pesos
+            fingerprint_src += f"\nweights={sorted(self._field_weights.items())}"
+        self._fingerprint = hashlib.sha1(fingerprint_src.encode("utf-8")).hexdigest()[:16]
+
+        kind = (quantization or "none").lower()
+        if kind == "float32":
+            kind = "none"
+        self._quantizer: Optional[ScalarQuantizer] = None
+        self._rescore_candidates = rescore_candidates
+
+        matrix = self._open_mmap_matrix(kind) if mmap_embeddings else None
+        if matrix is None:
+            matrix = self._build_matrix(kind, mmap_embeddings, corpus_chunk_size)
+
+        # ``_embedding_buffer`` puede tener filas libres al final (headroom del mmap)
+        self._embedding_buffer: np.ndarray = matrix
+        self._candidate_embeddings: np.ndarray = matrix[: len(self._table)]
+
+        self._id_to_index: Dict[str, int] = {
+            cand_id: i for i, cand_id in enumerate(self._table.ids)
+        }
+
+        # Las actualizaciones incrementales y las consultas pueden llegar
+        # desde hilos distintos (threadpool de FastAPI).
+        self._lock = threading.RLock()
+
+        # Índice léxico BM25 (rol + skills) para la recuperación híbrida
+        self._lexical_candidates = lexical_candidates
+        self._lexical: Optional[BM25Index] = None
+        if hybrid:
+            self._lexical = BM25Index.from_table(self._table)
+
+        self._ann_candidates = ann_candidates
+        self._ann_min_corpus_size = ann_min_corpus_size
+        self._ann: Optional[VectorIndex] = None
+        if (
+            ann_index_type
+            and ann_index_type.lower() != "none"
+            and len(self._table) >= ann_min_corpus_size
+        ):
+            if self._quantizer is None:
+                unit_source = self._candidate_embeddings
+            else:
+                unit_source = lambda: self._scoring_vectors(
+                    self._table, range(len(self._candidate_keys))
+                )
+            self._ann = self._load_or_build_ann(
+                ann_index_type.lower(), unit_source, nprobe=ann_nprobe
+            )
+
+    # --------- Carga del corpus por bloques ---------
+
+    def _load_corpus(self, chunk_size: int) -> None:
+        """
+        Lee, valida y embebe el corpus por bloques: en memoria sólo hay un
+        bloque de filas/textos a la vez y la tabla columnar.
+        Los vectores nuevos se vuelcan al cache cada EMBED_CHECKPOINT_ROWS
+        como un segmento (sólo se escriben ellos), de modo que si la carga se
+        interrumpe, el siguiente arranque retoma desde ahí (los textos ya
+        guardados no se recodifican). Al final se compacta una sola vez.
+        """
+        start = time.perf_counter()
+        n_encoded = 0
+        parts: List[CandidateTable] = []
+        field_keys: Dict[str, None] = {}
+        n_rows = 0
+        for chunk in self._source.iter_chunks(chunk_size):
+            texts = [_concat_candidate_text(row) for row in chunk]
+            if self._field_weights:
+                # Textos por campo (sin repetidos): muchos candidatos comparten rol
+                texts += list(dict.fromkeys(self._field_texts(chunk)))
+            # Todos los bloques comparten los diccionarios de rol/ubicación
+            parts.append(
+                CandidateTable.from_rows(chunk, self._table.roles, self._table.locations)
+            )
+            n_rows += len(chunk)
+            pending_before = self._store.pending_count
+            keys = self._store.ensure(texts, verbose=False)
+            self._candidate_keys.extend(keys[: len(chunk)])
+            field_keys.update(dict.fromkeys(keys[len(chunk):]))
+            encoded = self._store.pending_count - pending_before
+
+            if encoded:
+                n_encoded += encoded
+                elapsed = max(time.perf_counter() - start, 1e-9)
+                print(
+                    f"[INFO] Corpus: {n_rows} candidatos leídos, "
+                    f"{n_encoded} codificados ({n_encoded / elapsed:.0f} textos/s)."
+                )
+            if self._store.pending_count >= EMBED_CHECKPOINT_ROWS:
+                # Punto de reanudación
+                self._store.checkpoint()
+
+        if parts:
+            self._table = CandidateTable.concat(parts)
+
+        # Descarta versiones antiguas de candidatos y persiste lo nuevo,
+        # en el orden del corpus
+        self._store.retain(self._candidate_keys + list(field_keys))
+        self._store.save(order=self._candidate_keys)
+        if n_encoded:
+            print(
+                f"[INFO] Corpus cargado: {len(self._table)} candidatos, {n_encoded} "
+                f"embeddings nuevos en {time.perf_counter() - start:.1f}s."
+            )
+
+    def _field_texts(self, rows: List[Dict[str, Any]]) -> List[str]:
+        texts: List[str] = []
+        if "role" in self._field_weights:
+            texts += [_role_field_text(_safe_str(r.get("role", ""))) for r in rows]
+        if "skills" in self._field_weights:
+            texts += [_skills_field_text(_split_list_field(r, "skills")) for r in rows]
+        return texts
+
+    def _fuse(
+        self, full: np.ndarray, roles: List[str], skills: List[Sequence[str]]
+    ) -> np.ndarray:
+        """
+        Vectores del barrido: el embedding del texto completo o, con
+        ``field_weights``, la suma ponderada de los embeddings por campo.
+        """
+        if not self._field_weights:
+            return full
+        out = full * self._field_weights.get("full", 0.0)
+        if "role" in self._field_weights:
+            role_vecs = self._store.embed([_role_field_text(r) for r in roles])
+            out += self._field_weights["role"] * role_vecs
+        if "skills" in self._field_weights:
+            skill_vecs = self._store.embed([_skills_field_text(s) for s in skills])
+            out += self._field_weights["skills"] * skill_vecs
+        return out.astype("float32", copy=False)
+
+    def _scoring_vectors(self, table: CandidateTable, ids: Sequence[int]) -> np.ndarray:
+        full = self._store.get_many([self._candidate_keys[int(i)] for i in ids])
+        if not self._field_weights:
+            return full
+        return self._fuse(
+            full, [table.role(int(i)) for i in ids], [table.skills[int(i)] for i in ids]
+        )
+
+    def _iter_unit_blocks(self, chunk_size: int) -> Iterator[Tuple[int, np.ndarray]]:
+        n = len(self._candidate_keys)
+        for start in range(0, n, chunk_size):
+            ids = range(start, min(start + chunk_size, n))
+            yield start, self._scoring_vectors(self._table, ids)
+
+    def _build_matrix(self, kind: str, mmap_embeddings: bool, chunk_size: int) -> np.ndarray:
+        """
+        Construye la matriz del barrido (float32 de norma 1, o cuantizada)
+        leyendo los vectores del cache por bloques: nunca hay a la vez
+        la matriz float32 completa y su versión comprimida.
+        """
+        n, dim = len(self._candidate_keys), self._store.dim
+        if kind != "none":
+            self._quantizer = ScalarQuantizer(kind)
+            if kind == "int8":
+                for _, block in self._iter_unit_blocks(chunk_size):
+                    self._quantizer.partial_fit(block)
+        dtype = self._quantizer.dtype if self._quantizer is not None else np.dtype("float32")
+
+        blocks = (
+            (start, self._quantizer.encode(block) if self._quantizer is not None else block)
+            for start, block in self._iter_unit_blocks(chunk_size)
+        )
+        if mmap_embeddings:
+            return self._write_mmap_matrix(kind, n, dim, dtype, blocks)
+
+        matrix = np.empty((n, dim), dtype=dtype)
+        for start, block in blocks:
+            matrix[start:start + block.shape[0]] = block
+        return matrix
+
+    # --------- Ficheros derivados del corpus (índice ANN, matriz mapeada) ---------
+
+    def _corpus_file(self, prefix: str, suffix: str) -> Path:
+        """
+        Ruta de un fichero derivado del corpus actual, con su huella en el
+        nombre. Borra las versiones de corpus anteriores con el mismo prefijo.
+        """
+        path = self._store.directory / f"{prefix}_{self._fingerprint}{suffix}"
+        if self._store.directory.exists():
+            for old_path in self._store.directory.glob(f"{prefix}_*{suffix}"):
+                if not old_path.name.startswith(path.stem):
+                    old_path.unlink(missing_ok=True)
+        return path
+
+    def _load_or_build_ann(
+        self, kind: str, unit_embeddings: Any, **params: Any
+    ) -> VectorIndex:
+        """
+        El índice se guarda junto al cache de embeddings, con una huella del
+        corpus en el nombre: si el corpus no cambió, se carga sin reentrenar.
+        """
+        path = self._corpus_file(f"ann_{kind}", ".npz")
+        print(f"[INFO] Usando índice ANN '{kind}' para {len(self._table)} candidatos.")
+        return load_or_build_index(
+            kind, unit_embeddings, path, n_rows=len(self._table), **params
+        )
+
+    def _open_mmap_matrix(self, kind: str) -> Optional[np.ndarray]:
+        """
+        Abre la matriz del corpus actual si otro proceso ya la escribió.
+        Devuelve None si no existe (o es ilegible) y hay que construirla.
+        """
+        path = self._store.directory / f"matrix_{kind}_{self._fingerprint}.npy"
+        scales_path = path.with_suffix(".scales.npy")
+        if not path.exists() or (kind == "int8" and not scales_path.exists()):
+            return None
+        try:
+            matrix = np.load(path, mmap_mode="c", allow_pickle=False)
+            if kind != "none":
+                scales = np.load(scales_path) if kind == "int8" else None
+                self._quantizer = ScalarQuantizer(kind, scales=scales)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] No se pudo mapear la matriz de embeddings {path}: {e}")
+            self._quantizer = None
+            return None
+        if matrix.ndim != 2 or matrix.shape[0] < len(self._table):
+            self._quantizer = None
+            return None
+        print(f"[INFO] Matriz de embeddings mapeada desde {path.name}.")
+        return matrix
+
+    def _write_mmap_matrix(
+        self,
+        kind: str,
+        n: int,
+        dim: int,
+        dtype: np.dtype,
+        blocks: Iterable[Tuple[int, np.ndarray]],
+    ) -> np.ndarray:
+        """
+        Escribe la matriz por bloques (con MMAP_HEADROOM_ROWS filas libres para
+        altas incrementales) y la vuelve a abrir mapeada. tmp + rename: un worker
+        que arranca a la vez nunca ve un fichero a medio escribir.
+        """
+        path = self._corpus_file(f"matrix_{kind}", ".npy")
+        self._store.directory.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npy")
+        out = np.lib.format.open_memmap(
+            tmp, mode="w+", dtype=dtype, shape=(n + MMAP_HEADROOM_ROWS, dim)
+        )
+        for start, block in blocks:
+            out[start:start + block.shape[0]] = block
+        out.flush()
+        del out
+        if self._quantizer is not None and self._quantizer.scales is not None:
+            scales_tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.scales.npy")
+            np.save(scales_tmp, self._quantizer.scales)
+            os.replace(scales_tmp, path.with_suffix(".scales.npy"))
+        os.replace(tmp, path)
+        return np.load(path, mmap_mode="c", allow_pickle=False)
+
+    @property
+    def ann_index(self) -> Optional[VectorIndex]:
+        return self._ann
+
+    @property
+    def source(self) -> CandidateSource:
+        return self._source
+
+    @property
+    def source_version(self) -> Tuple[Any, ...]:
+        return self._source_version
+
+    @property
+    def table(self) -> CandidateTable:
+        return self._table
 
     @property
     def candidates_raw(self) -> List[Dict[str, Any]]:
-        return self._candidates_raw
+        """
+        Filas como dicts (misma forma que el CSV). Se construyen bajo demanda;
+        el motor no las guarda.
+        """
+        table = self._table
+        return [table.row_dict(i) for i in range(len(table))]
+
+    def __len__(self) -> int:
+        return len(self._table)
 
-    def run_ranking(self, req: RankingQueryRequirements) -> List[RankedCandidate]:
+    # --------- Actualización incremental del corpus ---------
+
+    def _ensure_capacity(self, n_rows: int, dim: int) -> None:
         """
-        Devuelve todos los candidatos ordenados por similitud de coseno
-        respecto al query construido desde RankingQueryRequirements.
-        NO filtra por rol/ubicación/años; eso se deja a la capa superior.
+        Garantiza que el buffer de embeddings tenga hueco para ``n_rows`` filas.
+        Crece por duplicación para que las altas sucesivas sean O(1) amortizado.
+        ``_candidate_embeddings`` es siempre una vista de las filas ocupadas.
+        """
+        buffer = self._embedding_buffer
+        dtype = self._quantizer.dtype if self._quantizer is not None else np.dtype("float32")
+        if buffer.ndim != 2 or buffer.shape[1] != dim:
+            # Corpus vacío al arrancar: todavía no conocíamos la dimensión
+            buffer = np.zeros((0, dim), dtype=dtype)
+
+        if buffer.shape[0] < n_rows:
+            new_capacity = max(n_rows, 2 * buffer.shape[0], 16)
+            grown = np.zeros((new_capacity, dim), dtype=dtype)
+            n_used = len(self._table)
+            if n_used:
+                grown[:n_used] = self._candidate_embeddings[:n_used]
+            buffer = grown
+
+        self._embedding_buffer = buffer
+
+    def upsert_candidates(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """
+        Inserta o actualiza candidatos por 'id' sin reconstruir el motor.
+        Sólo se embeben las filas recibidas (y el cache evita recodificar
+        las que no cambiaron); la matriz y los metadatos se parchean in situ.
+        Devuelve el número de candidatos procesados.
+        """
+        new_rows: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            norm = _normalize_candidate_row(row)
+            new_rows[norm["id"]] = norm
+        if not new_rows:
+            return 0
+
+        texts = [_concat_candidate_text(r) for r in new_rows.values()]
+        vectors = self._fuse(
+            self._store.embed(texts),
+            [_safe_str(r.get("role", "")) for r in new_rows.values()],
+            [_split_list_field(r, "skills") for r in new_rows.values()],
+        )
+        if self._quantizer is not None and self._quantizer.kind == "int8" and self._quantizer.scales is None:
+            # Corpus vacío al arrancar: las escalas se ajustan con las primeras altas
+            self._quantizer.fit(vectors)
+        codes = self._quantizer.encode(vectors) if self._quantizer is not None else vectors
+
+        with self._lock:
+            n_new = sum(1 for cid in new_rows if cid not in self._id_to_index)
+            self._ensure_capacity(len(self._table) + n_new, vectors.shape[1])
+            buffer = self._embedding_buffer
+            # Copy-on-write: las consultas en curso conservan su snapshot de la tabla
+            table = self._table.copy()
+
+            appended: List[Dict[str, Any]] = []
+            for (cand_id, row), text, vec, code in zip(new_rows.items(), texts, vectors, codes):
+                idx = self._id_to_index.get(cand_id)
+                if idx is None:
+                    idx = len(table) + len(appended)
+                    appended.append(row)
+                    self._candidate_keys.append(text_hash(text))
+                    self._id_to_index[cand_id] = idx
+                else:
+                    table.set_row(idx, row)
+                    self._candidate_keys[idx] = text_hash(text)
+                    if self._ann is not None:
+                        self._ann.remove(idx)
+                    if self._lexical is not None:
+                        self._lexical.remove(idx)
+                buffer[idx] = code
+                if self._ann is not None:
+                    self._ann.add(idx, vec)
+                if self._lexical is not None:
+                    self._lexical.add(
+                        idx,
+                        candidate_tokens(
+                            _safe_str(row.get("role", "")), _split_list_field(row, "skills")
+                        ),
+                    )
+            table.extend(appended)
+
+            self._table = table
+            self._candidate_embeddings = buffer[: len(table)]
+
+        # Los vectores nuevos quedan en memoria en el cache; se escriben a disco
+        # en la próxima construcción completa (reescribir el fichero aquí sería O(n)).
+        return len(new_rows)
+
+    def remove_candidates(self, ids: Iterable[str]) -> int:
+        """
+        Elimina candidatos por 'id'. Se mueve la última fila al hueco
+        (swap-remove) para no copiar la matriz completa.
+        Devuelve cuántos candidatos se eliminaron realmente.
+        """
+        removed = 0
+        with self._lock:
+            table = self._table.copy()
+            n = len(table)
+            for cand_id in ids:
+                idx = self._id_to_index.pop(_safe_str(cand_id).strip(), None)
+                if idx is None:
+                    continue
+                last = n - 1
+                if self._ann is not None:
+                    self._ann.remove(idx)
+                if self._lexical is not None:
+                    self._lexical.remove(idx)
+                if idx != last:
+                    table.move_row(last, idx)
+                    self._candidate_keys[idx] = self._candidate_keys[last]
+                    self._candidate_embeddings[idx] = self._candidate_embeddings[last]
+                    self._id_to_index[table.ids[idx]] = idx
+                    if self._ann is not None:
+                        self._ann.move(last, idx)
+                    if self._lexical is not None:
+                        self._lexical.move(last, idx)
+                self._candidate_keys.pop()
+                self._candidate_embeddings = self._candidate_embeddings[:last]
+                n = last
+                removed += 1
+            table.truncate(n)
+            self._table = table
+        return removed
+
+    def _scan_rows(self, ids: np.ndarray, query_unit: np.ndarray) -> np.ndarray:
+        """
+        Scores del primer barrido para un subconjunto de filas
+        (float32 exacto, o aproximado si la matriz está cuantizada).
+        """
+        if self._quantizer is None:
+            return self._candidate_embeddings[ids] @ query_unit
+        return self._quantizer.scores_rows(self._candidate_embeddings, ids, query_unit)
+
+    def _rescore(self, ids: np.ndarray, query_unit: np.ndarray) -> np.ndarray:
+        """
+        Re-puntúa ``ids`` con los vectores float32 del cache (sólo se leen esas filas).
+        """
+        return self._scoring_vectors(self._table, ids) @ query_unit
+
+    def score_candidates(
+        self,
+        req: RankingQueryRequirements,
+        prefilter: Optional[Callable[[CandidateTable], Optional[np.ndarray]]] = None,
+    ) -> Tuple[np.ndarray, CandidateTable, np.ndarray, Optional[np.ndarray]]:
+        """
+        Devuelve (scores, tabla, índices, léxico):
+          - scores: similitud de coseno (n,) alineada con las filas
+          - tabla: snapshot de la tabla columnar del corpus
+          - índices: candidatos recuperados. En modo exacto es todo el corpus;
+            con índice ANN sólo los ``ann_candidates`` más cercanos y con
+            cuantización sólo los ``rescore_candidates`` re-puntuados en float32
+            (el resto queda con score -inf).
+          - léxico: scores BM25 (n,) de rol + skills (0 si no hay coincidencia),
+            o None si la recuperación híbrida está desactivada.
+
+        ``prefilter`` recibe el mismo snapshot de la tabla (bajo el lock) y
+        devuelve los índices que cumplen los filtros deterministas; sólo esas
+        filas se puntúan. Si devuelve None se puntúa el corpus completo.
+        No construye ningún RankedCandidate; eso se hace sólo para el top final.
         """
         query_text = _build_query_text(req)
-        query_vec = get_embeddings([query_text])[0]  # (dim,)
-        scores = cosine_sim(query_vec, self._candidate_embeddings)
-
-        order = np.argsort(-scores)
-
-        ranked: List[RankedCandidate] = []
-        for idx in order:
-            row = self._candidates_raw[int(idx)]
-            score = float(scores[int(idx)])
-
-            skills_list = [
-                s.strip()
-                for s in _safe_str(row.get("skills", "")).split(";")
-                if s.strip()
-            ]
-            languages_list = [
-                l.strip()
-                for l in _safe_str(row.get("languages", "")).split(";")
-                if l.strip()
-            ]
-
-            years_raw = row.get("years_experience", "0")
-            try:
-                years = int(years_raw)
-            except Exception:
-                years = 0
-
-            ranked.append(
-                RankedCandidate(
-                    id=_safe_str(row.get("id", "")),
-                    role=_safe_str(row.get("role", "")),
-                    skills=skills_list,
-                    location=_safe_str(row.get("location", "")),
-                    years_experience=years,
-                    languages=languages_list,
-                    score=score,
-                    raw_row=row,
+        with span("encode"):
+            query_vec = get_query_embedding(query_text)  # (dim,), cacheado (LRU)
+        lex_tokens = _lexical_query_tokens(req) if self._lexical is not None else []
+
+        with self._lock:
+            table = self._table
+            if not len(table):
+                return np.zeros(0, dtype="float32"), table, np.zeros(0, dtype=np.int64), None
+
+            with span("filter"):
+                subset = prefilter(table) if prefilter is not None else None
+            with span("score"):
+                scores, ids = self._score_locked(query_vec, table, subset)
+                ids, lexical = self._lexical_locked(lex_tokens, query_vec, subset, scores, ids)
+        return scores, table, ids, lexical
+
+    def _lexical_locked(
+        self,
+        tokens: List[str],
+        query_vec: np.ndarray,
+        subset: Optional[np.ndarray],
+        scores: np.ndarray,
+        ids: np.ndarray,
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Parte léxica de la recuperación híbrida (con el lock tomado).
+        Busca en el índice BM25 y añade a ``ids`` los aciertos léxicos que el
+        camino semántico (ANN / cuantización) no trajo, puntuándolos en exacto
+        para que la fusión compare scores de coseno reales.
+        Devuelve (índices recuperados, scores BM25 (n,)).
+        """
+        if self._lexical is None:
+            return ids, None
+        lexical = np.zeros(scores.shape[0], dtype="float32")
+        if not tokens:
+            return ids, lexical
+
+        lex_ids, lex_scores = self._lexical.search(tokens, self._lexical_candidates, subset)
+        lexical[lex_ids] = lex_scores
+        missing = lex_ids[~np.isfinite(scores[lex_ids])]
+        if missing.size:
+            q = (query_vec / (np.linalg.norm(query_vec) + 1e-12)).astype("float32")
+            exact = self._rescore if self._quantizer is not None else self._scan_rows
+            scores[missing] = exact(missing, q)
+            ids = np.concatenate([ids, missing])
+        return ids, lexical
+
+    def _ann_for_subset(self, n_subset: int) -> bool:
+        """
+        El ANN sólo compensa para un subconjunto filtrado grande y poco
+        selectivo: si las listas que se recorren no traen de media
+        ``ann_candidates`` filas del subconjunto, el índice tendría que
+        ampliar la búsqueda y el barrido exacto de esas filas sale más barato.
+        """
+        return (
+            self._ann is not None
+            and n_subset >= self._ann_min_corpus_size
+            and n_subset * self._ann.probe_fraction() >= self._ann_candidates
+        )
+
+    def _score_locked(
+        self, query_vec: np.ndarray, table: CandidateTable, subset: Optional[np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Scores de una consulta sobre ``table`` (se llama con el lock tomado).
+        Devuelve (scores (n,), índices recuperados).
+        """
+        if subset is None and self._ann is None and self._quantizer is None:
+            scores = dot_sim(query_vec, self._candidate_embeddings)
+            return scores, np.arange(len(table), dtype=np.int64)
+
+        q = (query_vec / (np.linalg.norm(query_vec) + 1e-12)).astype("float32")
+        if subset is not None:
+            ids = np.asarray(subset, dtype=np.int64)
+            if self._ann_for_subset(ids.size):
+                # Subconjunto grande: búsqueda ANN restringida a sus filas
+                mask = np.zeros(len(table), dtype=bool)
+                mask[ids] = True
+                ids, sims = self._ann.search(
+                    q, self._ann_candidates, lambda c: self._scan_rows(c, q), subset=mask
                 )
+            else:
+                # Sólo se puntúa la porción que cumple los filtros
+                sims = self._scan_rows(ids, q) if ids.size else np.zeros(0, dtype="float32")
+        elif self._ann is not None:
+            ids, sims = self._ann.search(
+                q, self._ann_candidates, lambda cand: self._scan_rows(cand, q)
             )
+        else:
+            ids = np.arange(len(table), dtype=np.int64)
+            sims = self._quantizer.scores(self._candidate_embeddings, q)
+
+        if self._quantizer is not None and ids.size:
+            best = top_k_indices(sims, self._rescore_candidates)
+            ids = ids[best]
+            sims = self._rescore(ids, q)
+
+        scores = np.full(len(table), -np.inf, dtype="float32")
+        scores[ids] = sims
+        return scores, ids
+
+    def score_candidates_batch(
+        self,
+        reqs: List[RankingQueryRequirements],
+        prefilters: Optional[List[Optional[Callable[[CandidateTable], Optional[np.ndarray]]]]] = None,
+    ) -> Tuple[np.ndarray, CandidateTable, List[np.ndarray], List[Optional[np.ndarray]]]:
+        """
+        Versión por lotes de ``score_candidates``:
+        las m consultas se codifican juntas y, en modo exacto, se puntúan con
+        un único producto matriz-matriz (m, dim) x (dim, n).
+        Devuelve (scores (m, n), tabla, índices recuperados por consulta,
+        scores BM25 por consulta o None).
+
+        ``prefilters`` (uno por consulta, o None) tiene el mismo papel que el
+        ``prefilter`` de ``score_candidates``: se evalúa ANTES de recuperar,
+        así que con índice ANN o cuantización cada consulta busca dentro de
+        sus filas filtradas, igual que en el camino de una sola consulta.
+        """
+        with span("encode"):
+            query_vecs = get_query_embeddings([_build_query_text(r) for r in reqs])
+        lex_tokens = [
+            _lexical_query_tokens(r) if self._lexical is not None else [] for r in reqs
+        ]
+        prefilters = prefilters if prefilters is not None else [None] * len(reqs)
+
+        with self._lock:
+            table = self._table
+            n = len(table)
+            if not n or not reqs:
+                empty = np.zeros(0, dtype=np.int64)
+                return (
+                    np.zeros((len(reqs), n), dtype="float32"),
+                    table,
+                    [empty] * len(reqs),
+                    [None] * len(reqs),
+                )
+
+            with span("filter"):
+                subsets = [pf(table) if pf is not None else None for pf in prefilters]
+            with span("score"):
+                if self._ann is None and self._quantizer is None:
+                    scores = dot_sim_batch(query_vecs, self._candidate_embeddings)
+                    all_ids = np.arange(n, dtype=np.int64)
+                    per_query = [
+                        (scores[j], all_ids if subset is None else np.asarray(subset, dtype=np.int64))
+                        for j, subset in enumerate(subsets)
+                    ]
+                else:
+                    per_query = [
+                        self._score_locked(v, table, subset) for v, subset in zip(query_vecs, subsets)
+                    ]
+                    scores = np.stack([s for s, _ in per_query])
+
+                ids_list: List[np.ndarray] = []
+                lexical_list: List[Optional[np.ndarray]] = []
+                for j, (_, ids) in enumerate(per_query):
+                    # scores[j] es una vista: los aciertos léxicos se escriben en el lote
+                    ids, lexical = self._lexical_locked(
+                        lex_tokens[j], query_vecs[j], subsets[j], scores[j], ids
+                    )
+                    ids_list.append(ids)
+                    lexical_list.append(lexical)
+        return scores, table, ids_list, lexical_list
+
+    def run_ranking(
+        self,
+        req: RankingQueryRequirements,
+        top_k: Optional[int] = None,
+    ) -> List[RankedCandidate]:
+        """
+        Devuelve los candidatos ordenados por similitud de coseno
+        respecto al query construido desde RankingQueryRequirements.
+        Con ``top_k`` sólo se seleccionan (y materializan) los k mejores;
+        sin él, se devuelven todos los candidatos recuperados, ordenados.
+        NO filtra por rol/ubicación/años; eso se deja a la capa superior.
+        """
+        scores, table, indices, _ = self.score_candidates(req)
+        order = top_k_indices(scores, top_k, indices)
+        return [_to_ranked_candidate(table, int(i), scores[int(i)]) for i in order]
+
+
+# nombre -> (catálogo de origen, función que compila la estructura)
+_catalog_compilers: Dict[str, Tuple[str, Callable[[List[str]], Any]]] = {}
+
+
+def register_catalog_compiler(name: str, catalog: str, build: Callable[[List[str]], Any]) -> None:
+    """
+    Registra una estructura compilada (matcher, índice...) sobre el catálogo
+    ``catalog`` ("roles" o "skills"). Se construye junto con cada versión del
+    corpus (ver CorpusCatalogs).
+    """
+    if catalog not in ("roles", "skills"):
+        raise ValueError(f"Catálogo desconocido: {catalog!r}. Opciones: roles, skills")
+    _catalog_compilers[name] = (catalog, build)
+
+
+class CorpusCatalogs:
+    """
+    Catálogos dinámicos de una versión del corpus (roles y skills únicos, a
+    partir de la tabla del motor) y las estructuras registradas con
+    ``register_catalog_compiler`` ya compiladas.
+
+    Se construyen en el mismo hilo que el motor (arranque o recarga) y se
+    cambian junto a él, así una consulta nunca relee el origen ni compila.
+    """
+
+    def __init__(self, table: CandidateTable) -> None:
+        role_values = table.roles.values
+        roles = {role_values[c].strip() for c in np.unique(table.role_codes).tolist()}
+        self.roles: List[str] = sorted(r for r in roles if r)
+        self.skills: List[str] = sorted({s for row in table.skills for s in row})
+        self._compiled: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        for name in list(_catalog_compilers):
+            self.compiled(name)
+
+    def compiled(self, name: str) -> Any:
+        """
+        Estructura compilada ``name``. Si se registró después de construir
+        estos catálogos, se compila una sola vez en el primer uso.
+        """
+        obj = self._compiled.get(name)
+        if obj is None:
+            with self._lock:
+                obj = self._compiled.get(name)
+                if obj is None:
+                    catalog, build = _catalog_compilers[name]
+                    obj = self._compiled[name] = build(getattr(self, catalog))
+        return obj
+
+
+def invalidate_catalog_caches() -> None:
+    """
+    Vacía los catálogos cacheados (roles/skills) tras recargar el corpus.
+    """
+    get_all_roles.cache_clear()
+    get_all_skills.cache_clear()
 
-        return ranked
 
 @lru_cache(maxsize=1)
 def get_all_roles() -> List[str]:
     """
-    Devuelve la lista única de roles que existen en candidates.csv.
+    Devuelve la lista única de roles que existen en el corpus (CSV o SQLite).
     Se usa como 'catálogo' dinámico de profesiones.
     """
-    rows = _load_candidates_raw()
-    roles: List[str] = []
-    for r in rows:
-        role = _safe_str(r.get("role", "")).strip()
-        if role:
-            roles.append(role)
-    # sin duplicados
-    return sorted(set(roles))
+    roles: set[str] = set()
+    for chunk in get_candidate_source().iter_chunks():
+        for r in chunk:
+            role = _safe_str(r.get("role", "")).strip()
+            if role:
+                roles.add(role)
+    return sorted(roles)
 
 
 @lru_cache(maxsize=1)
 def get_all_skills() -> List[str]:
-    rows = _load_candidates_raw()
     skills_set: set[str] = set()
-    for r in rows:
-        raw = _safe_str(r.get("skills", ""))
-        for s in raw.split(";"):
-            s = s.strip()
-            if s:
-                skills_set.add(s)
+    for chunk in get_candidate_source().iter_chunks():
+        for r in chunk:
+            raw = _safe_str(r.get("skills", ""))
+            for s in raw.split(";"):
+                s = s.strip()
+                if s:
+                    skills_set.add(s)
     return sorted(skills_set)
-
@@ -1,15 +1,21 @@
 from __future__ import annotations
 
+import threading
 from dataclasses import dataclass
 from typing import List, Optional, Tuple
 
-from .ranking_engine import RankingQueryRequirements, RankedCandidate
+from .config import DEFAULT_TOP_N
+from .ranking_engine import CorpusCatalogs, RankingQueryRequirements, RankedCandidate
 from .ranking_orchestrator import RankingOrchestrator, _normalize_text
 
 
 __all__ = [
     "QueryRequirements",
     "run_ranking",
+    "run_ranking_batch",
+    "reload_corpus",
+    "corpus_version",
+    "corpus_catalogs",
     "build_candidate_features",
     "score_candidate",
 ]
@@ -46,12 +52,16 @@ class QueryRequirements:
 
 
 _orchestrator: Optional[RankingOrchestrator] = None
+_orchestrator_lock = threading.Lock()
 
 
 def _get_orchestrator() -> RankingOrchestrator:
+    # Con lock: el calentamiento y las primeras consultas pueden llegar a la vez
     global _orchestrator
     if _orchestrator is None:
-        _orchestrator = RankingOrchestrator()
+        with _orchestrator_lock:
+            if _orchestrator is None:
+                _orchestrator = RankingOrchestrator()
     return _orchestrator
 
 
@@ -73,6 +83,64 @@ def run_ranking(query_req: QueryRequirements) -> Tuple[list[RankedCandidate], Qu
     return ranked, query_req
 
 
+def run_ranking_batch(
+    query_reqs: List[QueryRequirements],
+    top_k: Optional[int] = None,
+) -> List[Tuple[list[RankedCandidate], QueryRequirements]]:
+    """
+    Ranking de muchas vacantes a la vez (p.ej. el matching nocturno).
+    Todas las consultas se codifican en un solo lote y se puntúan contra el
+    corpus con un producto matriz-matriz, en vez de un encode + GEMV por consulta.
+
+    ``top_k`` aplica a todas las consultas; si es None se usa el
+    ``num_candidates`` de cada una (o DEFAULT_TOP_N).
+    Devuelve una tupla (candidatos, query) por consulta, en el mismo orden.
+    """
+    orchestrator = _get_orchestrator()
+    ks = [
+        k if k is not None else DEFAULT_TOP_N
+        for k in (top_k if top_k is not None else q.num_candidates for q in query_reqs)
+    ]
+    # Un único lote; cada consulta se corta con su propio k (con la fusión
+    # RRF el top-k no es un prefijo del top de un k mayor)
+    ranked_lists = orchestrator.run_ranking_batch(
+        [q.to_ranking_requirements() for q in query_reqs],
+        num_candidates=ks,
+    )
+    return list(zip(ranked_lists, query_reqs))
+
+
+def reload_corpus(force: bool = True) -> dict:
+    """
+    Recarga el corpus en segundo plano (sin cortar las consultas en curso).
+    Pensada para el endpoint de administración de app.py.
+    """
+    orchestrator = _get_orchestrator()
+    started = orchestrator.reload(force=force)
+    return {
+        "started": started,
+        "reloading": orchestrator.reloading,
+        "candidates": len(orchestrator.engine),
+        "reloads": orchestrator.reloads,
+    }
+
+
+def corpus_version() -> int:
+    """
+    Versión del corpus: cambia con cada recarga y cada alta/baja de candidatos.
+    Sirve para invalidar caches de resultados (ver query_pipeline.py).
+    """
+    return _get_orchestrator().corpus_version
+
+
+def corpus_catalogs() -> CorpusCatalogs:
+    """
+    Catálogos de roles/skills del corpus vigente y sus estructuras compiladas
+    (ver ``register_catalog_compiler``); se renuevan con cada recarga.
+    """
+    return _get_orchestrator().catalogs
+
+
 # --------------------------------------------------------------------------------------
 # MODELO CLÁSICO (EXPERIMENTAL, NO USADO EN PRODUCCIÓN)
 # --------------------------------------------------------------------------------------
@@ -1,33 +1,37 @@
 from __future__ import annotations
 
-import unicodedata
+import threading
+import time
 from dataclasses import asdict
-from typing import List, Optional, Tuple, Dict, Any
+from typing import Callable, List, Optional, Tuple, Dict, Any, Iterable, Union
 
-from .config import DEFAULT_TOP_N
+import numpy as np
+
+from .config import (
+    DEFAULT_TOP_N,
+    CORPUS_RELOAD_INTERVAL_S,
+    BATCH_SCORE_MAX_MB,
+    RRF_K,
+    RRF_DEPTH,
+)
 from .ranking_engine import (
     SemanticRankingEngine,
+    CorpusCatalogs,
+    invalidate_catalog_caches,
     RankingQueryRequirements,
     RankedCandidate,
+    _to_ranked_candidate,
+    top_k_indices,
 )
+from .candidate_table import CandidateTable, normalize_text as _normalize_text
+from .instrumentation import annotate, get_logger, span
+from .lexical_index import reciprocal_rank_fusion
 
 
-# --------- Utilidades de normalización ---------
+logger = get_logger(__name__)
 
 
-def _normalize_text(text: str) -> str:
-    """
-    Minúsculas y sin tildes para comparaciones robustas.
-    """
-    if not text:
-        return ""
-    text = text.lower()
-    text = "".join(
-        c
-        for c in unicodedata.normalize("NFD", text)
-        if unicodedata.category(c) != "Mn"
-    )
-    return text.strip()
+# --------- Utilidades de normalización ---------
 
 
 def _split_role_tokens(role: str) -> List[str]:
@@ -48,73 +52,104 @@ def _is_general_role(role_text: str) -> Tuple[bool, Optional[str]]:
 
 
 # --------- Filtros deterministas ---------
+#
+# Trabajan sobre índices del corpus (np.ndarray) y las columnas de la
+# CandidateTable del motor, de modo que sólo se construyen RankedCandidate
+# para el top final. Rol y ubicación se resuelven a códigos de categoría
+# (índice invertido de tokens de rol) y se propagan a las filas con una
+# tabla booleana por código.
 
 
 def _filter_by_role(
-    candidates: List[RankedCandidate],
+    table: CandidateTable,
+    indices: np.ndarray,
     role_text: Optional[str],
-) -> List[RankedCandidate]:
+) -> np.ndarray:
     """
     Filtro léxico por rol. SOLO se fija en el texto del rol,
-    no en embeddings. La parte semántica ya se hizo antes.
+    no en embeddings. La parte semántica la hace el motor.
 
-    Importante: si no encuentra nada, devuelve [] y la capa superior
-    decide si hace fallback al ranking puramente semántico o no.
+    Importante: si no encuentra nada, devuelve un array vacío y la capa
+    superior decide si hace fallback al ranking puramente semántico o no.
     """
     if not role_text:
-        return candidates
+        return indices
 
     is_general, head = _is_general_role(role_text)
     if head is None:
-        return candidates
+        return indices
 
-    role_norm = _normalize_text(role_text)
-
-    def match_general(c: RankedCandidate) -> bool:
-        # Ej: "ingeniero" -> cualquier rol que contenga token 'ingeniero'
-        return head in _split_role_tokens(c.role)
-
-    def match_specific(c: RankedCandidate) -> bool:
-        # Ej: "ingeniero de mantenimiento" contenido en el rol normalizado
-        return role_norm in _normalize_text(c.role)
+    roles = table.roles
 
     # Caso general: "ingeniero", "tecnico", "programador", etc.
+    # -> cualquier rol que contenga el token (lookup en el índice invertido)
+    head_codes = roles.codes_with_tokens([head])
     if is_general:
-        general_matches = [c for c in candidates if match_general(c)]
-        return general_matches
-
-    # Caso específico: "ingeniero de mantenimiento", "analista de datos"
-    specific_matches = [c for c in candidates if match_specific(c)]
-    if specific_matches:
+        return table.rows_with_roles(head_codes, indices)
+
+    # Caso específico: "ingeniero de mantenimiento" contenido en el rol
+    # normalizado (subcadena: "analista de dat" también vale). Las postings
+    # acotan los roles candidatos y la subcadena se compara sólo en esos.
+    specific_codes = roles.codes_containing(_normalize_text(role_text))
+    specific_matches = table.rows_with_roles(specific_codes, indices)
+    if specific_matches.size:
         return specific_matches
 
     # Fallback: si no hay match específico, intentar al menos por la palabra cabeza
-    general_matches = [c for c in candidates if match_general(c)]
-    return general_matches
+    return table.rows_with_roles(head_codes, indices)
 
 
 def _filter_by_location(
-    candidates: List[RankedCandidate],
+    table: CandidateTable,
+    indices: np.ndarray,
     location: Optional[str],
-) -> List[RankedCandidate]:
+) -> np.ndarray:
     if not location:
-        return candidates
+        return indices
 
-    loc_norm = _normalize_text(location)
-
-    def match(c: RankedCandidate) -> bool:
-        return _normalize_text(c.location) == loc_norm
-
-    return [c for c in candidates if match(c)]
+    codes = table.locations.codes_for_normalized(_normalize_text(location))
+    return table.rows_with_locations(codes, indices)
 
 
 def _filter_by_years_experience(
-    candidates: List[RankedCandidate],
+    table: CandidateTable,
+    indices: np.ndarray,
     min_years: Optional[int],
-) -> List[RankedCandidate]:
+) -> np.ndarray:
     if min_years is None:
-        return candidates
-    return [c for c in candidates if c.years_experience >= min_years]
+        return indices
+    return indices[table.years[indices] >= min_years]
+
+
+def _fuse_rankings(
+    scores: np.ndarray, lexical: np.ndarray, filtered: np.ndarray, top_n: int
+) -> np.ndarray:
+    """
+    Reciprocal Rank Fusion de los rankings semántico y BM25 sobre ``filtered``.
+    Cada ranking se corta a RRF_DEPTH (o top_n si es mayor).
+    """
+    depth = max(top_n, RRF_DEPTH)
+    semantic = top_k_indices(scores, depth, filtered)
+    # BM25 empata a menudo (mismo rol y skills): se desempata por fila para
+    # que el orden no dependa del camino de recuperación
+    lexical_hits = np.sort(filtered[lexical[filtered] > 0])
+    lexical_rank = lexical_hits[np.argsort(-lexical[lexical_hits], kind="stable")][:depth]
+    fused, _ = reciprocal_rank_fusion([semantic, lexical_rank], RRF_K)
+    return fused[:top_n]
+
+
+def _prefilter_indices(
+    table: CandidateTable, req: RankingQueryRequirements
+) -> Optional[np.ndarray]:
+    """
+    Rol -> ubicación -> años sobre todo el corpus. Devuelve None si el rol
+    no tiene ningún match léxico (caso de fallback semántico).
+    """
+    indices = _filter_by_role(table, np.arange(len(table), dtype=np.int64), req.role)
+    if not indices.size:
+        return None
+    indices = _filter_by_location(table, indices, req.location)
+    return _filter_by_years_experience(table, indices, req.years_experience)
 
 
 # --------- API pública del orquestador ---------
@@ -124,8 +159,8 @@ class RankingOrchestrator:
     """
     Punto de entrada para la capa de aplicación.
     Lógica:
-      - llama al motor semántico
-      - aplica filtros deterministas
+      - aplica filtros deterministas (máscaras sobre la tabla columnar)
+      - llama al motor semántico sólo para los candidatos filtrados
       - corta al top_n
 
     Mejora clave:
@@ -136,10 +171,120 @@ class RankingOrchestrator:
              "programador"         -> "desarrollador backend/frontend"
         * Si el mejor score es BAJO -> devolvemos 0 candidatos
           (casos como "peluquero" cuando no hay nada parecido).
+
+    Recarga en caliente:
+      - Si el corpus cambia (``source.version()``, comprobado cada
+        ``reload_interval_s``) o se llama a ``reload(force=True)``, se
+        construye un motor nuevo en un hilo aparte mientras el actual sigue
+        atendiendo consultas.
+      - Las altas/bajas incrementales que llegan durante la construcción se
+        reaplican sobre el motor nuevo antes del cambio. Las anteriores deben
+        estar ya en el origen (CSV/SQLite): el origen manda tras una recarga.
+      - El cambio es una asignación de atributo (atómica): cada consulta usa
+        el motor que había al empezar. Los catálogos (roles/skills y sus
+        matchers, ``catalogs``) se construyen en el mismo hilo de recarga a
+        partir de la tabla nueva y se cambian junto con el motor.
+      - ``corpus_version`` aumenta con cada recarga y cada alta/baja: sirve de
+        clave para caches de resultados por encima del orquestador.
     """
 
-    def __init__(self) -> None:
-        self._engine = SemanticRankingEngine()
+    def __init__(
+        self,
+        reload_interval_s: float = CORPUS_RELOAD_INTERVAL_S,
+        engine_factory: Callable[..., SemanticRankingEngine] = SemanticRankingEngine,
+    ) -> None:
+        # ``engine_factory(source=...)`` construye también los motores de cada recarga
+        self._engine_factory = engine_factory
+        self._engine = engine_factory()
+        self._catalogs = CorpusCatalogs(self._engine.table)
+        self._reload_lock = threading.Lock()  # una sola recarga a la vez
+        self._ops_lock = threading.Lock()  # altas/bajas vs. cambio de motor
+        self._pending_ops: Optional[List[Tuple[str, List[Any]]]] = None
+        self.reloads = 0
+        self.corpus_version = 0
+        self._stop = threading.Event()
+        if reload_interval_s > 0:
+            threading.Thread(
+                target=self._watch, args=(reload_interval_s,), name="corpus-watcher", daemon=True
+            ).start()
+
+    @property
+    def engine(self) -> SemanticRankingEngine:
+        return self._engine
+
+    @property
+    def catalogs(self) -> CorpusCatalogs:
+        return self._catalogs
+
+    # --------- Recarga en caliente del corpus ---------
+
+    def corpus_changed(self) -> bool:
+        engine = self._engine
+        try:
+            return engine.source.version() != engine.source_version
+        except Exception as e:
+            print(f"[WARN] No se pudo comprobar la versión del corpus: {e}")
+            return False
+
+    def reload(self, force: bool = False, wait: bool = False) -> bool:
+        """
+        Lanza la reconstrucción del motor en segundo plano.
+        Devuelve False si no hay cambios (y no se fuerza) o si ya hay una en curso.
+        """
+        if not force and not self.corpus_changed():
+            return False
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        with self._ops_lock:
+            self._pending_ops = []
+        thread = threading.Thread(target=self._rebuild, name="corpus-reload", daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+        return True
+
+    @property
+    def reloading(self) -> bool:
+        return self._reload_lock.locked()
+
+    def _rebuild(self) -> None:
+        start = time.perf_counter()
+        try:
+            # Store nuevo: el del motor actual lo siguen usando las consultas en curso
+            new_engine = self._engine_factory(source=self._engine.source)
+            # Catálogos y matchers del corpus nuevo, fuera del camino de las consultas
+            new_catalogs = CorpusCatalogs(new_engine.table)
+            with self._ops_lock:
+                for op, payload in self._pending_ops or []:
+                    try:
+                        getattr(new_engine, op)(payload)
+                    except Exception as e:
+                        # Una operación inválida no debe tumbar la recarga
+                        print(f"[WARN] No se pudo reaplicar '{op}' tras la recarga: {e}")
+                self._engine = new_engine
+                self._catalogs = new_catalogs
+                self._pending_ops = None
+                self.corpus_version += 1
+            invalidate_catalog_caches()
+            self.reloads += 1
+            print(
+                f"[INFO] Corpus recargado: {len(new_engine)} candidatos "
+                f"en {time.perf_counter() - start:.1f}s."
+            )
+        except Exception as e:
+            with self._ops_lock:
+                self._pending_ops = None
+            print(f"[WARN] Falló la recarga del corpus; se mantiene el motor actual: {e}")
+        finally:
+            self._reload_lock.release()
+
+    def _watch(self, interval_s: float) -> None:
+        while not self._stop.wait(interval_s):
+            if self.corpus_changed():
+                self.reload()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
 
     def run_ranking(
         self,
@@ -148,59 +293,164 @@ class RankingOrchestrator:
     ) -> List[RankedCandidate]:
         """
         Ejecuta ranking completo:
-          - ranking semántico (embeddings)
           - filtro por rol general/específico (léxico)
           - filtro por ubicación
           - filtro por años de experiencia
+          - ranking semántico (embeddings) sólo de los que pasan los filtros
           - limitación a N resultados
         """
-        # 0) Ranking semántico base
-        all_ranked = self._engine.run_ranking(req)
-        if not all_ranked:
-            return []
-
-        # 1) Filtro por rol (léxico)
-        filtered = _filter_by_role(all_ranked, req.role)
+        # 0) Filtros deterministas ANTES del producto escalar: rol, ubicación
+        #    y años se evalúan como máscaras sobre las columnas de la tabla,
+        #    y el motor sólo puntúa las filas que los cumplen.
+        role_matched = True
+
+        def prefilter(table: CandidateTable) -> Optional[np.ndarray]:
+            nonlocal role_matched
+            indices = _prefilter_indices(table, req)
+            # Sin match léxico (None): hace falta el score de todo el corpus
+            # para decidir el fallback semántico
+            role_matched = indices is not None
+            return indices
+
+        scores, table, filtered, lexical = self._engine.score_candidates(req, prefilter=prefilter)
+        with span("filter"):
+            return self._select(
+                req, scores, table, filtered, role_matched, num_candidates, lexical
+            )
 
-        # --- Fallback semántico cuando el filtro léxico mata todo ---
-        if not filtered:
-            best_score = all_ranked[0].score
-            print(
-                f"[INFO] Sin match léxico para rol {req.role!r}. "
-                f"Mejor score semántico: {best_score:.3f}"
+    def run_ranking_batch(
+        self,
+        reqs: List[RankingQueryRequirements],
+        num_candidates: Union[Optional[int], List[Optional[int]]] = None,
+    ) -> List[List[RankedCandidate]]:
+        """
+        Ranking de muchas consultas a la vez (procesos batch). Las consultas se
+        codifican juntas y se puntúan con un producto matriz-matriz por bloque
+        (bloques acotados a BATCH_SCORE_MAX_MB de scores). Cada una pasa por los
+        mismos filtros (antes de la recuperación) y fallback que ``run_ranking``,
+        así que el resultado coincide con el de una consulta suelta.
+        ``num_candidates`` puede ser uno para todas o una lista (uno por
+        consulta): con la fusión RRF el top-k de una consulta no es un prefijo
+        del de un k mayor, así que cada una se corta con su propio k.
+        Devuelve una lista de resultados por consulta, en el mismo orden.
+        """
+        if not isinstance(num_candidates, list):
+            num_candidates = [num_candidates] * len(reqs)
+        engine = self._engine
+        n = max(len(engine), 1)
+        block = max(1, int(BATCH_SCORE_MAX_MB * 1024 * 1024) // (4 * n))
+
+        results: List[List[RankedCandidate]] = []
+        for start in range(0, len(reqs), block):
+            block_reqs = reqs[start:start + block]
+            # Mismos filtros que run_ranking, evaluados antes de la recuperación
+            role_matched = [True] * len(block_reqs)
+
+            def prefilter_for(j: int, req: RankingQueryRequirements):
+                def prefilter(table: CandidateTable) -> Optional[np.ndarray]:
+                    indices = _prefilter_indices(table, req)
+                    role_matched[j] = indices is not None
+                    return indices
+                return prefilter
+
+            scores, table, retrieved, lexical = engine.score_candidates_batch(
+                block_reqs, [prefilter_for(j, req) for j, req in enumerate(block_reqs)]
             )
+            with span("filter"):
+                for j, (req, row_scores, ids, row_lexical) in enumerate(
+                    zip(block_reqs, scores, retrieved, lexical)
+                ):
+                    results.append(
+                        self._select(
+                            req, row_scores, table, ids, role_matched[j],
+                            num_candidates[start + j], row_lexical,
+                        )
+                    )
+        return results
+
+    def _select(
+        self,
+        req: RankingQueryRequirements,
+        scores: np.ndarray,
+        table: CandidateTable,
+        filtered: np.ndarray,
+        role_matched: bool,
+        num_candidates: Optional[int],
+        lexical: Optional[np.ndarray] = None,
+    ) -> List[RankedCandidate]:
+        """
+        Fallback semántico (si el rol no tuvo match léxico), top-N y
+        materialización de los candidatos devueltos.
+        Con ``lexical`` (recuperación híbrida) el orden final es la fusión RRF
+        del ranking semántico y el BM25; el score mostrado sigue siendo el coseno.
+        """
+        # --- Fallback semántico cuando el filtro léxico mata todo ---
+        if not role_matched:
+            if not filtered.size:
+                return []
+            best_score = float(scores[filtered].max())
 
             # Umbral mínimo para considerar que el modelo encontró algo razonable
             SEMANTIC_MIN_FOR_FALLBACK = 0.40
 
-            if best_score >= SEMANTIC_MIN_FOR_FALLBACK:
-                # Devolvemos el ranking semántico completo sin filtrar por rol,
-                # para permitir sinónimos y abreviaciones.
-                print(
-                    "[INFO] Usando fallback semántico: se ignora filtro por rol "
-                    "y se usan los candidatos ordenados solo por embeddings."
-                )
-                filtered = all_ranked.copy()
-            else:
+            fallback = best_score >= SEMANTIC_MIN_FOR_FALLBACK
+            annotate(role_matched=False, best_semantic=round(best_score, 3), fallback=fallback)
+            logger.debug(
+                "Sin match léxico para rol %r. Mejor score semántico: %.3f. Fallback semántico: %s",
+                req.role,
+                best_score,
+                fallback,
+            )
+            if not fallback:
                 # No hay nada semánticamente cercano: no sugerimos nada.
-                print(
-                    "[INFO] Score semántico insuficiente; no hay candidatos "
-                    "relacionados con el rol solicitado."
-                )
                 return []
+            # Fallback: ranking semántico completo sin filtrar por rol,
+            # para permitir sinónimos y abreviaciones.
 
-        # 2) Filtro por ubicación
-        filtered = _filter_by_location(filtered, req.location)
-
-        # 3) Filtro por años de experiencia
-        filtered = _filter_by_years_experience(filtered, req.years_experience)
+            # Ubicación y años sobre el ranking semántico completo
+            filtered = _filter_by_location(table, filtered, req.location)
+            filtered = _filter_by_years_experience(table, filtered, req.years_experience)
 
-        if not filtered:
+        if not filtered.size:
             return []
 
-        # 4) Limitación
+        # Top-N por selección parcial y materialización sólo de esos
         top_n = num_candidates if num_candidates is not None else DEFAULT_TOP_N
-        return filtered[:top_n]
+        if lexical is None:
+            order = top_k_indices(scores, top_n, filtered)
+        else:
+            order = _fuse_rankings(scores, lexical, filtered, top_n)
+        return [_to_ranked_candidate(table, int(i), scores[int(i)]) for i in order]
+
+    # --------- Actualización incremental del corpus ---------
+
+    def upsert_candidates(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """
+        Añade o actualiza candidatos (p.ej. CVs subidos o resultados del scraper)
+        sin reconstruir el motor. Quedan disponibles para la siguiente consulta.
+        """
+        rows = list(rows)
+        with self._ops_lock:
+            changed = self._engine.upsert_candidates(rows)
+            # Sólo se reaplica en la recarga lo que el motor aceptó
+            if self._pending_ops is not None:
+                self._pending_ops.append(("upsert_candidates", rows))
+            if changed:
+                self.corpus_version += 1
+            return changed
+
+    def remove_candidates(self, ids: Iterable[str]) -> int:
+        """
+        Elimina candidatos del ranking por 'id'.
+        """
+        ids = list(ids)
+        with self._ops_lock:
+            removed = self._engine.remove_candidates(ids)
+            if self._pending_ops is not None:
+                self._pending_ops.append(("remove_candidates", ids))
+            if removed:
+                self.corpus_version += 1
+            return removed
 
     # Helper opcional para devolver dicts listos para JSON
     def run_ranking_as_dicts(
@@ -0,0 +1,35 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+from ranking_model.src import embeddings
+
+
+class FakeSentenceModel:
+    """
+    Codificador determinista (bolsa de palabras con hashing) para no cargar
+    el sentence-transformer en los tests. Cuenta los textos codificados.
+    """
+
+    dim = 64
+
+    def __init__(self) -> None:
+        self.encoded = 0
+
+    def encode(self, texts, **kwargs) -> np.ndarray:
+        self.encoded += len(texts)
+        out = np.full((len(texts), self.dim), 0.01, dtype="float32")
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                h = int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16)
+                out[i, h % self.dim] += 1.0
+                out[i, (h >> 8) % self.dim] += 0.5
+        return out
+
+
+@pytest.fixture
+def fake_model(monkeypatch) -> FakeSentenceModel:
+    model = FakeSentenceModel()
+    monkeypatch.setattr(embeddings, "_get_model", lambda: model)
+    return model
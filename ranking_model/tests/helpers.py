@@ -0,0 +1,51 @@
+"""
+Utilidades compartidas por los tests del ranking (corpus sintético y CSV).
+Se importan como ``ranking_model.tests.helpers``, igual que el código de ``src``.
+"""
+import csv
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from ranking_model.src.candidate_source import CANDIDATE_COLUMNS
+
+
+ROLES = [
+    "ingeniero de mantenimiento",
+    "ingeniero de sistemas",
+    "analista de datos",
+    "desarrollador backend",
+    "tecnico electricista",
+    "soldador",
+    "contador",
+]
+CITIES = ["Cartagena", "Bogotá", "Medellín", "Cali", "Pasto"]
+SKILLS = ["python", "sql", "excel", "soldadura", "mantenimiento preventivo", "sap pm", "java"]
+
+
+def make_rows(n: int, seed: int = 0) -> List[Dict[str, str]]:
+    """Corpus sintético con la forma de candidates.csv."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n):
+        skills = rng.choice(SKILLS, size=3, replace=False)
+        rows.append(
+            {
+                "id": f"T{i:05d}",
+                "role": ROLES[int(rng.integers(len(ROLES)))],
+                "skills": ";".join(skills),
+                "location": CITIES[int(rng.integers(len(CITIES)))],
+                "years_experience": str(int(rng.integers(0, 11))),
+                "languages": "inglés" if i % 2 else "",
+            }
+        )
+    return rows
+
+
+def write_csv(path: Path, rows: List[Dict[str, str]]) -> Path:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CANDIDATE_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
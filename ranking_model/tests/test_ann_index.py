@@ -0,0 +1,48 @@
+import numpy as np
+
+from ranking_model.src.ann_index import IVFIndex
+from ranking_model.src.embeddings import normalize_rows
+
+
+def _corpus(n: int = 5000, dim: int = 32, seed: int = 0) -> np.ndarray:
+    # Embeddings agrupados (como roles/skills parecidos), no ruido uniforme
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((50, dim))
+    return normalize_rows(centers[rng.integers(50, size=n)] + 0.3 * rng.standard_normal((n, dim)))
+
+
+def test_ivf_con_subconjunto_devuelve_k_filas_del_subconjunto():
+    """Con un filtro selectivo el IVF amplía las listas hasta reunir k filas filtradas."""
+
+    vectors = _corpus()
+    index = IVFIndex(nprobe=1)
+    index.build(vectors)
+
+    rng = np.random.default_rng(1)
+    subset = np.zeros(len(vectors), dtype=bool)
+    subset[rng.choice(len(vectors), size=200, replace=False)] = True
+    query = vectors[0]
+
+    ids, sims = index.search(query, 50, lambda rows: vectors[rows] @ query, subset=subset)
+    assert ids.size == 50
+    assert subset[ids].all()
+    np.testing.assert_allclose(sims, vectors[ids] @ query, rtol=1e-5)
+    assert (np.diff(sims) <= 1e-6).all()
+
+
+def test_ivf_con_subconjunto_recall_frente_a_busqueda_exacta():
+    vectors = _corpus()
+    index = IVFIndex(nprobe=8)
+    index.build(vectors)
+
+    rng = np.random.default_rng(2)
+    subset = np.zeros(len(vectors), dtype=bool)
+    subset[rng.choice(len(vectors), size=1000, replace=False)] = True
+    rows = np.flatnonzero(subset)
+
+    recalls = []
+    for query in vectors[rng.choice(len(vectors), size=20, replace=False)]:
+        exact = set(rows[np.argsort(-(vectors[rows] @ query))[:10]].tolist())
+        ids, _ = index.search(query, 100, lambda r: vectors[r] @ query, subset=subset)
+        recalls.append(len(exact & set(ids[:10].tolist())) / 10)
+    assert np.mean(recalls) >= 0.8
@@ -0,0 +1,98 @@
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from ranking_model.src.candidate_source import CsvCandidateSource, SQLiteCandidateSource
+from ranking_model.tests.helpers import make_rows, write_csv
+
+
+def _create_db(path: Path, rows: List[Dict[str, str]]) -> Path:
+    """Tabla ``candidatos`` como la del scraper (listas separadas por comas)."""
+    with closing(sqlite3.connect(str(path))) as conn:
+        conn.execute(
+            "CREATE TABLE candidatos (nombre TEXT, cargo TEXT, habilidades TEXT, "
+            "experiencia_anios INTEGER, idiomas TEXT, ubicacion TEXT, modalidad TEXT, disponibilidad TEXT)"
+        )
+        conn.executemany(
+            "INSERT INTO candidatos VALUES (?, ?, ?, ?, ?, ?, 'remoto', 'inmediata')",
+            [
+                (
+                    f"Nombre {i}",
+                    f" {r['role']} ",
+                    ", ".join(r["skills"].split(";")),
+                    int(r["years_experience"]),
+                    r["languages"],
+                    r["location"],
+                )
+                for i, r in enumerate(rows)
+            ],
+        )
+        conn.commit()
+    return path
+
+
+def _delete_rowids(path: Path, rowids: List[int]) -> None:
+    with closing(sqlite3.connect(str(path))) as conn:
+        conn.executemany("DELETE FROM candidatos WHERE rowid = ?", [(r,) for r in rowids])
+        conn.commit()
+
+
+def _read(source, **kwargs) -> Tuple[List[Dict[str, Any]], List[int]]:
+    chunks = list(source.iter_chunks(**kwargs))
+    return [row for chunk in chunks for row in chunk], [len(chunk) for chunk in chunks]
+
+
+def test_sqlite_entrega_las_mismas_filas_que_el_csv(tmp_path):
+    """Mapeo de columnas, listas con ';', rowid como id y paginación por bloques."""
+
+    rows = make_rows(23)
+    db = _create_db(tmp_path / "candidatos.db", rows)
+    # Huecos de rowid: la paginación por keyset no depende de que sean contiguos
+    deleted = [3, 10, 11]
+    _delete_rowids(db, deleted)
+
+    source = SQLiteCandidateSource(db)
+    got, sizes = _read(source, chunk_size=5)
+    assert sizes == [5, 5, 5, 5]
+
+    expected_rows = [
+        dict(r, id=str(rowid)) for rowid, r in enumerate(rows, start=1) if rowid not in deleted
+    ]
+    csv_rows, _ = _read(CsvCandidateSource(write_csv(tmp_path / "candidatos.csv", expected_rows)), chunk_size=5)
+    assert got == csv_rows
+    assert got[0]["skills"] == rows[0]["skills"]
+    assert got[0]["role"] == rows[0]["role"]
+
+
+def test_sqlite_filtra_en_la_base_de_datos(tmp_path):
+    rows = make_rows(40, seed=3)
+    source = SQLiteCandidateSource(_create_db(tmp_path / "candidatos.db", rows))
+
+    got, _ = _read(source, chunk_size=4, location="cali", min_years=5)
+    expected = [
+        str(i) for i, r in enumerate(rows, start=1)
+        if r["location"] == "Cali" and int(r["years_experience"]) >= 5
+    ]
+    assert [r["id"] for r in got] == expected
+
+
+def test_sqlite_version_detecta_cambios(tmp_path):
+    db = _create_db(tmp_path / "candidatos.db", make_rows(10))
+    source = SQLiteCandidateSource(db)
+    before = source.version()
+    assert source.version() == before
+    _read(source, chunk_size=3)
+    assert source.version() == before
+
+    with closing(sqlite3.connect(str(db))) as conn:
+        conn.execute(
+            "INSERT INTO candidatos (nombre, cargo, habilidades) VALUES (?, ?, ?)",
+            ("Nuevo", "soldador", "python, sql"),
+        )
+        conn.commit()
+    after_insert = source.version()
+    assert after_insert != before
+
+    _delete_rowids(db, [1])
+    assert source.version() != after_insert
@@ -0,0 +1,130 @@
+import numpy as np
+
+from ranking_model.src.embedding_store import EmbeddingStore
+
+
+def _generations(store: EmbeddingStore):
+    return sorted(
+        int(p.name.split(".")[1]) for p in store.directory.glob("vectors.*.npy")
+        if p.name.split(".")[1].isdigit()
+    )
+
+
+def test_reutiliza_embeddings_entre_reinicios(tmp_path, fake_model):
+    """Un segundo arranque no vuelve a codificar textos ya guardados."""
+
+    texts = ["Rol: soldador", "Rol: contador", "Rol: analista de datos"]
+    store = EmbeddingStore(cache_dir=tmp_path)
+    first = store.embed(texts)
+    store.save()
+    assert fake_model.encoded == 3
+
+    reopened = EmbeddingStore(cache_dir=tmp_path)
+    again = reopened.embed(texts + ["Rol: enfermero"])
+    assert fake_model.encoded == 4
+    np.testing.assert_allclose(again[:3], first)
+    np.testing.assert_allclose(np.linalg.norm(again, axis=1), 1.0, rtol=1e-5)
+
+
+def test_save_conserva_la_generacion_reemplazada(tmp_path, fake_model):
+    """Sólo se borran generaciones anteriores a la que se reemplaza."""
+
+    store = EmbeddingStore(cache_dir=tmp_path)
+    for i in range(4):
+        store.embed([f"texto {i}"])
+        store.save()
+    gens = _generations(store)
+    assert len(gens) == 2
+    assert gens[-1] == store.generation
+
+
+def test_save_no_borra_la_generacion_de_otro_worker(tmp_path, fake_model):
+    """Un worker que abrió una generación la sigue pudiendo leer tras el save de otro."""
+
+    a = EmbeddingStore(cache_dir=tmp_path)
+    a.embed(["texto a"])
+    a.save()
+
+    b = EmbeddingStore(cache_dir=tmp_path)
+    b.embed(["texto b"])
+    b.save()
+    b_generation = b.generation
+
+    # ``a`` publica encima de la generación de ``b``: la de ``b`` se conserva
+    a.embed(["texto c"])
+    a.save()
+    assert b_generation in _generations(a)
+    assert EmbeddingStore(cache_dir=tmp_path).keys() == a.keys()
+    assert b.get_many(b.keys()).shape == (2, fake_model.dim)
+
+
+def test_pendientes_se_conservan_si_falla_la_recarga(tmp_path, fake_model, monkeypatch):
+    """Si la generación recién publicada no se puede abrir, los vectores siguen en memoria."""
+
+    store = EmbeddingStore(cache_dir=tmp_path)
+    keys = store.ensure(["texto 1", "texto 2"])
+    monkeypatch.setattr(store, "_open", lambda generation: False)
+    store.save()
+
+    assert store.pending_count == 2
+    assert store.get_many(keys).shape == (2, fake_model.dim)
+
+
+def test_checkpoint_escribe_solo_los_vectores_pendientes(tmp_path, fake_model):
+    """Cada checkpoint añade un segmento con lo pendiente; save compacta al final."""
+
+    store = EmbeddingStore(cache_dir=tmp_path)
+    batches = [[f"texto {b}-{i}" for i in range(10)] for b in range(3)]
+    for texts in batches:
+        store.ensure(texts)
+        store.checkpoint()
+        assert store.pending_count == 0
+
+    files = [store.generation] + store.segments
+    assert len(files) == 3
+    assert [len(np.load(store.directory / f"keys.{f}.npy")) for f in files] == [10, 10, 10]
+
+    # Un arranque interrumpido retoma desde los segmentos sin recodificar
+    resumed = EmbeddingStore(cache_dir=tmp_path)
+    all_texts = [t for texts in batches for t in texts]
+    np.testing.assert_allclose(resumed.embed(all_texts), store.embed(all_texts))
+    assert fake_model.encoded == 30
+
+    resumed.save()
+    assert resumed.segments == []
+    assert len(np.load(resumed.directory / f"keys.{resumed.generation}.npy")) == 30
+    assert EmbeddingStore(cache_dir=tmp_path).keys() == resumed.keys()
+
+
+def test_carga_por_bloques_no_reescribe_el_cache_en_cada_checkpoint(tmp_path, fake_model, monkeypatch):
+    """La E/S de una carga en streaming es O(n): segmentos + una compactación."""
+
+    from ranking_model.src import ranking_engine
+    from ranking_model.src.candidate_source import CsvCandidateSource
+    from ranking_model.tests.helpers import make_rows, write_csv
+
+    written = []
+    original = EmbeddingStore._write_file
+
+    def spy(self, keys, *args, **kwargs):
+        written.append(len(keys))
+        return original(self, keys, *args, **kwargs)
+
+    monkeypatch.setattr(EmbeddingStore, "_write_file", spy)
+    monkeypatch.setattr(ranking_engine, "EMBED_CHECKPOINT_ROWS", 50)
+
+    ranking_engine.SemanticRankingEngine(
+        store=EmbeddingStore(cache_dir=tmp_path / "cache"),
+        source=CsvCandidateSource(write_csv(tmp_path / "c.csv", make_rows(1000))),
+        ann_index_type=None,
+        quantization=None,
+        mmap_embeddings=False,
+        field_weights=None,
+        hybrid=False,
+        corpus_chunk_size=50,
+    )
+    # Checkpoints: sólo los vectores de cada bloque; al final, una compactación
+    *checkpoints, compaction = written
+    assert len(checkpoints) >= 10
+    assert max(checkpoints) < 100
+    assert 0 <= compaction - sum(checkpoints) < 50
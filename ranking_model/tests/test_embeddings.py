@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from ranking_model.src import embeddings
+from ranking_model.src.embeddings import QueryEmbeddingCache
+
+
+def _vec(value: float, dim: int = 4) -> np.ndarray:
+    return np.full(dim, value, dtype="float32")
+
+
+def test_cache_de_consultas_expulsa_por_numero_de_entradas():
+    cache = QueryEmbeddingCache(max_entries=2, max_bytes=1 << 20)
+    cache.put("a", _vec(1))
+    cache.put("b", _vec(2))
+    assert cache.get("a") is not None  # "a" pasa a ser la más reciente
+    cache.put("c", _vec(3))
+
+    assert cache.get("b") is None
+    assert cache.get("a")[0] == 1 and cache.get("c")[0] == 3
+    assert cache.stats()["entries"] == 2
+
+
+def test_cache_de_consultas_expulsa_por_memoria():
+    vec_bytes = _vec(0).nbytes
+    cache = QueryEmbeddingCache(max_entries=100, max_bytes=3 * vec_bytes)
+    for i in range(5):
+        cache.put(str(i), _vec(i))
+
+    stats = cache.stats()
+    assert stats["entries"] == 3 and stats["bytes"] == 3 * vec_bytes
+    assert [cache.get(str(i)) is None for i in range(5)] == [True, True, False, False, False]
+
+    # Reemplazar una entrada no cuenta su tamaño dos veces
+    cache.put("4", _vec(9))
+    assert cache.stats()["bytes"] == 3 * vec_bytes
+    # Un vector mayor que todo el presupuesto no se guarda (ni expulsa nada)
+    cache.put("grande", _vec(1, dim=64))
+    assert cache.get("grande") is None and cache.stats()["entries"] == 3
+
+
+def test_cache_de_consultas_cuenta_aciertos_y_fallos():
+    cache = QueryEmbeddingCache(max_entries=4, max_bytes=1 << 20)
+    assert cache.get("x") is None
+    cache.put("x", _vec(1))
+    cache.get("x")
+    cache.get("x")
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+    cache.clear()
+    assert cache.stats() == {"entries": 0, "bytes": 0, "hits": 0, "misses": 0, "hit_rate": 0.0}
+
+
+def test_cache_de_consultas_no_se_puede_modificar_desde_fuera():
+    cache = QueryEmbeddingCache(max_entries=4, max_bytes=1 << 20)
+    original = _vec(1)
+    cache.put("x", original)
+    original[:] = 5  # el llamador sigue siendo dueño de su array
+
+    cached = cache.get("x")
+    assert cached[0] == 1
+    with pytest.raises(ValueError):
+        cached[0] = 7
+    assert cache.get("x")[0] == 1
+
+
+def test_get_query_embedding_devuelve_vectores_de_solo_lectura(fake_model, monkeypatch):
+    monkeypatch.setattr(embeddings, "_query_cache", QueryEmbeddingCache(max_entries=8, max_bytes=1 << 20))
+    first = embeddings.get_query_embedding("ingeniero de mantenimiento")
+    with pytest.raises(ValueError):
+        first[0] = 100.0
+
+    batch = embeddings.get_query_embeddings(["ingeniero de mantenimiento", "soldador"])
+    batch[0, 0] = 100.0  # el lote es una copia: no toca el cache
+    again = embeddings.get_query_embedding("ingeniero de mantenimiento")
+    assert np.array_equal(again, first)
+    assert fake_model.encoded == 2
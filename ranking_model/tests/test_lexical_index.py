@@ -0,0 +1,58 @@
+from typing import Dict, List
+
+import numpy as np
+
+from ranking_model.src.lexical_index import BM25Index, candidate_tokens
+
+from ranking_model.tests.helpers import make_rows
+
+
+def _docs(rows: List[Dict[str, str]]) -> List[List[str]]:
+    return [candidate_tokens(r["role"], r["skills"].split(";")) for r in rows]
+
+
+def _search(index: BM25Index, row_ids: List[str], tokens: List[str]) -> Dict[str, float]:
+    rows, scores = index.search(tokens)
+    return {row_ids[r]: round(float(s), 5) for r, s in zip(rows.tolist(), scores.tolist())}
+
+
+def test_bajas_y_actualizaciones_equivalen_a_reconstruir():
+    """Tras altas, bajas y upserts (baja + alta) el IDF y la longitud media son los del corpus vivo."""
+
+    rows = make_rows(300)
+    index = BM25Index()
+    index.build(_docs(rows))
+    row_ids = [r["id"] for r in rows]
+
+    # Bajas: swap-remove como el motor (la última fila ocupa el hueco)
+    for victim in range(0, 60, 3):
+        last = len(row_ids) - 1
+        index.remove(victim)
+        if victim != last:
+            index.move(last, victim)
+            row_ids[victim] = row_ids[last]
+        row_ids.pop()
+
+    # Upserts: el documento se sustituye en su misma fila
+    by_id = {r["id"]: r for r in rows}
+    for row, new in zip(range(10, 50), make_rows(40, seed=7)):
+        index.remove(row)
+        index.add(row, _docs([new])[0])
+        by_id[row_ids[row]] = new
+
+    # Altas
+    for new in make_rows(25, seed=11):
+        new = dict(new, id=new["id"] + "-nuevo")
+        index.add(len(row_ids), _docs([new])[0])
+        row_ids.append(new["id"])
+        by_id[new["id"]] = new
+
+    rebuilt = BM25Index()
+    rebuilt.build(_docs([by_id[cid] for cid in row_ids]))
+    for term, tid in rebuilt._vocab.items():
+        assert index._df[index._vocab[term]] == rebuilt._df[tid], term
+    assert abs(index._total_len - rebuilt._total_len) < 1e-6
+
+    for tokens in (["ingeniero", "python"], ["analista", "datos", "sql"], ["soldadura"], ["sap", "pm"]):
+        got = _search(index, row_ids, tokens)
+        assert got == _search(rebuilt, row_ids, tokens), tokens
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from ranking_model.src import onnx_backend
+from ranking_model.src.config import ONNX_MODEL_DIR, ONNX_QUANTIZE, SENTENCE_TRANSFORMER_MODEL_NAME
+from ranking_model.src.onnx_backend import (
+    ENCODER_CONFIG_FILENAME,
+    FP32_FILENAME,
+    OnnxSentenceEncoder,
+    build_arg_parser,
+)
+
+PARITY_TEXTS = [
+    "Capitán de barco con experiencia en navegación internacional",
+    "Ingeniero de máquinas, inglés avanzado, Cartagena",
+    "Marine engineer with STCW certification",
+]
+
+
+def test_cli_de_exportacion_usa_la_config_del_runtime():
+    args = build_arg_parser().parse_args([])
+    assert args.model == SENTENCE_TRANSFORMER_MODEL_NAME
+    assert args.output_dir == ONNX_MODEL_DIR
+    assert args.quantize == ONNX_QUANTIZE
+    assert build_arg_parser().parse_args(["--no-quantize"]).quantize is False
+
+
+def test_encoder_rechaza_un_grafo_exportado_de_otro_modelo(tmp_path):
+    (tmp_path / FP32_FILENAME).write_bytes(b"")
+    with open(tmp_path / ENCODER_CONFIG_FILENAME, "w", encoding="utf-8") as f:
+        json.dump({"model_name": "otro/modelo", "quantized": False}, f)
+    with pytest.raises(ValueError, match="otro/modelo"):
+        OnnxSentenceEncoder(tmp_path, quantized=False)
+
+
+@pytest.fixture(scope="module")
+def exported_dir(tmp_path_factory):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    pytest.importorskip("sentence_transformers")
+    out = tmp_path_factory.mktemp("onnx")
+    onnx_backend.export_onnx_model(output_dir=out, quantize=True)
+    return out
+
+
+@pytest.mark.parametrize("quantized, min_cosine", [(False, 0.999), (True, 0.98)])
+def test_onnx_coincide_con_sentence_transformers(exported_dir, quantized, min_cosine):
+    report = onnx_backend.check_onnx_parity(PARITY_TEXTS, model_dir=exported_dir, quantized=quantized)
+    assert report["min_cosine"] >= min_cosine
@@ -0,0 +1,90 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Sequence
+
+import numpy as np
+
+from ranking_model.src.query_batcher import QueryBatcher
+
+
+class RecordingEncoder:
+    """Codificador de prueba: el vector de un texto es [len(texto), nº de lote]."""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.calls: List[List[str]] = []
+        self.fail = fail
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        self.calls.append(list(texts))
+        if self.fail:
+            raise RuntimeError("fallo del modelo")
+        return np.array([[len(t), len(self.calls)] for t in texts], dtype="float32")
+
+
+def _encode_concurrently(batcher: QueryBatcher, texts: List[str]):
+    start = threading.Barrier(len(texts))
+
+    def call(text):
+        start.wait()
+        return batcher.encode(text, timeout=5)
+
+    with ThreadPoolExecutor(max_workers=len(texts)) as pool:
+        futures = [pool.submit(call, t) for t in texts]
+        return [f.result(timeout=10) for f in futures]
+
+
+def test_llamadas_concurrentes_comparten_un_encode():
+    encoder = RecordingEncoder()
+    batcher = QueryBatcher(encoder, max_batch=32, max_wait_ms=300)
+    texts = ["a", "bb", "ccc", "bb", "dddd"]
+
+    vectors = _encode_concurrently(batcher, texts)
+
+    assert len(encoder.calls) == 1
+    assert sorted(encoder.calls[0]) == ["a", "bb", "ccc", "dddd"]  # repetidos una vez
+    # Cada llamador recibe la fila de su texto, y un array propio
+    assert [v[0] for v in vectors] == [1, 2, 3, 2, 4]
+    assert vectors[1] is not vectors[3]
+    assert batcher.stats()["batches"] == 1 and batcher.stats()["items"] == 5
+
+
+def test_error_del_encode_llega_a_todos_los_llamadores():
+    batcher = QueryBatcher(RecordingEncoder(fail=True), max_batch=32, max_wait_ms=100)
+    errors = []
+
+    def call(text):
+        try:
+            batcher.encode(text, timeout=5)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call, args=(t,)) for t in ("a", "b", "c")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+    assert len(errors) == 3
+
+    # El hilo del batcher sigue vivo tras el error
+    batcher._encode_fn = RecordingEncoder()
+    assert batcher.encode("otra", timeout=5)[0] == 4
+
+
+def test_lote_lleno_se_envia_sin_esperar_la_ventana():
+    encoder = RecordingEncoder()
+    batcher = QueryBatcher(encoder, max_batch=3, max_wait_ms=10_000)
+
+    start = time.monotonic()
+    vectors = _encode_concurrently(batcher, ["a", "bb", "ccc"])
+
+    assert time.monotonic() - start < 5
+    assert [v[0] for v in vectors] == [1, 2, 3]
+    assert len(encoder.calls) == 1
+
+
+def test_consulta_suelta_espera_como_mucho_la_ventana():
+    batcher = QueryBatcher(RecordingEncoder(), max_batch=32, max_wait_ms=20)
+    start = time.monotonic()
+    assert batcher.encode("sola", timeout=5)[0] == 4
+    assert time.monotonic() - start < 2
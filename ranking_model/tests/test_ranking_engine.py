@@ -0,0 +1,181 @@
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pytest
+
+from ranking_model.src.candidate_source import CsvCandidateSource
+from ranking_model.src.embedding_store import EmbeddingStore
+from ranking_model.src.ranking_engine import (
+    _build_query_text,
+    _concat_candidate_text,
+    _normalize_candidate_row,
+    _parse_field_weights,
+    RankingQueryRequirements,
+    SemanticRankingEngine,
+    top_k_indices,
+)
+
+from ranking_model.tests.helpers import make_rows, write_csv
+
+
+QUERIES = [
+    RankingQueryRequirements(role="ingeniero de mantenimiento", skills=["mantenimiento preventivo"]),
+    RankingQueryRequirements(role="analista de datos", skills=["python", "sql"], location="Cali"),
+    RankingQueryRequirements(role="soldador", years_experience=5),
+    RankingQueryRequirements(skills=["java"]),
+]
+
+
+def _engine(tmp_path: Path, rows: List[Dict[str, str]], name: str = "corpus", **kwargs) -> SemanticRankingEngine:
+    params = dict(
+        ann_index_type=None,
+        quantization=None,
+        mmap_embeddings=False,
+        field_weights=None,
+        hybrid=False,
+    )
+    params.update(kwargs)
+    return SemanticRankingEngine(
+        store=EmbeddingStore(cache_dir=tmp_path / f"cache_{name}"),
+        source=CsvCandidateSource(write_csv(tmp_path / f"{name}.csv", rows)),
+        **params,
+    )
+
+
+def _ranking(engine: SemanticRankingEngine, req: RankingQueryRequirements, top_k=None):
+    return [(c.id, round(c.score, 5)) for c in engine.run_ranking(req, top_k=top_k)]
+
+
+def test_upsert_y_remove_equivalen_a_reconstruir(tmp_path, fake_model):
+    """Altas, modificaciones y bajas incrementales dan el mismo ranking que un motor nuevo."""
+
+    rows = make_rows(200)
+    added = make_rows(5, seed=1)
+    for i, row in enumerate(added):
+        row["id"] = f"N{i}"
+    modified = dict(rows[3], role="contador", skills="excel;sql")
+    removed = [rows[0]["id"], rows[10]["id"], rows[199]["id"], "N2"]
+
+    engine = _engine(tmp_path, rows, "base")
+    assert engine.upsert_candidates(added + [modified]) == 6
+    assert engine.remove_candidates(removed + ["NO_EXISTE"]) == 4
+
+    final = {r["id"]: r for r in rows + added}
+    final[modified["id"]] = modified
+    for cand_id in removed:
+        del final[cand_id]
+    rebuilt = _engine(tmp_path, list(final.values()), "rebuilt")
+
+    assert len(engine) == len(rebuilt) == 201
+    for req in QUERIES:
+        assert sorted(_ranking(engine, req)) == sorted(_ranking(rebuilt, req))
+
+
+def test_top_k_coincide_con_orden_completo():
+    """La selección parcial devuelve lo mismo que ordenar todo y cortar."""
+
+    rng = np.random.default_rng(0)
+    scores = rng.standard_normal(1000).astype("float32")
+    full = np.argsort(-scores)
+    for k in (1, 10, 999, 1000, 5000):
+        assert top_k_indices(scores, k).tolist() == full[:k].tolist()
+    assert top_k_indices(scores, 0).size == 0
+    assert top_k_indices(scores).tolist() == full.tolist()
+
+    subset = rng.choice(1000, size=100, replace=False)
+    expected = subset[np.argsort(-scores[subset])]
+    assert top_k_indices(scores, 7, subset).tolist() == expected[:7].tolist()
+
+
+def test_run_ranking_top_k_es_prefijo_del_ranking_completo(tmp_path, fake_model):
+    engine = _engine(tmp_path, make_rows(300))
+    for req in QUERIES:
+        full = _ranking(engine, req)
+        assert len(full) == 300
+        top = _ranking(engine, req, top_k=10)
+        # Mismos scores en el mismo orden (los empates pueden salir en otro orden)
+        assert [score for _, score in top] == [score for _, score in full[:10]]
+        assert {cid for cid, _ in top} <= {cid for cid, score in full if score >= top[-1][1]}
+
+
+def test_ann_con_prefiltro_selectivo_no_pierde_resultados(tmp_path, fake_model):
+    """El ANN busca dentro del subconjunto filtrado en vez de filtrar su top global."""
+
+    rows = make_rows(3000)
+    exact = _engine(tmp_path, rows, "exact")
+    ann = _engine(
+        tmp_path, rows, "ann",
+        ann_index_type="ivf", ann_min_corpus_size=100, ann_nprobe=1, ann_candidates=100,
+    )
+    assert ann.ann_index is not None
+
+    req = RankingQueryRequirements(role="soldador", skills=["python"])
+
+    def prefilter(table):
+        return np.flatnonzero(table.role_codes == table.roles.code("contador"))
+
+    exact_scores, _, exact_ids, _ = exact.score_candidates(req, prefilter=prefilter)
+    scores, _, ids, _ = ann.score_candidates(req, prefilter=prefilter)
+    subset = prefilter(ann.table)
+
+    assert subset.size >= 100
+    assert ids.size >= 100
+    assert np.isin(ids, subset).all()
+    best = exact_ids[np.argsort(-exact_scores[exact_ids])[:10]]
+    assert len(set(best.tolist()) & set(ids.tolist())) >= 8
+
+
+def test_reescalado_cuantizado_coincide_con_score_exacto(tmp_path, fake_model):
+    """float16/int8 sólo se usan para el primer barrido: los devueltos llevan el score float32."""
+
+    rows = make_rows(500)
+    exact = _engine(tmp_path, rows, "exact")
+    for kind in ("float16", "int8"):
+        quantized = _engine(tmp_path, rows, kind, quantization=kind, rescore_candidates=100)
+        for req in QUERIES:
+            expected = dict(_ranking(exact, req))
+            top = _ranking(quantized, req, top_k=10)
+            assert len(top) == 10
+            for cand_id, score in top:
+                assert abs(score - expected[cand_id]) < 1e-4
+            np.testing.assert_allclose(
+                [s for _, s in top], sorted(expected.values(), reverse=True)[:10], atol=1e-4
+            )
+
+
+def test_pesos_por_campo_se_validan_y_normalizan():
+    assert _parse_field_weights("full=3, role=1,skills=0") == {"full": 0.75, "role": 0.25}
+    assert _parse_field_weights({"FULL": 2, "Skills": 2}) == {"full": 0.5, "skills": 0.5}
+    # Sólo el texto completo (o nada) equivale a no fusionar
+    assert _parse_field_weights("full=1") == {}
+    assert _parse_field_weights("") == {}
+    with pytest.raises(ValueError):
+        _parse_field_weights("full=0.5,nombre=0.5")
+
+
+def test_score_fusionado_es_la_suma_ponderada_de_cosenos(tmp_path, fake_model):
+    """Con vectores por campo de norma 1, el score es sum(w_campo * coseno(consulta, campo))."""
+
+    row = {
+        "id": "F1", "role": "ingeniero de mantenimiento", "skills": "sap pm;excel",
+        "location": "Cali", "years_experience": "4", "languages": "inglés",
+    }
+    engine = _engine(tmp_path, [row], "fields", field_weights="full=2,role=1,skills=1")
+    req = RankingQueryRequirements(role="ingeniero", skills=["excel"])
+
+    def unit(text: str) -> np.ndarray:
+        vec = fake_model.encode([text])[0]
+        return vec / np.linalg.norm(vec)
+
+    query = unit(_build_query_text(req))
+    fields = {
+        "full": unit(_concat_candidate_text(_normalize_candidate_row(row))),
+        "role": unit("Rol: ingeniero de mantenimiento"),
+        "skills": unit("Skills: sap pm; excel"),
+    }
+    weights = {"full": 0.5, "role": 0.25, "skills": 0.25}
+    expected = sum(w * float(query @ fields[name]) for name, w in weights.items())
+
+    (candidate,) = engine.run_ranking(req)
+    assert candidate.score == pytest.approx(expected, abs=1e-5)
@@ -0,0 +1,214 @@
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pytest
+
+from ranking_model.src.candidate_table import CandidateTable, normalize_text
+from ranking_model.src.candidate_source import CsvCandidateSource
+from ranking_model.src.embedding_store import EmbeddingStore
+from ranking_model.src.ranking_engine import RankingQueryRequirements, SemanticRankingEngine
+from ranking_model.src.ranking_orchestrator import RankingOrchestrator, _filter_by_role
+
+from ranking_model.tests.helpers import make_rows, write_csv
+
+
+QUERIES = [
+    RankingQueryRequirements(role="ingeniero", skills=["python"]),
+    RankingQueryRequirements(role="contador", location="Cali", skills=["excel"]),
+    RankingQueryRequirements(role="ingeniero de mantenimiento", location="Pasto", years_experience=7),
+    RankingQueryRequirements(role="analista de datos", skills=["sql"]),
+    RankingQueryRequirements(skills=["soldadura"], location="Cartagena"),
+]
+
+
+def _orchestrator(tmp_path: Path, rows: List[Dict[str, str]], name: str = "corpus", **kwargs) -> RankingOrchestrator:
+    params = dict(
+        ann_index_type=None,
+        quantization=None,
+        mmap_embeddings=False,
+        field_weights=None,
+        hybrid=False,
+    )
+    params.update(kwargs)
+    csv_path = write_csv(tmp_path / f"{name}.csv", rows)
+
+    def factory(source=None):
+        return SemanticRankingEngine(
+            store=EmbeddingStore(cache_dir=tmp_path / f"cache_{name}"),
+            source=source or CsvCandidateSource(csv_path),
+            **params,
+        )
+
+    return RankingOrchestrator(reload_interval_s=0, engine_factory=factory)
+
+
+def _ids(ranked) -> List[str]:
+    return [c.id for c in ranked]
+
+
+def test_prefiltro_con_ann_devuelve_los_mismos_candidatos_que_exacto(tmp_path, fake_model):
+    """Con ANN activo los filtros de rol/ubicación/años no pierden resultados."""
+
+    rows = make_rows(4000)
+    exact = _orchestrator(tmp_path, rows, "exact")
+    ann = _orchestrator(
+        tmp_path, rows, "ann",
+        ann_index_type="ivf", ann_min_corpus_size=500, ann_nprobe=2, ann_candidates=200,
+    )
+    assert ann.engine.ann_index is not None
+
+    for req in QUERIES:
+        expected = exact.run_ranking(req, num_candidates=50)
+        got = ann.run_ranking(req, num_candidates=50)
+        assert expected
+        assert len(got) == len(expected)
+        top = min(10, len(expected))
+        overlap = set(_ids(got)[:top]) & set(_ids(expected)[:top])
+        assert len(overlap) >= 0.8 * top
+
+
+def _filter_by_role_reference(roles: List[str], role_text: str) -> List[int]:
+    """Filtro de rol original: recorrido fila a fila con comparación de strings."""
+
+    tokens = normalize_text(role_text).split()
+    head = tokens[0]
+    general = [i for i, r in enumerate(roles) if head in normalize_text(r).split()]
+    if len(tokens) == 1:
+        return general
+    specific = [i for i, r in enumerate(roles) if normalize_text(role_text) in normalize_text(r)]
+    return specific or general
+
+
+def test_filtro_de_rol_coincide_con_la_busqueda_por_subcadena():
+    """El índice de tokens devuelve lo mismo que la comparación de subcadena original."""
+
+    roles = [
+        "Analista de Datos", "analista de datos senior", "Ingeniero de Mantenimiento",
+        "ingeniero de mantenimiento industrial", "Ingeniero de Sistemas", "Desarrollador Backend",
+        "desarrollador backend java", "Desarrollador Frontend", "Técnico Electricista",
+        "técnico en electricidad", "Soldador", "Contador Público", "analista contable",
+    ]
+    table = CandidateTable.from_rows(
+        {"id": f"R{i}", "role": roles[i % len(roles)]} for i in range(60)
+    )
+    queries = [
+        "analista de dat", "desarrollador back", "ista de datos", "ingeniero de",
+        "ingeniero de mantenimiento", "técnico en elec", "tecnico electricista",
+        "analista", "Ingeniero", "desarrollador backend java", "de mantenimiento ind",
+        "soldador experto", "peluquero canino",
+    ]
+    all_rows = np.arange(len(table), dtype=np.int64)
+    row_roles = [table.role(i) for i in range(len(table))]
+    for query in queries:
+        got = _filter_by_role(table, all_rows, query).tolist()
+        assert got == _filter_by_role_reference(row_roles, query), query
+
+
+def test_recarga_construye_los_catalogos_antes_del_cambio(tmp_path, fake_model, monkeypatch):
+    """Tras recargar, los catálogos ya compilados corresponden al corpus nuevo."""
+
+    from ranking_model.src import ranking_engine
+
+    builds: List[List[str]] = []
+    monkeypatch.setitem(
+        ranking_engine._catalog_compilers, "test_roles", ("roles", lambda roles: builds.append(roles) or roles)
+    )
+    rows = make_rows(300)
+    orch = _orchestrator(tmp_path, rows, "catalogs")
+    assert len(builds) == 1
+    assert "Pescador Artesanal" not in orch.catalogs.roles
+
+    rows[0] = dict(rows[0], role="Pescador Artesanal ", skills="redes; nudos")
+    write_csv(tmp_path / "catalogs.csv", rows)
+    assert orch.reload(force=True, wait=True)
+
+    # La compilación ocurrió en la recarga; las consultas ya no tocan el origen
+    assert len(builds) == 2
+    catalogs = orch.catalogs
+    assert "Pescador Artesanal" in catalogs.roles
+    assert {"redes", "nudos"} <= set(catalogs.skills)
+    assert catalogs.roles == sorted({r["role"].strip() for r in rows})
+
+    def no_read(*args, **kwargs):
+        raise AssertionError("la consulta releyó el origen")
+
+    monkeypatch.setattr(orch.engine.source, "iter_chunks", no_read)
+    assert catalogs.compiled("test_roles") is builds[1]
+    assert orch.run_ranking(RankingQueryRequirements(role="pescador"), num_candidates=5)
+    assert len(builds) == 2
+
+
+def test_ranking_por_lotes_coincide_con_consultas_sueltas(tmp_path, fake_model):
+    """El lote aplica los mismos filtros antes de recuperar: mismo resultado que run_ranking."""
+
+    rows = make_rows(3000)
+    modes = {
+        "exact": {},
+        "ann": dict(ann_index_type="ivf", ann_min_corpus_size=500, ann_nprobe=2, ann_candidates=200),
+        "int8": dict(quantization="int8", rescore_candidates=100),
+        "hybrid": dict(hybrid=True, ann_index_type="ivf", ann_min_corpus_size=500, ann_nprobe=2, ann_candidates=200),
+    }
+    queries = QUERIES + [RankingQueryRequirements(role="programador de videojuegos")]
+    for name, kwargs in modes.items():
+        orch = _orchestrator(tmp_path, rows, name, **kwargs)
+        batch = orch.run_ranking_batch(queries, num_candidates=30)
+        for req, got in zip(queries, batch):
+            expected = orch.run_ranking(req, num_candidates=30)
+            # Mismos scores en el mismo orden (los empates pueden salir en otro orden)
+            assert [round(c.score, 4) for c in got] == [round(c.score, 4) for c in expected], (name, req)
+            if got and name != "hybrid":
+                cutoff = got[-1].score + 1e-4
+                assert {c.id for c in got if c.score > cutoff} <= set(_ids(expected)), (name, req)
+
+
+def test_alta_invalida_durante_la_recarga_no_la_aborta(tmp_path, fake_model):
+    """Una alta rechazada por el motor no se encola para reaplicarse en la recarga."""
+
+    rows = make_rows(200)
+    orch = _orchestrator(tmp_path, rows, "invalid_op")
+    factory = orch._engine_factory
+    started = threading.Event()
+    proceed = threading.Event()
+
+    def slow_factory(source=None):
+        started.set()
+        proceed.wait(5)
+        return factory(source=source)
+
+    orch._engine_factory = slow_factory
+    assert orch.reload(force=True)
+    assert started.wait(5)
+    with pytest.raises(ValueError):
+        orch.upsert_candidates([{"id": ""}])
+    orch.upsert_candidates([dict(rows[0], id="NUEVO-1")])
+    proceed.set()
+    while orch.reloading:
+        time.sleep(0.01)
+
+    assert orch.reloads == 1
+    assert "NUEVO-1" in orch.engine.table.ids
+
+
+def test_lote_hibrido_con_k_distintos_coincide_con_consultas_sueltas(tmp_path, fake_model, monkeypatch):
+    """Con RRF el top-k no es prefijo de un k mayor: cada consulta se corta con su k."""
+
+    from ranking_model.src import ranking_features, ranking_orchestrator
+
+    monkeypatch.setattr(ranking_orchestrator, "RRF_DEPTH", 5)
+    orch = _orchestrator(tmp_path, make_rows(1500), "mixed_k", hybrid=True)
+    monkeypatch.setattr(ranking_features, "_orchestrator", orch)
+
+    queries = [
+        ranking_features.QueryRequirements(role="ingeniero", skills=["python"], num_candidates=3),
+        ranking_features.QueryRequirements(role="ingeniero", skills=["python"], num_candidates=40),
+        ranking_features.QueryRequirements(role="analista de datos", skills=["sql"], num_candidates=7),
+        ranking_features.QueryRequirements(skills=["soldadura"], location="Cali"),
+    ]
+    batch = ranking_features.run_ranking_batch(queries)
+    for query, (got, used) in zip(queries, batch):
+        expected, _ = ranking_features.run_ranking(query)
+        assert used is query
+        assert _ids(got) == _ids(expected), query
@@ -6,6 +6,8 @@ import re
 from dataclasses import dataclass
 from typing import Optional
 
+from NLP.src.catalog_matcher import CatalogMatcher
+
 
 @dataclass
 class SearchParams:
@@ -51,6 +53,20 @@ class NLPKeywordExtractor:
         "lean", "six sigma", "scrum", "jira", "autocad", "solidworks"
     ]
 
+    # Forma escrita (con y sin tilde) -> idioma devuelto
+    KNOWN_LANGUAGES = {
+        "inglés": "Inglés", "ingles": "Inglés",
+        "francés": "Francés", "frances": "Francés",
+        "portugués": "Portugués", "portugues": "Portugués",
+    }
+
+    # Catálogos compilados una sola vez (Aho-Corasick, ver NLP/src/catalog_matcher.py).
+    # La consulta ya llega en minúsculas y se compara tal cual (fold=str), sin
+    # plegar tildes: las ciudades se devuelven como se escribieron ("Bogota"/"Bogotá").
+    _CITY_MATCHER = CatalogMatcher(KNOWN_CITIES, fold=str)
+    _SKILL_MATCHER = CatalogMatcher(KNOWN_SKILLS, fold=str)
+    _LANGUAGE_MATCHER = CatalogMatcher(KNOWN_LANGUAGES, fold=str)
+
     def extract(self, query: str) -> SearchParams:
         """
         Extrae parámetros de búsqueda desde texto natural.
@@ -92,9 +108,9 @@ class NLPKeywordExtractor:
     def _extract_location(self, query: str) -> str:
         """Extrae la ubicación."""
         # Buscar ciudades conocidas
-        for city in self.KNOWN_CITIES:
-            if city in query:
-                return city.title()
+        city = self._CITY_MATCHER.first(query)
+        if city:
+            return city.title()
         
         # Patrón general: "en [ciudad]"
         match = re.search(r"\ben\s+([a-záéíóúñ]+)(?:\s|,|$)", query)
@@ -108,9 +124,8 @@ class NLPKeywordExtractor:
         found_skills = []
         
         # Buscar skills conocidos
-        for skill in self.KNOWN_SKILLS:
-            if skill in query:
-                found_skills.append(skill.upper() if len(skill) <= 4 else skill.title())
+        for skill in self._SKILL_MATCHER.find_all(query):
+            found_skills.append(skill.upper() if len(skill) <= 4 else skill.title())
         
         # Patrón: "con [skill]" o "sepa [skill]"
         match = re.search(r"(?:con|sepa|maneje|experiencia en)\s+([a-záéíóúñ0-9\s,]+?)(?:\s+en|\s+que|,|$)", query)
@@ -137,13 +152,7 @@ class NLPKeywordExtractor:
 
     def _extract_languages(self, query: str) -> str:
         """Extrae idiomas requeridos."""
-        languages = []
-        
-        if "inglés" in query or "ingles" in query:
-            languages.append("Inglés")
-        if "francés" in query or "frances" in query:
-            languages.append("Francés")
-        if "portugués" in query or "portugues" in query:
-            languages.append("Portugués")
-        
+        languages = list(dict.fromkeys(
+            self.KNOWN_LANGUAGES[form] for form in self._LANGUAGE_MATCHER.find_all(query)
+        ))
         return ", ".join(languages) if languages else "Español"
\ No newline at end of file
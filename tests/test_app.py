@@ -0,0 +1,48 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+from query_executor import BoundedExecutor
+
+
+@pytest.fixture
+def client():
+    # Sin ``with``: no se ejecuta el lifespan (no carga modelos)
+    return TestClient(app_module.app)
+
+
+def test_query_responde_503_con_la_cola_llena(client, monkeypatch):
+    executor = BoundedExecutor("thread", workers=1, queue_max=0)
+    release = threading.Event()
+    monkeypatch.setattr(app_module, "query_executor", executor)
+    try:
+        executor.submit(release.wait, 5)
+        response = client.post("/query", json={"text": "Busco un ingeniero en Cartagena"})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+@pytest.mark.parametrize("method, path", [("post", "/admin/reload"), ("get", "/admin/timings")])
+def test_admin_rechaza_el_modo_procesos(client, monkeypatch, method, path):
+    """En modo procesos el estado vive en los workers: el endpoint no finge aplicarse."""
+
+    executor = BoundedExecutor("process", workers=1, queue_max=0)
+    monkeypatch.setattr(app_module, "query_executor", executor)
+    monkeypatch.setattr(app_module, "reload_corpus", lambda force: pytest.fail("recargó el padre"))
+    try:
+        response = getattr(client, method)(path)
+        assert response.status_code == 409
+        assert "QUERY_EXECUTOR=process" in response.json()["detail"]
+    finally:
+        executor.shutdown()
+
+
+def test_admin_timings_en_modo_hilos(client):
+    response = client.get("/admin/timings")
+    assert response.status_code == 200
+    assert response.json()["executor"]["kind"] == "thread"
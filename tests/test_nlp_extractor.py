@@ -0,0 +1,23 @@
+import pytest
+
+from scraper.nlp_extractor import NLPKeywordExtractor
+
+
+@pytest.mark.parametrize("query, location", [
+    ("Busco ingeniero en Bogota", "Bogota"),
+    ("Busco ingeniero en Bogotá", "Bogotá"),
+    ("Necesito soldador en MEDELLÍN", "Medellín"),
+    ("Requiero contador en santa marta o cucuta", "Santa Marta"),
+    ("Busco técnico en Montería", "Montería"),
+])
+def test_ciudad_se_devuelve_como_se_escribio(query, location):
+    assert NLPKeywordExtractor().extract(query).location == location
+
+
+def test_skills_e_idiomas_conservan_el_resultado_original():
+    params = NLPKeywordExtractor().extract(
+        "Busco ingeniero con SAP PM y Power BI en Cali, que hable ingles y portugués"
+    )
+    assert params.skills.split(", ")[:3] == ["SAP", "Sap Pm", "Power Bi"]
+    assert params.languages == "Inglés, Portugués"
+    assert NLPKeywordExtractor().extract("Busco analista en Pasto").languages == "Español"
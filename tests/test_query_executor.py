@@ -0,0 +1,33 @@
+import threading
+
+import pytest
+
+from query_executor import BoundedExecutor, ExecutorBusy
+
+
+def test_cola_llena_lanza_executor_busy():
+    """Con todos los workers ocupados y la cola llena, submit rechaza sin bloquear."""
+
+    executor = BoundedExecutor("thread", workers=1, queue_max=1)
+    release = threading.Event()
+    try:
+        running = executor.submit(release.wait, 5)
+        queued = executor.submit(lambda: "en cola")
+        with pytest.raises(ExecutorBusy):
+            executor.submit(lambda: "rechazada")
+        assert executor.stats()["in_flight"] == 2
+        assert executor.stats()["rejected"] == 1
+
+        # Al terminar, los huecos se liberan y se vuelve a aceptar trabajo
+        release.set()
+        assert running.result(timeout=5) is True
+        assert queued.result(timeout=5) == "en cola"
+        assert executor.submit(lambda: "aceptada").result(timeout=5) == "aceptada"
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_tipo_de_ejecutor_desconocido():
+    with pytest.raises(ValueError):
+        BoundedExecutor("gpu")
@@ -0,0 +1,144 @@
+import random
+from typing import List, Optional, Tuple
+
+import pytest
+
+import query_pipeline
+from query_pipeline import NoCandidatesFound, NotAJobQuery, QueryResultCache, RoleCatalogIndex
+from ranking_model.src.ranking_orchestrator import _normalize_text
+from ranking_model.src.ranking_engine import RankedCandidate
+
+
+def _candidate(cid: str) -> RankedCandidate:
+    return RankedCandidate(
+        id=cid, role="Ingeniero de Mantenimiento", skills=["sap pm"], location="Cartagena",
+        years_experience=5, languages=["inglés"], score=0.8, raw_row={"id": cid},
+    )
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """run_query_pipeline con cache vacío, versión de corpus controlada y pipeline contado."""
+
+    state = {"version": 0, "calls": 0, "result": None}
+
+    def fake_pipeline(text):
+        state["calls"] += 1
+        if isinstance(state["result"], Exception):
+            raise state["result"]
+        return [_candidate("C1"), _candidate("C2")], {"role": "ingeniero"}
+
+    monkeypatch.setattr(query_pipeline, "_result_cache", QueryResultCache(max_entries=16, ttl_s=60))
+    monkeypatch.setattr(query_pipeline, "corpus_version", lambda: state["version"])
+    monkeypatch.setattr(query_pipeline, "_run_query_pipeline", fake_pipeline)
+    return state
+
+
+def test_cache_se_invalida_al_cambiar_la_version_del_corpus(pipeline):
+    query_pipeline.run_query_pipeline("Busco un ingeniero en Cartagena")
+    query_pipeline.run_query_pipeline("busco un  INGENIERO en cartagena")
+    assert pipeline["calls"] == 1
+
+    pipeline["version"] += 1
+    query_pipeline.run_query_pipeline("Busco un ingeniero en Cartagena")
+    assert pipeline["calls"] == 2
+
+
+def test_cache_descarta_resultados_de_una_version_anterior():
+    cache = QueryResultCache(max_entries=4, ttl_s=60)
+    assert cache.get("q", 1) is None
+    cache.put("q", 0, "calculado con el corpus anterior")
+    assert cache.get("q", 1) is None
+
+    cache.put("q", 1, "vigente")
+    assert cache.get("q", 1) == "vigente"
+    assert QueryResultCache(max_entries=4, ttl_s=-1).get("q", 1) is None
+
+
+def test_cache_devuelve_copias_independientes(pipeline):
+    first, _ = query_pipeline.run_query_pipeline("Busco un ingeniero en Cartagena")
+    first[0].score = -1.0
+    first[0].skills.append("modificado")
+    first.pop()
+
+    second, used_query = query_pipeline.run_query_pipeline("Busco un ingeniero en Cartagena")
+    third, _ = query_pipeline.run_query_pipeline("Busco un ingeniero en Cartagena")
+    assert pipeline["calls"] == 1
+    assert [c.id for c in second] == ["C1", "C2"]
+    assert second[0].score == 0.8 and second[0].skills == ["sap pm"]
+    assert second[0] is not third[0]
+    assert used_query == {"role": "ingeniero"}
+
+
+@pytest.mark.parametrize("error", [NotAJobQuery("no es una búsqueda"), NoCandidatesFound("sin candidatos")])
+def test_cache_guarda_rechazos_conocidos(pipeline, error):
+    pipeline["result"] = error
+    raised = []
+    for _ in range(2):
+        with pytest.raises(type(error)) as exc_info:
+            query_pipeline.run_query_pipeline("hola que tal")
+        raised.append(exc_info.value)
+
+    assert pipeline["calls"] == 1
+    assert raised[1] is not raised[0]
+    assert raised[1].args == error.args
+
+
+def test_cache_no_guarda_otros_errores(pipeline):
+    pipeline["result"] = RuntimeError("fallo del modelo")
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            query_pipeline.run_query_pipeline("Busco un ingeniero en Cartagena")
+    assert pipeline["calls"] == 2
+
+
+ROLES = [
+    "Analista de Datos", "analista de datos senior", "Ingeniero de Mantenimiento",
+    "Ingeniero de Mantenimiento Industrial", "Ingeniero de Sistemas", "Desarrollador Backend",
+    "Técnico Electricista", "técnico en electricidad", "Soldador", "Contador Público",
+    "Diseñador Gráfico", "Auxiliar de Enfermería", "enfermero", "Mecánico",
+]
+
+
+def _best_role_reference(roles: List[str], raw_text: str) -> Tuple[Optional[str], float]:
+    """Bucle original rol a rol de ``_infer_role_from_catalog``."""
+    text_norm = _normalize_text(raw_text)
+    q_tokens = set(text_norm.split())
+    best_role, best_score = None, 0.0
+    for role in roles:
+        r_norm = _normalize_text(role)
+        if not r_norm:
+            continue
+        score = float(len(q_tokens & set(r_norm.split())))
+        if r_norm in text_norm or text_norm in r_norm:
+            score += 0.5
+        if score > best_score:
+            best_role, best_score = role, score
+    return best_role, best_score
+
+
+@pytest.mark.parametrize("text", [
+    "Busco un ingeniero de mantenimiento en Cartagena",
+    "ingeniero",                                # empate: gana el primero del catálogo
+    "de",                                       # contenido en muchos roles
+    "Necesito un TECNICO ELECTRICISTA",         # sin tildes ni mayúsculas
+    "diseñador grafico con photoshop",
+    "auxiliar de enfermeria y enfermero",       # varios roles contenidos
+    "ingeniero de mantenimiento industrial senior",
+    "analista de dat",                          # el texto está dentro de un rol
+    "mecanico",
+    "peluquero canino",
+])
+def test_indice_de_roles_coincide_con_el_bucle_original(text):
+    assert RoleCatalogIndex(ROLES).best_match(_normalize_text(text)) == _best_role_reference(ROLES, text)
+
+
+def test_indice_de_roles_catalogos_aleatorios():
+    rng = random.Random(0)
+    words = ["ingeniero", "ingeniera", "de", "datos", "técnico", "tecnico", "mantenimiento", "sistemas", "año", "ano"]
+    for _ in range(200):
+        roles = sorted({" ".join(rng.choice(words) for _ in range(rng.randint(1, 3))) for _ in range(rng.randint(1, 8))})
+        index = RoleCatalogIndex(roles)
+        for _ in range(10):
+            text = " ".join(rng.choice(words + ["busco", "un"]) for _ in range(rng.randint(1, 6)))
+            assert index.best_match(_normalize_text(text)) == _best_role_reference(roles, text), (roles, text)